@@ -19,4 +19,11 @@ if not _available_providers:
 print("[INFO] Available providers: ", _available_providers)
 
 from ._node import NodeArg
+from ._bf16 import float32_to_bfloat16, bfloat16_to_float32
+from ._quant import dequantize
+from ._tensor import TensorView
+from ._metadata import ModelMetadata, read_model_metadata
+from ._base_session import RunOptions, CancelToken
+from ._scheduler import Scheduler, set_scheduler, get_scheduler
+from ._memory import MemoryBudget, set_memory_budget, get_memory_budget
 from ._session import SessionOptions, InferenceSession
@@ -7,6 +7,7 @@
 # first implementation of AXCLRTSession contributed by zylo117
 
 import atexit
+import functools
 import os
 import time
 from typing import Any, Sequence
@@ -15,9 +16,11 @@ import ml_dtypes as mldt
 import numpy as np
 
 from ._axclrt_capi import axclrt_cffi, axclrt_lib
-from ._axclrt_types import VNPUType, ModelType
-from ._base_session import Session, SessionOptions
+from ._axclrt_types import VNPUType, ModelType, MemPolicy
+from ._base_session import Session, SessionOptions, SharedModel, _write_planes
+from ._bf16 import float32_to_bfloat16
 from ._node import NodeArg
+from ._tensor import TensorView
 
 __all__: ["AXCLRTSession"]
 
@@ -26,25 +29,30 @@ _is_axclrt_engine_initialized = False
 _all_model_instances = []
 
 
+_DTYPES = {
+    axclrt_lib.AXCL_DATA_TYPE_UINT8: np.dtype(np.uint8),
+    axclrt_lib.AXCL_DATA_TYPE_INT8: np.dtype(np.int8),
+    axclrt_lib.AXCL_DATA_TYPE_UINT16: np.dtype(np.uint16),
+    axclrt_lib.AXCL_DATA_TYPE_INT16: np.dtype(np.int16),
+    axclrt_lib.AXCL_DATA_TYPE_UINT32: np.dtype(np.uint32),
+    axclrt_lib.AXCL_DATA_TYPE_INT32: np.dtype(np.int32),
+    axclrt_lib.AXCL_DATA_TYPE_FP32: np.dtype(np.float32),
+    axclrt_lib.AXCL_DATA_TYPE_BF16: np.dtype(mldt.bfloat16),
+}
+
+# NONE and NHWC share the value 0, so only NCHW can be told apart
+_LAYOUTS = {
+    axclrt_lib.AXCL_DATA_LAYOUT_NCHW: "NCHW",
+}
+
+
 def _transform_dtype(dtype):
-    if dtype == axclrt_cffi.cast("axclrtEngineDataType", axclrt_lib.AXCL_DATA_TYPE_UINT8):
-        return np.dtype(np.uint8)
-    elif dtype == axclrt_cffi.cast("axclrtEngineDataType", axclrt_lib.AXCL_DATA_TYPE_INT8):
-        return np.dtype(np.int8)
-    elif dtype == axclrt_cffi.cast("axclrtEngineDataType", axclrt_lib.AXCL_DATA_TYPE_UINT16):
-        return np.dtype(np.uint16)
-    elif dtype == axclrt_cffi.cast("axclrtEngineDataType", axclrt_lib.AXCL_DATA_TYPE_INT16):
-        return np.dtype(np.int16)
-    elif dtype == axclrt_cffi.cast("axclrtEngineDataType", axclrt_lib.AXCL_DATA_TYPE_UINT32):
-        return np.dtype(np.uint32)
-    elif dtype == axclrt_cffi.cast("axclrtEngineDataType", axclrt_lib.AXCL_DATA_TYPE_INT32):
-        return np.dtype(np.int32)
-    elif dtype == axclrt_cffi.cast("axclrtEngineDataType", axclrt_lib.AXCL_DATA_TYPE_FP32):
-        return np.dtype(np.float32)
-    elif dtype == axclrt_cffi.cast("axclrtEngineDataType", axclrt_lib.AXCL_DATA_TYPE_BF16):
-        return np.dtype(mldt.bfloat16)
-    else:
-        raise ValueError(f"Unsupported data type '{dtype}'.")
+    # cffi hands enum values out as plain ints
+    try:
+        return _DTYPES[int(dtype)]
+    except KeyError:
+        raise ValueError(f"Unsupported data type '{dtype}'.") from None
+
 
 def _initialize_axclrt():
     global _is_axclrt_initialized
@@ -78,6 +86,43 @@ def _get_vnpu_type() -> VNPUType:
     return VNPUType(vnpu_type[0])
 
 
+def _get_mem_policy(provider_options: dict[Any, Any], key: str) -> MemPolicy:
+    policy = provider_options.get(key, MemPolicy.NORMAL_ONLY)
+    if isinstance(policy, str):
+        try:
+            policy = MemPolicy[policy.upper()]
+        except KeyError:
+            raise ValueError(
+                f"Invalid {key} '{policy}', must be one of {[p.name.lower() for p in MemPolicy]}.") from None
+    if not isinstance(policy, MemPolicy):
+        raise TypeError(f"Invalid {key} type: {type(policy)}. Must be str or MemPolicy.")
+    return policy
+
+
+def _malloc(size: int, policy: MemPolicy, cached: bool):
+    dev_ptr = axclrt_cffi.new("void **")
+    policy = axclrt_cffi.cast("axclrtMemMallocPolicy", policy.value)
+    if cached:
+        ret = axclrt_lib.axclrtMallocCached(dev_ptr, size, policy)
+    else:
+        ret = axclrt_lib.axclrtMalloc(dev_ptr, size, policy)
+    if 0 != ret or dev_ptr[0] == axclrt_cffi.NULL:
+        raise RuntimeError(f"{'axclrtMallocCached' if cached else 'axclrtMalloc'} failed 0x{ret:08x}.")
+    return dev_ptr[0]
+
+
+def _unload_model(model_id):
+    if model_id[0] != 0:
+        axclrt_lib.axclrtEngineUnload(model_id[0])
+    model_id[0] = 0
+
+
+def _model_size(path_or_bytes) -> int:
+    if isinstance(path_or_bytes, bytes):
+        return len(path_or_bytes)
+    return os.path.getsize(path_or_bytes)
+
+
 def _get_version():
     major, minor, patch = axclrt_cffi.new('int32_t *'), axclrt_cffi.new('int32_t *'), axclrt_cffi.new(
         'int32_t *')
@@ -98,9 +143,22 @@ class AXCLRTSession(Session):
         self._device_index = 0
         self._io = None
         self._model_id = None
+        # device buffers allocated by this session, inputs may point at buffers of linked sessions
+        self._input_buffers = []
+        self._output_buffers = []
+        self._staging_buffers = {}
+
+        _provider_options = provider_options[0] if provider_options else {}
+        self._device_index = _provider_options.get("device_id", 0)
+        self._device_key = ("AXCLRT", self._device_index)
+        if isinstance(path_or_bytes, (str, os.PathLike)):
+            self._model_name = os.path.splitext(os.path.basename(path_or_bytes))[0]
 
-        if provider_options is not None and "device_id" in provider_options[0]:
-            self._device_index = provider_options[0].get("device_id", 0)
+        # device memory policy, model staging buffer and io buffers are selected separately
+        self._model_mem_policy = _get_mem_policy(_provider_options, "model_mem_policy")
+        self._model_mem_cached = bool(_provider_options.get("model_mem_cached", False))
+        self._io_mem_policy = _get_mem_policy(_provider_options, "io_mem_policy")
+        self._io_mem_cached = bool(_provider_options.get("io_mem_cached", False))
 
         lst = axclrt_cffi.new("axclrtDeviceList *")
         ret = axclrt_lib.axclrtGetDeviceList(lst)
@@ -152,11 +210,17 @@ class AXCLRTSession(Session):
         # model handle, context, info, io
         self._model_id = axclrt_cffi.new("uint64_t *")
         self._context_id = axclrt_cffi.new("uint64_t *")
+        # the model is unloaded with the last clone
+        self._model = SharedModel(functools.partial(_unload_model, self._model_id))
 
         # get vnpu type
         self._vnpu_type = _get_vnpu_type()
         print(f"[INFO] VNPU type: {self._vnpu_type}")
 
+        # cmm the model takes on the device, known before loading it when the runtime can tell
+        self._model_cmm = self._get_model_usage(path_or_bytes)
+        self._reserve_memory(self._model_cmm or _model_size(path_or_bytes), self._model)
+
         # load model
         ret = self._load(path_or_bytes)
         if 0 != ret:
@@ -166,17 +230,23 @@ class AXCLRTSession(Session):
         # get model info
         self._info = self._get_info()
         self._shape_count = self._get_shape_count()
-        self._inputs = self._get_inputs()
-        self._outputs = self._get_outputs()
+        # names, data types and layouts are the same in every shape group, only dims differ
+        self._io_static = {}
+        self._init_io_meta(path_or_bytes, sess_options)
 
         # prepare io
         self._io = self._prepare_io()
+        self._reserve_memory(self.get_memory_usage()["model_cmm"], self._model)
+        self._reserve_memory(self.get_memory_usage()["io"])
 
         _all_model_instances.append(self)
 
+        self._warmup(sess_options)
+
     def __del__(self):
         self._unload()
-        _all_model_instances.remove(self)
+        if self in _all_model_instances:
+            _all_model_instances.remove(self)
 
     def _load(self, path_or_bytes):
         # model buffer, almost copied from onnx runtime
@@ -189,18 +259,22 @@ class AXCLRTSession(Session):
             _model_buffer = axclrt_cffi.new("char[]", path_or_bytes)
             _model_buffer_size = len(path_or_bytes)
 
-            dev_mem_ptr = axclrt_cffi.new('void **', axclrt_cffi.NULL)
-            ret = axclrt_lib.axclrtMalloc(dev_mem_ptr, _model_buffer_size, axclrt_lib.AXCL_MEM_MALLOC_NORMAL_ONLY)
-            if ret != 0:
-                raise RuntimeError("axclrtMalloc failed.")
+            dev_mem_ptr = _malloc(_model_buffer_size, self._model_mem_policy, self._model_mem_cached)
 
-            ret = axclrt_lib.axclrtMemcpy(dev_mem_ptr[0], _model_buffer, _model_buffer_size, axclrt_lib.AXCL_MEMCPY_HOST_TO_DEVICE)
+            ret = axclrt_lib.axclrtMemcpy(dev_mem_ptr, _model_buffer, _model_buffer_size, axclrt_lib.AXCL_MEMCPY_HOST_TO_DEVICE)
             if ret != 0:
-                axclrt_lib.axclrtFree(dev_mem_ptr[0])
+                axclrt_lib.axclrtFree(dev_mem_ptr)
                 raise RuntimeError("axclrtMemcpy failed.")
+            if self._model_mem_cached:
+                ret = axclrt_lib.axclrtMemFlush(dev_mem_ptr, _model_buffer_size)
+                if ret != 0:
+                    axclrt_lib.axclrtFree(dev_mem_ptr)
+                    raise RuntimeError("axclrtMemFlush failed.")
 
-            ret = axclrt_lib.axclrtEngineLoadFromMem(dev_mem_ptr[0], _model_buffer_size, self._model_id)
-            axclrt_lib.axclrtFree(dev_mem_ptr[0])
+            ret = axclrt_lib.axclrtEngineLoadFromMem(dev_mem_ptr, _model_buffer_size, self._model_id)
+            if ret == 0 and not self._model_cmm:
+                self._model_cmm = self._get_model_usage(dev_mem_ptr, _model_buffer_size)
+            axclrt_lib.axclrtFree(dev_mem_ptr)
             if ret != 0:
                 raise RuntimeError("axclrtEngineLoadFromMem failed.")
         else:
@@ -211,21 +285,67 @@ class AXCLRTSession(Session):
             raise RuntimeError("axclrtEngineCreateContext failed")
         return ret
 
+    def _get_model_usage(self, path_or_ptr, size: int = 0) -> int:
+        # older runtimes lack the usage query, the budget then goes by the model size
+        sys_size = axclrt_cffi.new("int64_t *")
+        cmm_size = axclrt_cffi.new("int64_t *")
+        try:
+            if isinstance(path_or_ptr, (str, os.PathLike)):
+                ret = axclrt_lib.axclrtEngineGetUsage(os.fsencode(path_or_ptr), sys_size, cmm_size)
+            elif isinstance(path_or_ptr, bytes):
+                return 0
+            else:
+                ret = axclrt_lib.axclrtEngineGetUsageFromMem(path_or_ptr, size, sys_size, cmm_size)
+        except AttributeError:
+            return 0
+        return cmm_size[0] if ret == 0 else 0
+
+    def _release(self):
+        self._unload()
+
+    def get_memory_usage(self) -> dict[str, int]:
+        io = sum(size for _, size in self._input_buffers + self._output_buffers)
+        # clones share the model, each reports it
+        model_cmm = self._model_cmm if self._model is not None else 0
+        return {
+            "model_cmm": model_cmm,
+            "io": io,
+            "host_model_buffer": 0,
+            "device": model_cmm + io,
+            "total": model_cmm + io,
+        }
+
     def _unload(self):
+        for dev_ptr, _ in self._input_buffers + self._output_buffers:
+            axclrt_lib.axclrtFree(dev_ptr)
+        self._input_buffers, self._output_buffers = [], []
         if self._io is not None:
-            dev_size = axclrt_cffi.new("uint64_t *")
-            dev_prt = axclrt_cffi.new("void **")
-            for i in range(axclrt_lib.axclrtEngineGetNumInputs(self._info[0])):
-                axclrt_lib.axclrtEngineGetInputBufferByIndex(self._io[0], i, dev_prt, dev_size)
-                axclrt_lib.axclrtFree(dev_prt[0])
-            for i in range(axclrt_lib.axclrtEngineGetNumOutputs(self._info[0])):
-                axclrt_lib.axclrtEngineGetOutputBufferByIndex(self._io[0], i, dev_prt, dev_size)
-                axclrt_lib.axclrtFree(dev_prt[0])
             axclrt_lib.axclrtEngineDestroyIO(self._io[0])
             self._io = None
-        if self._model_id[0] is not None and self._model_id[0] != 0:
-            axclrt_lib.axclrtEngineUnload(self._model_id[0])
-            self._model_id[0] = 0
+        if self._model is not None:
+            self._model.release()
+            self._model = None
+
+    def _init_clone(self, clone: "AXCLRTSession"):
+        for name in ("_device_index", "_device_id", "_thread_context", "_model_id", "_model_cmm", "_vnpu_type",
+                     "_io_mem_policy", "_io_mem_cached", "_model_mem_policy", "_model_mem_cached", "_info",
+                     "_io_static", "soc_name"):
+            setattr(clone, name, getattr(self, name))
+        if hasattr(self, "_model_name"):
+            clone._model_name = self._model_name
+        clone._io = None
+        clone._input_buffers, clone._output_buffers = [], []
+        clone._staging_buffers = {}
+        ret = axclrt_lib.axclrtSetCurrentContext(self._thread_context[0])
+        if ret != 0:
+            raise RuntimeError("axclrtSetCurrentContext failed")
+        clone._context_id = axclrt_cffi.new("uint64_t *")
+        ret = axclrt_lib.axclrtEngineCreateContext(clone._model_id[0], clone._context_id)
+        if ret != 0:
+            raise RuntimeError("axclrtEngineCreateContext failed")
+        clone._io = clone._prepare_io()
+        clone._reserve_memory(clone.get_memory_usage()["io"])
+        _all_model_instances.append(clone)
 
     def _get_model_tool_version(self):
         model_tool_version = axclrt_lib.axclrtEngineGetModelCompilerVersion(self._model_id[0])
@@ -246,55 +366,110 @@ class AXCLRTSession(Session):
             raise RuntimeError("axclrtEngineGetShapeGroupsCount failed.")
         return count[0]
 
-    def _get_inputs(self):
-        inputs = []
-        for group in range(self._shape_count):
-            one_group_io = []
-            for index in range(axclrt_lib.axclrtEngineGetNumInputs(self._info[0])):
-                cffi_name = axclrt_lib.axclrtEngineGetInputNameByIndex(self._info[0], index)
-                name = axclrt_cffi.string(cffi_name).decode("utf-8")
-
-                cffi_dtype = axclrt_cffi.new("axclrtEngineDataType *")
-                ret = axclrt_lib.axclrtEngineGetInputDataType(self._info[0], index, cffi_dtype)
+    def _get_static_io(self, io_type: str):
+        static_io = self._io_static.get(io_type)
+        if static_io is None:
+            get_num = getattr(axclrt_lib, f"axclrtEngineGetNum{io_type}s")
+            get_name = getattr(axclrt_lib, f"axclrtEngineGet{io_type}NameByIndex")
+            get_dtype = getattr(axclrt_lib, f"axclrtEngineGet{io_type}DataType")
+            get_layout = getattr(axclrt_lib, f"axclrtEngineGet{io_type}DataLayout")
+            cffi_dtype = axclrt_cffi.new("axclrtEngineDataType *")
+            cffi_layout = axclrt_cffi.new("axclrtEngineDataLayout *")
+            static_io = []
+            for index in range(get_num(self._info[0])):
+                name = axclrt_cffi.string(get_name(self._info[0], index)).decode("utf-8")
+                ret = get_dtype(self._info[0], index, cffi_dtype)
                 if ret != 0:
-                    raise RuntimeError("axclrtEngineGetInputDataType failed.")
-                dtype = _transform_dtype(cffi_dtype[0])
+                    raise RuntimeError(f"axclrtEngineGet{io_type}DataType failed.")
+                # the layout is informational, a runtime without it must not fail the load
+                layout = None
+                if get_layout(self._info[0], index, cffi_layout) == 0:
+                    layout = _LAYOUTS.get(int(cffi_layout[0]))
+                static_io.append((name, _transform_dtype(cffi_dtype[0]), layout))
+            self._io_static[io_type] = static_io
+        return static_io
+
+    def _get_io(self, io_type: str, group: int):
+        get_dims = getattr(axclrt_lib, f"axclrtEngineGet{io_type}Dims")
+        get_size = getattr(axclrt_lib, f"axclrtEngineGet{io_type}SizeByIndex")
+        cffi_dims = axclrt_cffi.new("axclrtEngineIODims *")
+        one_group_io = []
+        for index, (name, dtype, layout) in enumerate(self._get_static_io(io_type)):
+            ret = get_dims(self._info[0], group, index, cffi_dims)
+            if ret != 0:
+                raise RuntimeError(f"axclrtEngineGet{io_type}Dims failed.")
+            shape = [cffi_dims.dims[i] for i in range(cffi_dims.dimCount)]
+            size = int(get_size(self._info[0], group, index))
+            one_group_io.append(NodeArg(name, dtype, shape, layout=layout, size=size))
+        return one_group_io
+
+    def _get_inputs(self, shape_group: int):
+        return self._get_io("Input", shape_group)
+
+    def _get_outputs(self, shape_group: int):
+        return self._get_io("Output", shape_group)
+
+    def _link_input_buffer(self, index: int, source: "AXCLRTSession", out_index: int, copy: bool) -> bool:
+        src_ptr, src_size = source._output_buffers[out_index]
+        if copy or src_size < self._input_buffers[index][1]:
+            return True
+        ret = axclrt_lib.axclrtEngineSetInputBufferByIndex(self._io[0], index, src_ptr, src_size)
+        if 0 != ret:
+            raise RuntimeError(f"axclrtEngineSetInputBufferByIndex failed 0x{ret:08x} for input {index}.")
+        return False
 
-                cffi_dims = axclrt_cffi.new("axclrtEngineIODims *")
-                ret = axclrt_lib.axclrtEngineGetInputDims(self._info[0], group, index, cffi_dims)
-                if ret != 0:
-                    raise RuntimeError("axclrtEngineGetInputDims failed.")
-                shape = [cffi_dims.dims[i] for i in range(cffi_dims.dimCount)]
+    def _swap_state(self, in_index: int, out_index: int):
+        in_ptr, in_size = axclrt_cffi.new("void **"), axclrt_cffi.new("uint64_t *")
+        out_ptr, out_size = axclrt_cffi.new("void **"), axclrt_cffi.new("uint64_t *")
+        ret = axclrt_lib.axclrtEngineGetInputBufferByIndex(self._io[0], in_index, in_ptr, in_size)
+        if 0 == ret:
+            ret = axclrt_lib.axclrtEngineGetOutputBufferByIndex(self._io[0], out_index, out_ptr, out_size)
+        if 0 == ret:
+            ret = axclrt_lib.axclrtEngineSetInputBufferByIndex(self._io[0], in_index, out_ptr[0], out_size[0])
+        if 0 == ret:
+            ret = axclrt_lib.axclrtEngineSetOutputBufferByIndex(self._io[0], out_index, in_ptr[0], in_size[0])
+        if 0 != ret:
+            raise RuntimeError(f"Failed to swap state buffers of input {in_index} and output {out_index}, 0x{ret:08x}.")
 
-                meta = NodeArg(name, dtype, shape)
-                one_group_io.append(meta)
-            inputs.append(one_group_io)
-        return inputs
+    def _reset_state(self, in_index: int, value: np.ndarray | None):
+        dev_prt = axclrt_cffi.new("void **")
+        dev_size = axclrt_cffi.new("uint64_t *")
+        if value is not None:
+            self._copy_to_input(in_index, value, dev_prt, dev_size)
+            return
+        ret = axclrt_lib.axclrtEngineGetInputBufferByIndex(self._io[0], in_index, dev_prt, dev_size)
+        if 0 == ret:
+            ret = axclrt_lib.axclrtMemset(dev_prt[0], 0, dev_size[0])
+        if 0 != ret:
+            raise RuntimeError(f"Failed to reset state of input {in_index}, 0x{ret:08x}.")
 
-    def _get_outputs(self):
-        outputs = []
-        for group in range(self._shape_count):
-            one_group_io = []
-            for index in range(axclrt_lib.axclrtEngineGetNumOutputs(self._info[0])):
-                cffi_name  = axclrt_lib.axclrtEngineGetOutputNameByIndex(self._info[0], index)
-                name = axclrt_cffi.string(cffi_name).decode("utf-8")
-
-                cffi_dtype = axclrt_cffi.new("axclrtEngineDataType *")
-                ret = axclrt_lib.axclrtEngineGetOutputDataType(self._info[0], index, cffi_dtype)
-                if ret != 0:
-                    raise RuntimeError("axclrtEngineGetOutputDataType failed.")
-                dtype = _transform_dtype(cffi_dtype[0])
+    def _read_state(self, in_index: int, node: NodeArg) -> np.ndarray:
+        dev_prt = axclrt_cffi.new("void **")
+        dev_size = axclrt_cffi.new("uint64_t *")
+        ret = axclrt_lib.axclrtEngineGetInputBufferByIndex(self._io[0], in_index, dev_prt, dev_size)
+        if 0 != ret:
+            raise RuntimeError(f"axclrtEngineGetInputBufferByIndex failed for input {in_index}.")
+        npy = np.empty(node.shape, dtype=node.dtype)
+        if self._io_mem_cached:
+            ret = axclrt_lib.axclrtMemInvalidate(dev_prt[0], npy.nbytes)
+            if 0 != ret:
+                raise RuntimeError(f"axclrtMemInvalidate failed for input {in_index}.")
+        ret = axclrt_lib.axclrtMemcpy(axclrt_cffi.cast("void *", npy.ctypes.data), dev_prt[0], npy.nbytes,
+                                      axclrt_lib.AXCL_MEMCPY_DEVICE_TO_HOST)
+        if 0 != ret:
+            raise RuntimeError(f"axclrtMemcpy failed for input {in_index}.")
+        return npy
 
-                cffi_dims = axclrt_cffi.new("axclrtEngineIODims *")
-                ret = axclrt_lib.axclrtEngineGetOutputDims(self._info[0], group, index, cffi_dims)
-                if ret != 0:
-                    raise RuntimeError("axclrtEngineGetOutputDims failed.")
-                shape = [cffi_dims.dims[i] for i in range(cffi_dims.dimCount)]
+    def _unlink_input_buffer(self, index: int):
+        dev_ptr, size = self._input_buffers[index]
+        ret = axclrt_lib.axclrtEngineSetInputBufferByIndex(self._io[0], index, dev_ptr, size)
+        if 0 != ret:
+            raise RuntimeError(f"axclrtEngineSetInputBufferByIndex failed 0x{ret:08x} for input {index}.")
 
-                meta = NodeArg(name, dtype, shape)
-                one_group_io.append(meta)
-            outputs.append(one_group_io)
-        return outputs
+    def _bind_input_buffer(self, index: int, node: NodeArg) -> np.ndarray:
+        # device memory is not addressable from the host, so a host staging buffer is bound instead
+        # and uploaded by run()
+        return np.zeros(node.shape, dtype=node.dtype)
 
     def _prepare_io(self):
         _io = axclrt_cffi.new("axclrtEngineIO *")
@@ -306,11 +481,9 @@ class AXCLRTSession(Session):
             for group in range(self._shape_count):
                 size = axclrt_lib.axclrtEngineGetInputSizeByIndex(self._info[0], group, i)
                 max_size = max(max_size, size)
-            dev_ptr = axclrt_cffi.new("void **")
-            ret = axclrt_lib.axclrtMalloc(dev_ptr, max_size, axclrt_lib.AXCL_MEM_MALLOC_NORMAL_ONLY)
-            if 0 != ret or dev_ptr[0] == axclrt_cffi.NULL:
-                raise RuntimeError(f"axclrtMalloc failed 0x{ret:08x} for input {i}.")
-            ret = axclrt_lib.axclrtEngineSetInputBufferByIndex(_io[0], i, dev_ptr[0], max_size)
+            dev_ptr = _malloc(max_size, self._io_mem_policy, self._io_mem_cached)
+            self._input_buffers.append((dev_ptr, max_size))
+            ret = axclrt_lib.axclrtEngineSetInputBufferByIndex(_io[0], i, dev_ptr, max_size)
             if 0 != ret:
                 raise RuntimeError(f"axclrtEngineSetInputBufferByIndex failed 0x{ret:08x} for input {i}.")
         for i in range(axclrt_lib.axclrtEngineGetNumOutputs(self._info[0])):
@@ -318,20 +491,77 @@ class AXCLRTSession(Session):
             for group in range(self._shape_count):
                 size = axclrt_lib.axclrtEngineGetOutputSizeByIndex(self._info[0], group, i)
                 max_size = max(max_size, size)
-            dev_ptr = axclrt_cffi.new("void **")
-            ret = axclrt_lib.axclrtMalloc(dev_ptr, max_size, axclrt_lib.AXCL_MEM_MALLOC_NORMAL_ONLY)
-            if 0 != ret or dev_ptr[0] == axclrt_cffi.NULL:
-                raise RuntimeError(f"axclrtMalloc failed 0x{ret:08x} for output {i}.")
-            ret = axclrt_lib.axclrtEngineSetOutputBufferByIndex(_io[0], i, dev_ptr[0], max_size)
+            dev_ptr = _malloc(max_size, self._io_mem_policy, self._io_mem_cached)
+            self._output_buffers.append((dev_ptr, max_size))
+            ret = axclrt_lib.axclrtEngineSetOutputBufferByIndex(_io[0], i, dev_ptr, max_size)
             if 0 != ret:
                 raise RuntimeError(f"axclrtEngineSetOutputBufferByIndex failed 0x{ret:08x} for output {i}.")
         return _io
 
-    def run(
+    def _download_output(self, index: int, npy: np.ndarray, offset: int, nbytes: int):
+        # state outputs swap buffers, ask the io which one is current
+        dev_prt, dev_size = axclrt_cffi.new("void **"), axclrt_cffi.new("uint64_t *")
+        ret = axclrt_lib.axclrtEngineGetOutputBufferByIndex(self._io[0], index, dev_prt, dev_size)
+        if 0 != ret:
+            raise RuntimeError(f"axclrtEngineGetOutputBufferByIndex failed for output {index}.")
+        dev_ptr = axclrt_cffi.cast("char *", dev_prt[0]) + offset
+        if self._io_mem_cached:
+            ret = axclrt_lib.axclrtMemInvalidate(dev_ptr, nbytes)
+            if 0 != ret:
+                raise RuntimeError(f"axclrtMemInvalidate failed for output {index}.")
+        ret = axclrt_lib.axclrtMemcpy(axclrt_cffi.cast("void *", npy.ctypes.data + offset), dev_ptr, nbytes,
+                                      axclrt_lib.AXCL_MEMCPY_DEVICE_TO_HOST)
+        if 0 != ret:
+            raise RuntimeError(f"axclrtMemcpy failed for output {index}.")
+
+    def _output_view(self, index: int, node: NodeArg, shape_group: int) -> TensorView:
+        # device memory is not addressable from the host, the view is of a host buffer kept per output
+        #   and filled with the one device to host copy
+        npy = self._staging(("view", index), int(np.prod(node.shape)), node.dtype)
+        self._download_output(index, npy, 0, npy.nbytes)
+        return TensorView(self, node.name, npy.ctypes.data, node.shape, node.dtype, None, self._io_generation, npy)
+
+    def _output_slice(self, index: int, node: NodeArg, shape_group: int, key) -> np.ndarray:
+        # only the bytes the slice spans cross the bus, they land where they sit in the full layout
+        npy = self._staging(("view", index), int(np.prod(node.shape)), node.dtype)
+        full = npy[:int(np.prod(node.shape))].reshape(node.shape)
+        part = full[key]
+        if not np.may_share_memory(part, full):
+            # fancy indexing copied from the buffer before it was filled, take the whole output
+            self._download_output(index, npy, 0, full.nbytes)
+            return full[key]
+        if part.size == 0:
+            return part
+        start = part.ctypes.data - npy.ctypes.data
+        low = start + sum((n - 1) * s for n, s in zip(part.shape, part.strides) if s < 0)
+        high = start + sum((n - 1) * s for n, s in zip(part.shape, part.strides) if s > 0) + part.itemsize
+        self._download_output(index, npy, low, high - low)
+        return part
+
+    def _staging(self, key: tuple[str, int], size: int, dtype: np.dtype) -> np.ndarray:
+        # host side buffers of converted io, grown to the largest shape group seen
+        buffer = self._staging_buffers.get(key)
+        if buffer is None or buffer.size < size:
+            buffer = self._staging_buffers[key] = np.empty(size, dtype=dtype)
+        return buffer[:size]
+
+    def _copy_to_input(self, index: int, npy: np.ndarray, dev_prt, dev_size):
+        npy_ptr = axclrt_cffi.cast("void *", npy.ctypes.data)
+        ret = axclrt_lib.axclrtEngineGetInputBufferByIndex(self._io[0], index, dev_prt, dev_size)
+        if 0 != ret:
+            raise RuntimeError(f"axclrtEngineGetInputBufferByIndex failed for input {index}.")
+        ret = axclrt_lib.axclrtMemcpy(dev_prt[0], npy_ptr, npy.nbytes, axclrt_lib.AXCL_MEMCPY_HOST_TO_DEVICE)
+        if 0 != ret:
+            raise RuntimeError(f"axclrtMemcpy failed for input {index}.")
+        if self._io_mem_cached:
+            ret = axclrt_lib.axclrtMemFlush(dev_prt[0], npy.nbytes)
+            if 0 != ret:
+                raise RuntimeError(f"axclrtMemFlush failed for input {index}.")
+
+    def _run(
             self,
             output_names: list[str],
             input_feed: dict[str, np.ndarray],
-            run_options=None,
             shape_group: int = 0
     ):
         self._validate_input(input_feed)
@@ -342,7 +572,7 @@ class AXCLRTSession(Session):
             raise RuntimeError("axclrtSetCurrentContext failed")
 
         if None is output_names:
-            output_names = [o.name for o in self.get_outputs(shape_group)]
+            output_names = self._default_output_names(shape_group)
 
         if (shape_group > self._shape_count - 1) or (shape_group < 0):
             raise ValueError(f"Invalid shape group: {shape_group}")
@@ -353,19 +583,35 @@ class AXCLRTSession(Session):
         for key, npy in input_feed.items():
             for i, one in enumerate(self.get_inputs(shape_group)):
                 if one.name == key:
+                    planes = self._yuv_planes(one, npy)
+                    if planes is not None:
+                        # packed into the host staging buffer of the input, uploaded in one copy
+                        npy = self._staging(("in", i), sum(p.size for p in planes), np.uint8)
+                        _write_planes(planes, npy)
+                        self._copy_to_input(i, npy, dev_prt, dev_size)
+                        break
+                    converts = self._converts_bf16(one.dtype, npy.dtype)
                     assert (
-                            list(one.shape) == list(npy.shape) and one.dtype == npy.dtype
+                            list(one.shape) == list(npy.shape) and (one.dtype == npy.dtype or converts)
                     ), f"model inputs({key}) expect shape {one.shape} and dtype {one.dtype}, howerver gets input with shape {npy.shape} and dtype {npy.dtype}"
 
-                    if not (npy.flags.c_contiguous or npy.flags.f_contiguous):
+                    if converts:
+                        # rounded into a host staging buffer kept per input, then uploaded as is
+                        npy = float32_to_bfloat16(npy, out=self._staging(("in", i), npy.size, one.dtype))
+                    elif not (npy.flags.c_contiguous or npy.flags.f_contiguous):
                         npy = np.ascontiguousarray(npy)
-                    npy_ptr = axclrt_cffi.cast("void *", npy.ctypes.data)
-                    ret = axclrt_lib.axclrtEngineGetInputBufferByIndex(self._io[0], i, dev_prt, dev_size)
-                    if 0 != ret:
-                        raise RuntimeError(f"axclrtEngineGetInputBufferByIndex failed for input {i}.")
-                    ret = axclrt_lib.axclrtMemcpy(dev_prt[0], npy_ptr, npy.nbytes, axclrt_lib.AXCL_MEMCPY_HOST_TO_DEVICE)
-                    if 0 != ret:
-                        raise RuntimeError(f"axclrtMemcpy failed for input {i}.")
+                    self._copy_to_input(i, npy, dev_prt, dev_size)
+                    break
+        for key, (i, npy) in self._bound_inputs.items():
+            if key not in input_feed:
+                self._copy_to_input(i, npy, dev_prt, dev_size)
+        for i, source, j, copy in self._linked_inputs.values():
+            if copy:
+                npy_size = self.get_inputs(shape_group)[i].dtype.itemsize * int(np.prod(self.get_inputs(shape_group)[i].shape))
+                ret = axclrt_lib.axclrtMemcpy(self._input_buffers[i][0], source._output_buffers[j][0], npy_size,
+                                              axclrt_lib.AXCL_MEMCPY_DEVICE_TO_DEVICE)
+                if 0 != ret:
+                    raise RuntimeError(f"axclrtMemcpy device to device failed for input {i}.")
 
         # execute model
         ret = axclrt_lib.axclrtEngineExecute(self._model_id[0], self._context_id[0], shape_group, self._io[0])
@@ -374,19 +620,33 @@ class AXCLRTSession(Session):
         outputs = []
         if 0 == ret:
             for i in range(len(self.get_outputs(shape_group))):
+                name = self.get_outputs(shape_group)[i].name
+                # outputs nobody asked for stay on the device, e.g. when they feed a linked session
+                if name not in output_names:
+                    continue
                 ret = axclrt_lib.axclrtEngineGetOutputBufferByIndex(self._io[0], i, dev_prt, dev_size)
                 if 0 != ret:
                     raise RuntimeError(f"axclrtEngineGetOutputBufferByIndex failed for output {i}.")
                 buffer_addr = dev_prt[0]
                 npy_size = self.get_outputs(shape_group)[i].dtype.itemsize * np.prod(self.get_outputs(shape_group)[i].shape)
-                npy = np.zeros(self.get_outputs(shape_group)[i].shape, dtype=self.get_outputs(shape_group)[i].dtype)
+                if self._io_mem_cached:
+                    ret = axclrt_lib.axclrtMemInvalidate(buffer_addr, npy_size)
+                    if 0 != ret:
+                        raise RuntimeError(f"axclrtMemInvalidate failed for output {i}.")
+                node = self.get_outputs(shape_group)[i]
+                # converted outputs land in a reused staging buffer and are converted into the returned array
+                converts = i in self._dequant or self._converts_bf16(node.dtype, np.float32)
+                if converts:
+                    npy = self._staging(("out", i), int(np.prod(node.shape)), node.dtype)
+                else:
+                    npy = np.zeros(node.shape, dtype=node.dtype)
                 npy_ptr = axclrt_cffi.cast("void *", npy.ctypes.data)
                 ret = axclrt_lib.axclrtMemcpy(npy_ptr, buffer_addr, npy_size, axclrt_lib.AXCL_MEMCPY_DEVICE_TO_HOST)
                 if 0 != ret:
                     raise RuntimeError(f"axclrtMemcpy failed for output {i}.")
-                name = self.get_outputs(shape_group)[i].name
-                if name in output_names:
-                    outputs.append(npy)
+                if converts:
+                    npy = self._read_output(i, npy, node.shape)
+                outputs.append(npy)
             return outputs
         else:
             raise RuntimeError(f"axclrtEngineExecute failed 0x{ret:08x}")
@@ -139,6 +139,8 @@ axclrt_cffi.cdef(
 
     axclError axclrtEngineLoadFromFile(const char *modelPath, uint64_t *modelId);
     axclError axclrtEngineLoadFromMem(const void *model, uint64_t modelSize, uint64_t *modelId);
+    axclError axclrtEngineGetUsage(const char *modelPath, int64_t *sysSize, int64_t *cmmSize);
+    axclError axclrtEngineGetUsageFromMem(const void *model, uint64_t modelSize, int64_t *sysSize, int64_t *cmmSize);
     const char* axclrtEngineGetModelCompilerVersion(uint64_t modelId);
     axclError axclrtEngineUnload(uint64_t modelId);
 
@@ -185,6 +187,8 @@ axclrt_cffi.cdef(
     axclError axclrtMemcpy(void *dstPtr, const void *srcPtr, size_t count, axclrtMemcpyKind kind);
     axclError axclrtFree(void *devPtr);
     axclError axclrtMemFlush(void *devPtr, size_t size);
+    axclError axclrtMemInvalidate(void *devPtr, size_t size);
+    axclError axclrtMemset(void *devPtr, uint8_t value, size_t count);
 """
 )
 
@@ -19,3 +19,9 @@ class ModelType(Enum):
     SINGLE = 0
     DUAL = 1
     TRIPLE = 2
+
+
+class MemPolicy(Enum):
+    HUGE_FIRST = 0
+    HUGE_ONLY = 1
+    NORMAL_ONLY = 2
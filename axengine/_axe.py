@@ -6,6 +6,7 @@
 #
 
 import atexit
+import functools
 import os
 from typing import Any, Sequence
 
@@ -14,8 +15,10 @@ import numpy as np
 
 from ._axe_capi import sys_lib, engine_cffi, engine_lib
 from ._axe_types import VNPUType, ModelType, ChipType
-from ._base_session import Session, SessionOptions
+from ._base_session import Session, SessionOptions, SharedModel, _write_planes
+from ._bf16 import float32_to_bfloat16
 from ._node import NodeArg
+from ._tensor import TensorView
 
 __all__: ["AXEngineSession"]
 
@@ -23,25 +26,56 @@ _is_sys_initialized = False
 _is_engine_initialized = False
 
 
+_DTYPES = {
+    engine_lib.AX_ENGINE_DT_UINT8: np.dtype(np.uint8),
+    engine_lib.AX_ENGINE_DT_SINT8: np.dtype(np.int8),
+    engine_lib.AX_ENGINE_DT_UINT16: np.dtype(np.uint16),
+    engine_lib.AX_ENGINE_DT_SINT16: np.dtype(np.int16),
+    engine_lib.AX_ENGINE_DT_UINT32: np.dtype(np.uint32),
+    engine_lib.AX_ENGINE_DT_SINT32: np.dtype(np.int32),
+    engine_lib.AX_ENGINE_DT_FLOAT32: np.dtype(np.float32),
+    engine_lib.AX_ENGINE_DT_BFLOAT16: np.dtype(mldt.bfloat16),
+}
+
+_LAYOUTS = {
+    engine_lib.AX_ENGINE_TENSOR_LAYOUT_NHWC: "NHWC",
+    engine_lib.AX_ENGINE_TENSOR_LAYOUT_NCHW: "NCHW",
+}
+
+_COLOR_SPACES = {
+    engine_lib.AX_ENGINE_CS_NV12: "NV12",
+    engine_lib.AX_ENGINE_CS_NV21: "NV21",
+    engine_lib.AX_ENGINE_CS_RGB: "RGB",
+    engine_lib.AX_ENGINE_CS_BGR: "BGR",
+    engine_lib.AX_ENGINE_CS_RGBA: "RGBA",
+    engine_lib.AX_ENGINE_CS_GRAY: "GRAY",
+    engine_lib.AX_ENGINE_CS_YUV444: "YUV444",
+    engine_lib.AX_ENGINE_CS_RAW8: "RAW8",
+    engine_lib.AX_ENGINE_CS_RAW10: "RAW10",
+    engine_lib.AX_ENGINE_CS_RAW12: "RAW12",
+    engine_lib.AX_ENGINE_CS_RAW14: "RAW14",
+    engine_lib.AX_ENGINE_CS_RAW16: "RAW16",
+}
+
+_MEMORY_TYPES = {
+    engine_lib.AX_ENGINE_MT_PHYSICAL: "physical",
+    engine_lib.AX_ENGINE_MT_VIRTUAL: "virtual",
+    engine_lib.AX_ENGINE_MT_OCM: "ocm",
+}
+
+
 def _transform_dtype(dtype):
-    if dtype == engine_cffi.cast("AX_ENGINE_DATA_TYPE_T", engine_lib.AX_ENGINE_DT_UINT8):
-        return np.dtype(np.uint8)
-    elif dtype == engine_cffi.cast("AX_ENGINE_DATA_TYPE_T", engine_lib.AX_ENGINE_DT_SINT8):
-        return np.dtype(np.int8)
-    elif dtype == engine_cffi.cast("AX_ENGINE_DATA_TYPE_T", engine_lib.AX_ENGINE_DT_UINT16):
-        return np.dtype(np.uint16)
-    elif dtype == engine_cffi.cast("AX_ENGINE_DATA_TYPE_T", engine_lib.AX_ENGINE_DT_SINT16):
-        return np.dtype(np.int16)
-    elif dtype == engine_cffi.cast("AX_ENGINE_DATA_TYPE_T", engine_lib.AX_ENGINE_DT_UINT32):
-        return np.dtype(np.uint32)
-    elif dtype == engine_cffi.cast("AX_ENGINE_DATA_TYPE_T", engine_lib.AX_ENGINE_DT_SINT32):
-        return np.dtype(np.int32)
-    elif dtype == engine_cffi.cast("AX_ENGINE_DATA_TYPE_T", engine_lib.AX_ENGINE_DT_FLOAT32):
-        return np.dtype(np.float32)
-    elif dtype == engine_cffi.cast("AX_ENGINE_DATA_TYPE_T", engine_lib.AX_ENGINE_DT_BFLOAT16):
-        return np.dtype(mldt.bfloat16)
-    else:
-        raise ValueError(f"Unsupported data type '{dtype}'.")
+    # cffi hands enum fields out as plain ints
+    try:
+        return _DTYPES[int(dtype)]
+    except KeyError:
+        raise ValueError(f"Unsupported data type '{dtype}'.") from None
+
+
+def _destroy_handle(handle):
+    if handle[0] != engine_cffi.NULL:
+        engine_lib.AX_ENGINE_DestroyHandle(handle[0])
+    handle[0] = engine_cffi.NULL
 
 
 def _check_cffi_func_exists(lib, func_name):
@@ -124,12 +158,14 @@ class AXEngineSession(Session):
         super().__init__()
 
         self._chip_type = _get_chip_type()
+        self._device_key = ("AxEngine", 0)
         self._vnpu_type = _get_vnpu_type()
 
         # handle, context, info, io
         self._handle = engine_cffi.new("uint64_t **")
         self._context = engine_cffi.new("uint64_t **")
-        self._io = engine_cffi.new("AX_ENGINE_IO_T *")
+        # the handle is destroyed with the last clone
+        self._model = SharedModel(functools.partial(_destroy_handle, self._handle))
 
         # model buffer, almost copied from onnx runtime
         if isinstance(path_or_bytes, (str, os.PathLike)):
@@ -190,6 +226,9 @@ class AXEngineSession(Session):
         # if self._chip_type is ChipType.M57H:
         # there only one type of model will be compiled, so no need to check
 
+        # the model weights go to cmm, the model size is the estimate until the real usage is known
+        self._reserve_memory(self._model_buffer_size, self._model)
+
         # load model
         ret = self._load()
         if 0 != ret:
@@ -205,60 +244,19 @@ class AXEngineSession(Session):
 
         # get model shape
         self._info = self._get_info()
-        self._inputs = self._get_inputs()
-        self._outputs = self._get_outputs()
+        self._init_io_meta(path_or_bytes, sess_options)
 
         # fill model io
         self._align = 128
         self._cmm_token = engine_cffi.new("AX_S8[]", b"PyEngine")
-        self._io[0].nInputSize = len(self.get_inputs())
-        self._io[0].nOutputSize = len(self.get_outputs())
-        _inputs= engine_cffi.new(
-            "AX_ENGINE_IO_BUFFER_T[{}]".format(self._io[0].nInputSize)
-        )
-        _outputs = engine_cffi.new(
-            "AX_ENGINE_IO_BUFFER_T[{}]".format(self._io[0].nOutputSize)
-        )
-        self._io_buffers = (_inputs, _outputs)
-        self._io[0].pInputs = _inputs
-        self._io[0].pOutputs = _outputs
+        self._prepare_io()
 
-        self._io_inputs_pool = []
-        for i in range(len(self.get_inputs())):
-            max_buf = 0
-            for j in range(self._shape_count):
-                max_buf = max(max_buf, self._info[j][0].pInputs[i].nSize)
-            self._io[0].pInputs[i].nSize = max_buf
-            phy = engine_cffi.new("AX_U64*")
-            vir = engine_cffi.new("AX_VOID**")
-            self._io_inputs_pool.append((phy, vir))
-            ret = sys_lib.AX_SYS_MemAllocCached(
-                phy, vir, self._io[0].pInputs[i].nSize, self._align, self._cmm_token
-            )
-            if 0 != ret:
-                raise RuntimeError("Failed to allocate memory for input.")
-            self._io[0].pInputs[i].phyAddr = phy[0]
-            self._io[0].pInputs[i].pVirAddr = vir[0]
-
-        self._io_outputs_pool = []
-        for i in range(len(self.get_outputs())):
-            max_buf = 0
-            for j in range(self._shape_count):
-                max_buf = max(max_buf, self._info[j][0].pOutputs[i].nSize)
-            self._io[0].pOutputs[i].nSize = max_buf
-            phy = engine_cffi.new("AX_U64*")
-            vir = engine_cffi.new("AX_VOID**")
-            self._io_outputs_pool.append((phy, vir))
-            ret = sys_lib.AX_SYS_MemAllocCached(
-                phy, vir, self._io[0].pOutputs[i].nSize, self._align, self._cmm_token
-            )
-            if 0 != ret:
-                raise RuntimeError("Failed to allocate memory for output.")
-            self._io[0].pOutputs[i].phyAddr = phy[0]
-            self._io[0].pOutputs[i].pVirAddr = vir[0]
+        self._reserve_memory(self.get_memory_usage()["model_cmm"], self._model)
+        self._reserve_memory(self.get_memory_usage()["io"])
+        self._warmup(sess_options)
 
     def __del__(self):
-        self._unload()
+        self._release()
 
     def _get_model_type(self) -> ModelType:
         model_type = engine_cffi.new("AX_ENGINE_MODEL_TYPE_T *")
@@ -317,43 +315,222 @@ class AXEngineSession(Session):
             raise RuntimeError("Failed to get model shape group.")
         return count[0]
 
-    def _unload(self):
-        if self._handle[0] is not None:
-            engine_lib.AX_ENGINE_DestroyHandle(self._handle[0])
-        self._handle[0] = engine_cffi.NULL
-
-    def _get_io(self, io_type: str):
-        io_info = []
-        for group in range(self._shape_count):
-            one_group_io = []
-            for index in range(getattr(self._info[group][0], f'n{io_type}Size')):
-                current_io = getattr(self._info[group][0], f'p{io_type}s')[index]
-                name = engine_cffi.string(current_io.pName).decode("utf-8")
-                shape = [current_io.pShape[i] for i in range(current_io.nShapeSize)]
-                dtype = _transform_dtype(current_io.eDataType)
-                meta = NodeArg(name, dtype, shape)
-                one_group_io.append(meta)
-            io_info.append(one_group_io)
-        return io_info
-
-    def _get_inputs(self):
-        return self._get_io('Input')
-
-    def _get_outputs(self):
-        return self._get_io('Output')
-
-    def run(
+    def _release(self):
+        # also reached from __del__ of a session that failed half way through __init__
+        for phy, vir in getattr(self, "_io_inputs_pool", []) + getattr(self, "_io_outputs_pool", []):
+            sys_lib.AX_SYS_MemFree(phy[0], vir[0])
+        self._io_inputs_pool, self._io_outputs_pool = [], []
+        if getattr(self, "_model", None) is not None:
+            self._model.release()
+            self._model = None
+        self._model_buffer = None
+
+    def _prepare_io(self):
+        self._io = engine_cffi.new("AX_ENGINE_IO_T *")
+        self._io[0].nInputSize = len(self.get_inputs())
+        self._io[0].nOutputSize = len(self.get_outputs())
+        _inputs= engine_cffi.new(
+            "AX_ENGINE_IO_BUFFER_T[{}]".format(self._io[0].nInputSize)
+        )
+        _outputs = engine_cffi.new(
+            "AX_ENGINE_IO_BUFFER_T[{}]".format(self._io[0].nOutputSize)
+        )
+        self._io_buffers = (_inputs, _outputs)
+        self._io[0].pInputs = _inputs
+        self._io[0].pOutputs = _outputs
+
+        self._io_inputs_pool = []
+        for i in range(len(self.get_inputs())):
+            max_buf = 0
+            for j in range(self._shape_count):
+                max_buf = max(max_buf, self._info[j][0].pInputs[i].nSize)
+            self._io[0].pInputs[i].nSize = max_buf
+            phy = engine_cffi.new("AX_U64*")
+            vir = engine_cffi.new("AX_VOID**")
+            ret = sys_lib.AX_SYS_MemAllocCached(
+                phy, vir, self._io[0].pInputs[i].nSize, self._align, self._cmm_token
+            )
+            if 0 != ret:
+                raise RuntimeError("Failed to allocate memory for input.")
+            self._io_inputs_pool.append((phy, vir))
+            self._io[0].pInputs[i].phyAddr = phy[0]
+            self._io[0].pInputs[i].pVirAddr = vir[0]
+
+        self._io_outputs_pool = []
+        for i in range(len(self.get_outputs())):
+            max_buf = 0
+            for j in range(self._shape_count):
+                max_buf = max(max_buf, self._info[j][0].pOutputs[i].nSize)
+            self._io[0].pOutputs[i].nSize = max_buf
+            phy = engine_cffi.new("AX_U64*")
+            vir = engine_cffi.new("AX_VOID**")
+            ret = sys_lib.AX_SYS_MemAllocCached(
+                phy, vir, self._io[0].pOutputs[i].nSize, self._align, self._cmm_token
+            )
+            if 0 != ret:
+                raise RuntimeError("Failed to allocate memory for output.")
+            self._io_outputs_pool.append((phy, vir))
+            self._io[0].pOutputs[i].phyAddr = phy[0]
+            self._io[0].pOutputs[i].pVirAddr = vir[0]
+
+    def _init_clone(self, clone: "AXEngineSession"):
+        for name in ("_chip_type", "_vnpu_type", "_handle", "_model_buffer", "_model_buffer_size", "_model_type",
+                     "_info", "_align", "_cmm_token"):
+            setattr(clone, name, getattr(self, name))
+        if hasattr(self, "_model_name"):
+            clone._model_name = self._model_name
+        clone._io_inputs_pool, clone._io_outputs_pool = [], []
+        clone._context = engine_cffi.new("uint64_t **")
+        ret = engine_lib.AX_ENGINE_CreateContextV2(clone._handle[0], clone._context)
+        if 0 != ret:
+            raise RuntimeError("Failed to create context for the clone.")
+        clone._prepare_io()
+        clone._reserve_memory(clone.get_memory_usage()["io"])
+
+    def get_memory_usage(self) -> dict[str, int]:
+        model_cmm = 0
+        # clones share the model, each reports it
+        if self._model is not None and _check_cffi_func_exists(engine_lib, "AX_ENGINE_GetCMMUsage"):
+            cmm_info = engine_cffi.new("AX_ENGINE_CMM_INFO_T *")
+            if 0 == engine_lib.AX_ENGINE_GetCMMUsage(self._handle[0], cmm_info):
+                model_cmm = cmm_info.nCMMSize
+        # the pools hold the buffers this session allocated, states and links only move pointers around
+        io = 0
+        if self._io_inputs_pool or self._io_outputs_pool:
+            io = sum(self._io[0].pInputs[i].nSize for i in range(self._io[0].nInputSize))
+            io += sum(self._io[0].pOutputs[i].nSize for i in range(self._io[0].nOutputSize))
+        return {
+            "model_cmm": model_cmm,
+            "io": io,
+            "host_model_buffer": self._model_buffer_size if self._model is not None else 0,
+            "device": 0,
+            "total": model_cmm + io,
+        }
+
+    def _get_io(self, io_type: str, group: int):
+        one_group_io = []
+        info = self._info[group][0]
+        ios = getattr(info, f'p{io_type}s')
+        for index in range(getattr(info, f'n{io_type}Size')):
+            current_io = ios[index]
+            name = engine_cffi.string(current_io.pName).decode("utf-8")
+            shape = [current_io.pShape[i] for i in range(current_io.nShapeSize)]
+            dtype = _transform_dtype(current_io.eDataType)
+            strides = None
+            if current_io.pStride != engine_cffi.NULL:
+                strides = [current_io.pStride[i] for i in range(current_io.nShapeSize)]
+            color_space = None
+            if current_io.pExtraMeta != engine_cffi.NULL:
+                color_space = _COLOR_SPACES.get(int(current_io.pExtraMeta.eColorSpace))
+            one_group_io.append(NodeArg(
+                name, dtype, shape,
+                layout=_LAYOUTS.get(int(current_io.eLayout)),
+                quantization=int(current_io.nQuantizationValue),
+                size=int(current_io.nSize),
+                strides=strides,
+                memory_type=_MEMORY_TYPES.get(int(current_io.eMemoryType)),
+                color_space=color_space,
+            ))
+        return one_group_io
+
+    def _get_inputs(self, shape_group: int):
+        return self._get_io('Input', shape_group)
+
+    def _bind_input_buffer(self, index: int, node: NodeArg) -> np.ndarray:
+        # the cached cmm is mapped into this process, hand out a view of it directly
+        npy_size = node.dtype.itemsize * int(np.prod(node.shape))
+        return np.frombuffer(
+            engine_cffi.buffer(self._io[0].pInputs[index].pVirAddr, npy_size), dtype=node.dtype
+        ).reshape(node.shape)
+
+    def _get_outputs(self, shape_group: int):
+        return self._get_io('Output', shape_group)
+
+    def _output_view(self, index: int, node: NodeArg, shape_group: int) -> TensorView:
+        out = self._io[0].pOutputs[index]
+        sys_lib.AX_SYS_MinvalidateCache(out.phyAddr, out.pVirAddr, out.nSize)
+        # the cmm itself, padded layouts keep their strides
+        strides, _ = self._output_strides(shape_group, index)
+        address = int(engine_cffi.cast("uintptr_t", out.pVirAddr))
+        return TensorView(self, node.name, address, node.shape, node.dtype, strides, self._io_generation)
+
+    def _link_input_buffer(self, index: int, source: "AXEngineSession", out_index: int, copy: bool) -> bool:
+        src = source._io[0].pOutputs[out_index]
+        # both sides are cmm of this process, the input simply points at the output when it is large enough
+        if copy or src.nSize < self._io[0].pInputs[index].nSize:
+            return True
+        self._io[0].pInputs[index].phyAddr = src.phyAddr
+        self._io[0].pInputs[index].pVirAddr = src.pVirAddr
+        return False
+
+    def _swap_state(self, in_index: int, out_index: int):
+        inp, out = self._io[0].pInputs[in_index], self._io[0].pOutputs[out_index]
+        inp.phyAddr, out.phyAddr = out.phyAddr, inp.phyAddr
+        inp.pVirAddr, out.pVirAddr = out.pVirAddr, inp.pVirAddr
+        inp.nSize, out.nSize = out.nSize, inp.nSize
+
+    def _reset_state(self, in_index: int, value: np.ndarray | None):
+        inp = self._io[0].pInputs[in_index]
+        buffer = np.frombuffer(engine_cffi.buffer(inp.pVirAddr, inp.nSize), dtype=np.uint8)
+        if value is None:
+            buffer.fill(0)
+        else:
+            buffer[:value.nbytes] = value.reshape(-1).view(np.uint8)
+        sys_lib.AX_SYS_MflushCache(inp.phyAddr, inp.pVirAddr, inp.nSize)
+
+    def _read_state(self, in_index: int, node: NodeArg) -> np.ndarray:
+        inp = self._io[0].pInputs[in_index]
+        sys_lib.AX_SYS_MinvalidateCache(inp.phyAddr, inp.pVirAddr, inp.nSize)
+        npy_size = node.dtype.itemsize * int(np.prod(node.shape))
+        return np.frombuffer(engine_cffi.buffer(inp.pVirAddr, npy_size), dtype=node.dtype).reshape(node.shape).copy()
+
+    def _unlink_input_buffer(self, index: int):
+        phy, vir = self._io_inputs_pool[index]
+        self._io[0].pInputs[index].phyAddr = phy[0]
+        self._io[0].pInputs[index].pVirAddr = vir[0]
+
+    def _check_input_memory(self, node: NodeArg, phy_addr: int, vir_addr: int, size: int):
+        if not phy_addr or not vir_addr:
+            raise ValueError(f"Input '{node.name}' needs both the physical and the virtual address of the memory.")
+        if phy_addr % self._align:
+            raise ValueError(f"Physical address 0x{phy_addr:x} of input '{node.name}' is not aligned to "
+                             f"{self._align} bytes.")
+        if size > 0xFFFFFFFF:
+            raise ValueError(f"External memory of input '{node.name}' is larger than 4 GiB.")
+
+    def _set_input_memory(self, index: int, phy_addr: int, vir_addr: int, size: int, flush: bool):
+        inp = self._io[0].pInputs[index]
+        inp.phyAddr = phy_addr
+        inp.pVirAddr = engine_cffi.cast("void *", vir_addr)
+        inp.nSize = size
+        # frames written by hardware are not in the cpu cache, only cpu written ones need the flush
+        if flush:
+            sys_lib.AX_SYS_MflushCache(inp.phyAddr, inp.pVirAddr, inp.nSize)
+
+    def _reset_input_memory(self, index: int):
+        self._unlink_input_buffer(index)
+        self._io[0].pInputs[index].nSize = max(
+            self._info[j][0].pInputs[index].nSize for j in range(self._shape_count))
+
+    def _prefault_io(self):
+        # freshly allocated cmm is only mapped on first touch, zero it once and write it back
+        for buffers, count in ((self._io[0].pInputs, self._io[0].nInputSize),
+                               (self._io[0].pOutputs, self._io[0].nOutputSize)):
+            for i in range(count):
+                np.frombuffer(engine_cffi.buffer(buffers[i].pVirAddr, buffers[i].nSize), dtype=np.uint8).fill(0)
+                sys_lib.AX_SYS_MflushCache(buffers[i].phyAddr, buffers[i].pVirAddr, buffers[i].nSize)
+
+    def _run(
             self,
             output_names: list[str],
             input_feed: dict[str, np.ndarray],
-            run_options=None,
             shape_group: int = 0
     ):
         self._validate_input(input_feed)
         self._validate_output(output_names)
 
         if None is output_names:
-            output_names = [o.name for o in self.get_outputs(shape_group)]
+            output_names = self._default_output_names(shape_group)
 
         if (shape_group > self._shape_count - 1) or (shape_group < 0):
             raise ValueError(f"Invalid shape group: {shape_group}")
@@ -362,23 +539,59 @@ class AXEngineSession(Session):
         for key, npy in input_feed.items():
             for i, one in enumerate(self.get_inputs(shape_group)):
                 if one.name == key:
+                    planes = self._yuv_planes(one, npy)
+                    if planes is not None:
+                        # Y and UV go into the cmm as they are, the npu takes the frame without color conversion
+                        _write_planes(planes, np.frombuffer(engine_cffi.buffer(
+                            self._io[0].pInputs[i].pVirAddr, sum(p.size for p in planes)), dtype=np.uint8))
+                        sys_lib.AX_SYS_MflushCache(
+                            self._io[0].pInputs[i].phyAddr,
+                            self._io[0].pInputs[i].pVirAddr,
+                            self._io[0].pInputs[i].nSize,
+                        )
+                        break
+                    converts = self._converts_bf16(one.dtype, npy.dtype)
                     assert (
-                            list(one.shape) == list(npy.shape) and one.dtype == npy.dtype
+                            list(one.shape) == list(npy.shape) and (one.dtype == npy.dtype or converts)
                     ), f"model inputs({key}) expect shape {one.shape} and dtype {one.dtype}, however gets input with shape {npy.shape} and dtype {npy.dtype}"
 
-                    if not (npy.flags.c_contiguous or npy.flags.f_contiguous):
-                        npy = np.ascontiguousarray(npy)
-                    npy_ptr = engine_cffi.cast("void *", npy.ctypes.data)
-
-                    engine_cffi.memmove(
-                        self._io[0].pInputs[i].pVirAddr, npy_ptr, npy.nbytes
-                    )
+                    if converts:
+                        # rounded straight into the cmm, no bfloat16 copy on the host
+                        float32_to_bfloat16(npy, out=np.frombuffer(
+                            engine_cffi.buffer(self._io[0].pInputs[i].pVirAddr, npy.size * 2), dtype=one.dtype
+                        ))
+                    else:
+                        if not (npy.flags.c_contiguous or npy.flags.f_contiguous):
+                            npy = np.ascontiguousarray(npy)
+                        npy_ptr = engine_cffi.cast("void *", npy.ctypes.data)
+
+                        engine_cffi.memmove(
+                            self._io[0].pInputs[i].pVirAddr, npy_ptr, npy.nbytes
+                        )
                     sys_lib.AX_SYS_MflushCache(
                         self._io[0].pInputs[i].phyAddr,
                         self._io[0].pInputs[i].pVirAddr,
                         self._io[0].pInputs[i].nSize,
                     )
                     break
+        for key, (i, _) in self._bound_inputs.items():
+            if key not in input_feed and key not in self._external_inputs:
+                sys_lib.AX_SYS_MflushCache(
+                    self._io[0].pInputs[i].phyAddr,
+                    self._io[0].pInputs[i].pVirAddr,
+                    self._io[0].pInputs[i].nSize,
+                )
+        for i, source, j, copy in self._linked_inputs.values():
+            if copy:
+                src = source._io[0].pOutputs[j]
+                npy_size = self.get_inputs(shape_group)[i].dtype.itemsize * int(np.prod(self.get_inputs(shape_group)[i].shape))
+                sys_lib.AX_SYS_MinvalidateCache(src.phyAddr, src.pVirAddr, npy_size)
+                engine_cffi.memmove(self._io[0].pInputs[i].pVirAddr, src.pVirAddr, npy_size)
+                sys_lib.AX_SYS_MflushCache(
+                    self._io[0].pInputs[i].phyAddr,
+                    self._io[0].pInputs[i].pVirAddr,
+                    self._io[0].pInputs[i].nSize,
+                )
 
         # execute model
         if self._shape_count > 1:
@@ -394,21 +607,25 @@ class AXEngineSession(Session):
         outputs = []
         if 0 == ret:
             for i in range(len(self.get_outputs(shape_group))):
+                name = self.get_outputs(shape_group)[i].name
+                # outputs nobody asked for stay in cmm, e.g. when they feed a linked session
+                if name not in output_names:
+                    continue
                 sys_lib.AX_SYS_MinvalidateCache(
                     self._io[0].pOutputs[i].phyAddr,
                     self._io[0].pOutputs[i].pVirAddr,
                     self._io[0].pOutputs[i].nSize,
                 )
-                npy_size = self.get_outputs(shape_group)[i].dtype.itemsize * np.prod(self.get_outputs(shape_group)[i].shape)
+                # padded layouts span more than the packed shape
+                strides, npy_size = self._output_strides(shape_group, i)
                 npy = np.frombuffer(
                     engine_cffi.buffer(
                         self._io[0].pOutputs[i].pVirAddr, npy_size
                     ),
                     dtype=self.get_outputs(shape_group)[i].dtype,
-                ).reshape(self.get_outputs(shape_group)[i].shape).copy()
-                name = self.get_outputs(shape_group)[i].name
-                if name in output_names:
-                    outputs.append(npy)
+                )
+                npy = self._read_output(i, npy, self.get_outputs(shape_group)[i].shape, strides)
+                outputs.append(npy)
             return outputs
         else:
             raise RuntimeError("Failed to run model.")
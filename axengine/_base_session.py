@@ -5,32 +5,379 @@
 # written consent of Axera Semiconductor Co., Ltd.
 #
 
+import os
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
 
+import ml_dtypes as mldt
 import numpy as np
 
+from ._bf16 import bfloat16_to_float32
+from ._metadata import ModelMetadata, model_hash
 from ._node import NodeArg
+from ._quant import _broadcast_param, dequantize
+from ._run_queue import RunQueue
+from ._tensor import TensorView
+from ._memory import get_memory_budget
+from ._scheduler import get_scheduler
+
+_BF16 = np.dtype(mldt.bfloat16)
+# Y plane followed by interleaved chroma at half resolution
+_SEMI_PLANAR = ("NV12", "NV21")
+
+
+def _write_planes(planes: list[np.ndarray], dst: np.ndarray):
+    # strided planes, e.g. decoder frames with a pitch wider than the image, are packed by the copy itself
+    offset = 0
+    for plane in planes:
+        np.copyto(dst[offset:offset + plane.size].reshape(plane.shape), plane)
+        offset += plane.size
 
 
 class SessionOptions:
-    pass
+    def __init__(self) -> None:
+        # synthetic runs done while the session is constructed, so the first real run is not the slow one,
+        #   either a count for every shape group or a {shape_group: count} dict
+        self.warmup_runs: int | dict[int, int] = 0
+        # directory of the model metadata cache keyed by model hash, see axengine.read_model_metadata()
+        self.metadata_cache_dir: str | os.PathLike | None = None
+        # bfloat16 inputs also take float32 feeds, rounded straight into the input buffer, and bfloat16
+        #   outputs are returned widened to float32, see axengine.float32_to_bfloat16()
+        self.bf16_float32_io: bool = False
+
+
+class CancelToken:
+    """Cancels the runs it is passed to through :class:`RunOptions` that have not started yet."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._waiters = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+        with self._lock:
+            waiters = list(self._waiters)
+        for cond in waiters:
+            with cond:
+                cond.notify_all()
+
+    def _add_waiter(self, cond: threading.Condition):
+        with self._lock:
+            self._waiters.append(cond)
+
+    def _remove_waiter(self, cond: threading.Condition):
+        with self._lock:
+            self._waiters.remove(cond)
+
+
+class RunOptions:
+    """
+    Per run settings, passed as ``run_options`` to :meth:`axengine.InferenceSession.run`.
+
+    Runs of one session are queued by ``priority`` (higher first). A queued run is dropped with
+    :class:`TimeoutError` when its deadline passes, ``timeout`` in seconds from the call or ``deadline``
+    as an absolute ``time.monotonic()`` value, and with :class:`concurrent.futures.CancelledError` when
+    its ``cancel_token`` is cancelled. ``run_tag`` groups runs in the session run stats.
+    """
+
+    def __init__(
+            self,
+            timeout: float | None = None,
+            deadline: float | None = None,
+            priority: int = 0,
+            run_tag: str = "",
+            cancel_token: CancelToken | None = None,
+    ) -> None:
+        self.timeout = timeout
+        self.deadline = deadline
+        self.priority = priority
+        self.run_tag = run_tag
+        self.cancel_token = cancel_token
+
+    def get_deadline(self) -> float | None:
+        deadline = self.deadline
+        if self.timeout is not None:
+            timeout_deadline = time.monotonic() + self.timeout
+            deadline = timeout_deadline if deadline is None else min(deadline, timeout_deadline)
+        return deadline
+
+
+class SharedModel:
+    """A loaded model shared by a session and its clones, ``unload`` runs when the last one releases it."""
+
+    def __init__(self, unload) -> None:
+        self._unload = unload
+        self._refs = 1
+        self._lock = threading.Lock()
+        self._memory_budget = None
+
+    @property
+    def refs(self) -> int:
+        return self._refs
+
+    def acquire(self):
+        with self._lock:
+            if self._refs == 0:
+                raise RuntimeError("Model is already unloaded.")
+            self._refs += 1
+
+    def release(self):
+        with self._lock:
+            if self._refs == 0:
+                return
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        self._unload()
+        if self._memory_budget is not None:
+            self._memory_budget.release(self)
 
 
 class Session(ABC):
     def __init__(self) -> None:
         self._shape_count = 0
+        # NodeArgs per shape group, None until the group is first asked for
         self._inputs = []
         self._outputs = []
+        # inputs written in place through get_input_buffer(), may be omitted from the input feed
+        self._bound_inputs = {}
+        # inputs fed from another session's output buffer through link_input(),
+        #   name -> (index, source session, source output index, copy)
+        self._linked_inputs = {}
+        # sessions with inputs linked to outputs of this one, they read its buffers so it must outlive them
+        self._link_consumers = weakref.WeakSet()
+        # recurrent state, input name -> (input index, output index), the buffers swap roles after every run
+        self._states = {}
+        # caller owned memory fed to the next run through bind_input_memory(),
+        #   name -> (index, physical address, virtual address, size, flush)
+        self._external_inputs = {}
+        self._run_queue = RunQueue()
+        # the npu a run occupies, as seen by the process-wide scheduler
+        self._device_key = (type(self).__name__, 0)
+        self._warmup_info = {"runs": 0, "total_ms": 0.0, "first_ms": 0.0, "last_ms": 0.0}
+        # when the last run finished, idle sessions may be evicted by the memory budget
+        self._last_active = time.monotonic()
+        self._memory_budget = None
+        # the loaded model, shared with clones
+        self._model = None
+        self._bf16_float32_io = False
+        # outputs returned as float32, output index -> (scale, zero point, axis)
+        self._dequant = {}
+        # (shape group, output index) -> (byte strides or None when dense, bytes spanned)
+        self._output_layouts = {}
+        # bumped by every run and by close, output views of an older generation are stale
+        self._io_generation = 0
+
+    def _init_io_meta(self, path_or_bytes: str | bytes | os.PathLike, sess_options: SessionOptions | None):
+        if sess_options is not None:
+            self._bf16_float32_io = bool(getattr(sess_options, "bf16_float32_io", False))
+        self._inputs = [None] * self._shape_count
+        self._outputs = [None] * self._shape_count
+        cache_dir = getattr(sess_options, "metadata_cache_dir", None) if sess_options is not None else None
+        if cache_dir is None:
+            return
+        digest = model_hash(path_or_bytes)
+        metadata = ModelMetadata.load(cache_dir, digest)
+        if metadata is not None and metadata.shape_count == self._shape_count:
+            self._inputs = list(metadata.inputs)
+            self._outputs = list(metadata.outputs)
+            return
+        for group in range(self._shape_count):
+            self.get_inputs(group)
+            self.get_outputs(group)
+        ModelMetadata(self._inputs, self._outputs).save(cache_dir, digest)
+
+    def _get_warmup_runs(self, sess_options: SessionOptions | None) -> list[int]:
+        runs = getattr(sess_options, "warmup_runs", 0) if sess_options is not None else 0
+        if isinstance(runs, dict):
+            for group in runs:
+                if group < 0 or group >= self._shape_count:
+                    raise ValueError(f"Warmup shape group '{group}' is out of range, total {self._shape_count}.")
+            return [int(runs.get(group, 0)) for group in range(self._shape_count)]
+        return [int(runs)] * self._shape_count
+
+    def _prefault_io(self):
+        # touch every page of the io buffers once, backends with host mapped buffers override this
+        pass
+
+    def _warmup(self, sess_options: SessionOptions | None):
+        runs = self._get_warmup_runs(sess_options)
+        if not any(count > 0 for count in runs):
+            return
+        start = time.perf_counter()
+        self._prefault_io()
+        costs = []
+        for group, count in enumerate(runs):
+            if count <= 0:
+                continue
+            feed = {i.name: np.zeros(i.shape, dtype=i.dtype) for i in self.get_inputs(group)}
+            for _ in range(count):
+                t = time.perf_counter()
+                self.run(None, feed, shape_group=group)
+                costs.append((time.perf_counter() - t) * 1000)
+        self._warmup_info = {
+            "runs": len(costs),
+            "total_ms": (time.perf_counter() - start) * 1000,
+            "first_ms": costs[0],
+            "last_ms": costs[-1],
+        }
+        print(f"[INFO] Warmup: {len(costs)} runs in {self._warmup_info['total_ms']:.3f} ms, "
+              f"first {costs[0]:.3f} ms, last {costs[-1]:.3f} ms")
 
     def _validate_input(self, feed_input_names: dict[str, np.ndarray]):
         missing_input_names = []
         for i in self.get_inputs():
-            if i.name not in feed_input_names:
+            if i.name in self._linked_inputs:
+                if i.name in feed_input_names:
+                    raise ValueError(f"Input '{i.name}' is linked to another session output, it can not be fed.")
+                continue
+            if i.name in self._external_inputs:
+                if i.name in feed_input_names:
+                    raise ValueError(f"Input '{i.name}' is bound to external memory, it can not be fed.")
+                continue
+            if i.name not in feed_input_names and i.name not in self._bound_inputs and i.name not in self._states:
                 missing_input_names.append(i.name)
         if missing_input_names:
             raise ValueError(
                 f"Required inputs ({missing_input_names}) are missing from input feed ({feed_input_names}).")
 
+    def _yuv_planes(self, node: NodeArg, value) -> list[np.ndarray] | None:
+        """
+        The planes of a semi-planar frame fed to an NV12 or NV21 input: a ``(y, uv)`` tuple, or one uint8 buffer
+        holding both in any shape. None for ordinary feeds.
+        """
+        if isinstance(value, (tuple, list)):
+            planes = [np.asarray(p) for p in value]
+            if node.color_space is not None and node.color_space not in _SEMI_PLANAR:
+                raise ValueError(f"Input '{node.name}' expects {node.color_space} data, separate Y and UV planes "
+                                 f"are only taken by NV12 and NV21 inputs.")
+            if len(planes) != 2 or planes[1].size * 2 != planes[0].size:
+                raise ValueError(f"Input '{node.name}' takes a (y, uv) pair with the UV plane half the size of the "
+                                 f"Y plane, however gets sizes {[p.size for p in planes]}.")
+        elif node.color_space in _SEMI_PLANAR and list(value.shape) != list(node.shape):
+            planes = [value]
+        else:
+            return None
+        nbytes = node.dtype.itemsize * int(np.prod(node.shape))
+        if node.dtype != np.uint8 or any(p.dtype != np.uint8 for p in planes) or sum(p.size for p in planes) != nbytes:
+            raise ValueError(f"Input '{node.name}' takes {nbytes} bytes of uint8 {node.color_space or 'YUV'} data, "
+                             f"however gets {[(p.shape, p.dtype.name) for p in planes]}.")
+        return planes
+
+    def _converts_bf16(self, node_dtype: np.dtype, dtype: np.dtype) -> bool:
+        # float32 data crossing a bfloat16 io buffer, converted on the way in or out
+        return self._bf16_float32_io and node_dtype == _BF16 and dtype == np.float32
+
+    def set_output_dequantization(
+            self,
+            output_name: str,
+            scale: float | np.ndarray | None,
+            zero_point: float | np.ndarray = 0,
+            axis: int | None = None,
+    ):
+        """
+        Returns integer output ``output_name`` as float32 ``(q - zero_point) * scale``, computed while it is
+        copied out of CMM or the host staging buffer instead of as extra passes after run(). ``scale`` and
+        ``zero_point`` are scalars or 1-D per channel values along ``axis``. ``scale=None`` turns it off.
+        """
+        out_index = next((i for i, one in enumerate(self.get_outputs()) if one.name == output_name), None)
+        if out_index is None:
+            raise ValueError(f"Output name '{output_name}' is not in model outputs name list.")
+        if scale is None:
+            self._dequant.pop(out_index, None)
+            return
+        for group in range(self._shape_count):
+            node = self.get_outputs(group)[out_index]
+            if not np.issubdtype(node.dtype, np.integer):
+                raise ValueError(f"Output '{output_name}' has dtype {node.dtype}, only integer outputs are "
+                                 f"dequantized.")
+            for value in (scale, zero_point):
+                if np.ndim(value) == 0:
+                    continue
+                if axis is None or not -len(node.shape) <= axis < len(node.shape):
+                    raise ValueError(f"Per channel parameters of output '{output_name}' need an axis within "
+                                     f"shape {node.shape}, got {axis}.")
+                if np.size(value) != node.shape[axis]:
+                    raise ValueError(f"Output '{output_name}' has {node.shape[axis]} channels on axis {axis}, "
+                                     f"however gets {np.size(value)} quantization parameters.")
+        self._dequant[out_index] = (scale, zero_point, axis)
+
+    def _output_strides(self, shape_group: int, index: int) -> tuple[tuple[int, ...] | None, int]:
+        """Byte strides of a padded output, None when it is densely packed, and the bytes it spans."""
+        key = (shape_group, index)
+        layout = self._output_layouts.get(key)
+        if layout is None:
+            node = self.get_outputs(shape_group)[index]
+            itemsize = node.dtype.itemsize
+            dense_size = itemsize * int(np.prod(node.shape))
+            strides = tuple(int(s) for s in node.strides) if node.strides is not None else None
+            layout = (None, dense_size)
+            if strides is not None and len(strides) == len(node.shape) and 0 not in node.shape:
+                dense, step = [], itemsize
+                for dim in reversed(node.shape):
+                    dense.insert(0, step)
+                    step *= dim
+                # the stride of a dimension of size 1 is never used, whatever the runtime put there
+                used = [(d, s, t) for d, s, t in zip(node.shape, strides, dense) if d > 1]
+                extent = itemsize + sum((d - 1) * s for d, s, _ in used)
+                if any(s < itemsize or s % itemsize for _, s, _ in used) or (
+                        node.size is not None and extent > node.size):
+                    print(f"[WARNING] Ignoring strides {list(strides)} of output '{node.name}' with shape "
+                          f"{node.shape}, the output is read densely packed.")
+                elif any(s != t for _, s, t in used):
+                    layout = (tuple(s if d > 1 else t for d, s, t in zip(node.shape, strides, dense)), extent)
+            self._output_layouts[key] = layout
+        return layout
+
+    def _read_output(
+            self,
+            index: int,
+            raw: np.ndarray,
+            shape: list[int],
+            strides: tuple[int, ...] | None = None,
+    ) -> np.ndarray:
+        """
+        The one copy of an output out of its io buffer or staging buffer. ``raw`` is the flat buffer content,
+        ``strides`` the byte strides of a padded layout. Converted outputs come out dense, others keep the
+        padded layout as a strided view over a copy of the buffer.
+        """
+        if strides is None:
+            view = raw.reshape(shape)
+        else:
+            view = np.lib.stride_tricks.as_strided(raw, shape, strides)
+        dequant = self._dequant.get(index)
+        if dequant is not None:
+            return dequantize(view, *dequant)
+        if self._converts_bf16(view.dtype, np.float32):
+            return bfloat16_to_float32(view)
+        if strides is None:
+            return view.copy()
+        # one memcpy of the padded buffer, slicing the view never touches the padding and
+        #   np.ascontiguousarray() makes the dense copy once it is really needed
+        return np.lib.stride_tricks.as_strided(raw.copy(), shape, strides)
+
+    def _read_output_slice(self, index: int, part: np.ndarray, shape: list[int], key) -> np.ndarray:
+        """
+        :meth:`_read_output` of ``output[key]`` only, ``part`` is that slice of the io or staging buffer.
+        Per channel dequantization parameters are sliced along with the output.
+        """
+        dequant = self._dequant.get(index)
+        if dequant is not None:
+            scale, zero_point, axis = dequant
+            scale = np.broadcast_to(_broadcast_param(scale, len(shape), axis), shape)[key]
+            zero_point = np.broadcast_to(_broadcast_param(zero_point, len(shape), axis), shape)[key]
+            return dequantize(part, scale, zero_point)
+        if self._converts_bf16(part.dtype, np.float32):
+            return bfloat16_to_float32(part)
+        return np.array(part)
+
     def _validate_output(self, output_names: list[str]):
         if output_names is not None:
             for name in output_names:
@@ -38,22 +385,382 @@ class Session(ABC):
                     raise ValueError(f"Output name '{name}' is not in model outputs name list.")
 
     def get_inputs(self, shape_group: int = 0) -> list[NodeArg]:
-        if shape_group > self._shape_count:
+        if shape_group < 0 or shape_group >= self._shape_count:
             raise ValueError(f"Shape group '{shape_group}' is out of range, total {self._shape_count}.")
         selected_info = self._inputs[shape_group]
+        if selected_info is None:
+            selected_info = self._inputs[shape_group] = self._get_inputs(shape_group)
         return selected_info
 
     def get_outputs(self, shape_group: int = 0) -> list[NodeArg]:
-        if shape_group > self._shape_count:
+        if shape_group < 0 or shape_group >= self._shape_count:
             raise ValueError(f"Shape group '{shape_group}' is out of range, total {self._shape_count}.")
         selected_info = self._outputs[shape_group]
+        if selected_info is None:
+            selected_info = self._outputs[shape_group] = self._get_outputs(shape_group)
         return selected_info
 
     @abstractmethod
+    def _get_inputs(self, shape_group: int) -> list[NodeArg]:
+        pass
+
+    @abstractmethod
+    def _get_outputs(self, shape_group: int) -> list[NodeArg]:
+        pass
+
+    def get_warmup_info(self) -> dict:
+        return dict(self._warmup_info)
+
+    def get_input_buffer(self, name: str, shape_group: int = 0) -> np.ndarray:
+        for i, one in enumerate(self.get_inputs(shape_group)):
+            if one.name == name:
+                buffer = self._bind_input_buffer(i, one)
+                self._bound_inputs[name] = (i, buffer)
+                return buffer
+        raise ValueError(f"Input name '{name}' is not in model inputs name list.")
+
+    @abstractmethod
+    def _bind_input_buffer(self, index: int, node: NodeArg) -> np.ndarray:
+        pass
+
+    def get_input_view(self, name: str, shape_group: int = 0) -> TensorView:
+        if name in self._linked_inputs or any(self.get_inputs(shape_group)[i].name == name
+                                              for i, _ in self._states.values()):
+            raise ValueError(f"Input '{name}' is linked or a state, its buffer changes between runs.")
+        buffer = self.get_input_buffer(name, shape_group)
+        # input views have no generation, they stay valid while the buffer is bound
+        return TensorView(self, name, buffer.ctypes.data, buffer.shape, buffer.dtype, None, None, buffer)
+
+    def _view_valid(self, view: TensorView) -> bool:
+        if self._run_queue.closed:
+            return False
+        if view._generation is None:
+            bound = self._bound_inputs.get(view.name)
+            return bound is not None and bound[1] is view._base
+        return view._generation == self._io_generation
+
+    @abstractmethod
+    def _output_view(self, index: int, node: NodeArg, shape_group: int) -> TensorView:
+        """A view of output ``index`` as left by the run just done, called from inside that run."""
+        pass
+
+    def link_input(self, name: str, source: "Session", output_name: str, copy: bool = False):
+        """
+        Feeds input ``name`` straight from output ``output_name`` of ``source``, which must run on the same
+        provider and device. Unless ``copy`` is set, the input uses the output buffer itself, else the output
+        is copied device side before every run.
+        """
+        if type(source) is not type(self) or source._device_key != self._device_key:
+            raise ValueError(f"Can not link sessions on different providers or devices, "
+                             f"{source._device_key} and {self._device_key}.")
+        in_index = next((i for i, one in enumerate(self.get_inputs()) if one.name == name), None)
+        if in_index is None:
+            raise ValueError(f"Input name '{name}' is not in model inputs name list.")
+        out_index = next((i for i, one in enumerate(source.get_outputs()) if one.name == output_name), None)
+        if out_index is None:
+            raise ValueError(f"Output name '{output_name}' is not in source model outputs name list.")
+        node, out_node = self.get_inputs()[in_index], source.get_outputs()[out_index]
+        if node.dtype != out_node.dtype or int(np.prod(node.shape)) != int(np.prod(out_node.shape)):
+            raise ValueError(f"Input '{name}' expects shape {node.shape} and dtype {node.dtype}, however output "
+                             f"'{output_name}' has shape {out_node.shape} and dtype {out_node.dtype}.")
+        if name in self._linked_inputs:
+            self.unlink_input(name)
+        self._bound_inputs.pop(name, None)
+        copy = self._link_input_buffer(in_index, source, out_index, copy)
+        self._linked_inputs[name] = (in_index, source, out_index, copy)
+        source._link_consumers.add(self)
+
+    def unlink_input(self, name: str):
+        # nothing to undo for inputs that are not linked, e.g. after the session was closed
+        if name not in self._linked_inputs:
+            return
+        in_index, source, _, copy = self._linked_inputs.pop(name)
+        if not copy:
+            self._unlink_input_buffer(in_index)
+        if all(other is not source for _, other, _, _ in self._linked_inputs.values()):
+            source._link_consumers.discard(self)
+
+    @abstractmethod
+    def _link_input_buffer(self, index: int, source: "Session", out_index: int, copy: bool) -> bool:
+        """Points input ``index`` at the source output buffer, returns True when it has to be copied instead."""
+        pass
+
+    @abstractmethod
+    def _unlink_input_buffer(self, index: int):
+        pass
+
+    def bind_input_memory(self, name: str, phy_addr: int, vir_addr: int, size: int, shape_group: int = 0,
+                          flush: bool = False):
+        in_index = next((i for i, one in enumerate(self.get_inputs(shape_group)) if one.name == name), None)
+        if in_index is None:
+            raise ValueError(f"Input name '{name}' is not in model inputs name list.")
+        if name in self._linked_inputs or any(i == in_index for i, _ in self._states.values()):
+            raise ValueError(f"Input '{name}' is linked or a state, it can not be bound to external memory.")
+        node = self.get_inputs(shape_group)[in_index]
+        need = max(node.size or 0, node.dtype.itemsize * int(np.prod(node.shape)))
+        if size < need:
+            raise ValueError(f"Input '{name}' needs {need} bytes in shape group {shape_group}, "
+                             f"however the external memory has {size}.")
+        self._check_input_memory(node, phy_addr, vir_addr, size)
+        self._external_inputs[name] = (in_index, phy_addr, vir_addr, size, flush)
+
+    def _check_input_memory(self, node: NodeArg, phy_addr: int, vir_addr: int, size: int):
+        raise RuntimeError(f"{type(self).__name__} can not run on caller owned memory.")
+
+    def _set_input_memory(self, index: int, phy_addr: int, vir_addr: int, size: int, flush: bool):
+        """Points input ``index`` at external memory for one run."""
+        pass
+
+    def _reset_input_memory(self, index: int):
+        """Points input ``index`` back at its own buffer after the run."""
+        pass
+
+    def bind_state(self, output_name: str, input_name: str):
+        """
+        Declares that output ``output_name`` feeds input ``input_name`` on the next run. After every run the
+        two buffers swap roles, so the state never leaves CMM or device memory. The state starts zeroed.
+        """
+        out_index = next((i for i, one in enumerate(self.get_outputs()) if one.name == output_name), None)
+        if out_index is None:
+            raise ValueError(f"Output name '{output_name}' is not in model outputs name list.")
+        in_index = next((i for i, one in enumerate(self.get_inputs()) if one.name == input_name), None)
+        if in_index is None:
+            raise ValueError(f"Input name '{input_name}' is not in model inputs name list.")
+        for group in range(self._shape_count):
+            node, out_node = self.get_inputs(group)[in_index], self.get_outputs(group)[out_index]
+            if node.dtype != out_node.dtype or list(node.shape) != list(out_node.shape):
+                raise ValueError(f"State input '{input_name}' has shape {node.shape} and dtype {node.dtype}, however "
+                                 f"output '{output_name}' has shape {out_node.shape} and dtype {out_node.dtype}.")
+        if input_name in self._linked_inputs:
+            raise ValueError(f"Input '{input_name}' is linked to another session output.")
+        if any(out_index == j for _, j in self._states.values()):
+            raise ValueError(f"Output '{output_name}' already feeds a state input.")
+        self._bound_inputs.pop(input_name, None)
+        self._states[input_name] = (in_index, out_index)
+        self._reset_state(in_index, None)
+
+    def reset_state(self, input_name: str | None = None, value: np.ndarray | None = None):
+        """Zeroes the state of ``input_name`` (all states when None), or sets it to ``value``."""
+        names = list(self._states) if input_name is None else [input_name]
+        for name in names:
+            if name not in self._states:
+                raise ValueError(f"Input '{name}' is not bound as a state.")
+            in_index, _ = self._states[name]
+            if value is not None:
+                node = self.get_inputs()[in_index]
+                if list(value.shape) != list(node.shape) or value.dtype != node.dtype:
+                    raise ValueError(f"State '{name}' expects shape {node.shape} and dtype {node.dtype}, however "
+                                     f"gets {value.shape} and {value.dtype}.")
+                value = np.ascontiguousarray(value)
+            self._reset_state(in_index, value)
+
+    def get_state(self, input_name: str) -> np.ndarray:
+        """Copy of the state that feeds ``input_name`` on the next run."""
+        if input_name not in self._states:
+            raise ValueError(f"Input '{input_name}' is not bound as a state.")
+        in_index, _ = self._states[input_name]
+        return self._read_state(in_index, self.get_inputs()[in_index])
+
+    def unbind_state(self, input_name: str):
+        # the buffers stay swapped, the input is fed from the input feed again
+        self._states.pop(input_name)
+
+    @abstractmethod
+    def _swap_state(self, in_index: int, out_index: int):
+        pass
+
+    @abstractmethod
+    def _reset_state(self, in_index: int, value: np.ndarray | None):
+        pass
+
+    @abstractmethod
+    def _read_state(self, in_index: int, node: NodeArg) -> np.ndarray:
+        pass
+
+    def _default_output_names(self, shape_group: int) -> list[str]:
+        # state outputs stay in place unless asked for by name
+        state_outputs = {j for _, j in self._states.values()}
+        return [o.name for j, o in enumerate(self.get_outputs(shape_group)) if j not in state_outputs]
+
+    def get_run_stats(self) -> dict[str, dict]:
+        return self._run_queue.stats()
+
+    @abstractmethod
+    def get_memory_usage(self) -> dict[str, int]:
+        pass
+
+    def _reserve_memory(self, nbytes: int, owner=None):
+        """
+        Admission by the process-wide memory budget, raises MemoryError when ``nbytes`` do not fit. The
+        bytes are booked for ``owner``, the session itself or the :class:`SharedModel` it runs.
+        """
+        owner = self if owner is None else owner
+        budget = owner._memory_budget or get_memory_budget()
+        if budget is None:
+            return
+        name = getattr(self, "_model_name", None) or f"{type(self).__name__}@{id(self):x}"
+        try:
+            budget.reserve(owner, self._device_key, nbytes, name if owner is self else f"{name} model")
+        except MemoryError:
+            # whatever was loaded so far is freed now, not when the half built session is collected
+            self._release()
+            raise
+        owner._memory_budget = budget
+
+    def close(self):
+        """Frees the model and io buffers now, after the run in progress, later runs raise RuntimeError."""
+        self._close("Session is closed.")
+
+    def _close(self, reason: str, wait: bool = True) -> bool:
+        consumers = [c for c in self._link_consumers if not c._run_queue.closed]
+        if consumers:
+            # eviction passes over sources of links, an explicit close is refused
+            if not wait:
+                return False
+            names = sorted(name for c in consumers for name, (_, source, _, _) in c._linked_inputs.items()
+                           if source is self)
+            raise RuntimeError(f"Can not close a session whose outputs feed the linked inputs {names} of open "
+                               f"sessions, unlink them first.")
+        if not self._run_queue.close(reason, wait):
+            return False
+        # links of this session to its sources go with it
+        for name in list(self._linked_inputs):
+            self.unlink_input(name)
+        if self._memory_budget is not None:
+            self._memory_budget.release(self)
+        self._release()
+        self._io_generation += 1
+        return True
+
+    @abstractmethod
+    def _release(self):
+        """Frees the io buffers of this session and drops its reference to the model, safe to call twice."""
+        pass
+
+    def clone(self) -> "Session":
+        """
+        A new session running the same loaded model with its own context and io buffers, the model is
+        unloaded once the last of the clones is released. Conversion settings are copied, bound inputs,
+        links and states are not.
+        """
+        if self._run_queue.closed:
+            raise RuntimeError("Can not clone a closed session.")
+        self._model.acquire()
+        clone = object.__new__(type(self))
+        Session.__init__(clone)
+        clone._model = self._model
+        clone._shape_count = self._shape_count
+        clone._inputs = list(self._inputs)
+        clone._outputs = list(self._outputs)
+        clone._device_key = self._device_key
+        clone._bf16_float32_io = self._bf16_float32_io
+        clone._dequant = dict(self._dequant)
+        try:
+            self._init_clone(clone)
+        except BaseException:
+            clone._release()
+            raise
+        return clone
+
+    @abstractmethod
+    def _init_clone(self, clone: "Session"):
+        """Copies the backend state of the shared model to ``clone``, creates its context and io buffers."""
+        pass
+
     def run(
             self,
             output_names: list[str] | None,
             input_feed: dict[str, np.ndarray],
-            run_options=None
+            run_options: RunOptions | None = None,
+            shape_group: int = 0
+    ) -> list[np.ndarray]:
+        return self._submit(lambda: self._run(output_names, input_feed, shape_group), run_options)
+
+    def run_views(
+            self,
+            output_names: list[str] | None,
+            input_feed: dict[str, np.ndarray],
+            run_options: RunOptions | None = None,
+            shape_group: int = 0
+    ) -> list[TensorView]:
+        self._validate_output(output_names)
+        if output_names is None:
+            output_names = self._default_output_names(shape_group)
+
+        def fn():
+            # nothing is copied out by the run itself
+            self._run([], input_feed, shape_group)
+            return [self._output_view(i, node, shape_group) for i, node in enumerate(self.get_outputs(shape_group))
+                    if node.name in output_names]
+
+        return self._submit(fn, run_options)
+
+    def _output_slice(self, index: int, node: NodeArg, shape_group: int, key) -> np.ndarray:
+        """``output[key]`` as left by the run just done, raw and only valid until the next run."""
+        return self._output_view(index, node, shape_group).numpy()[key]
+
+    def run_slice(
+            self,
+            output_name: str,
+            key,
+            input_feed: dict[str, np.ndarray],
+            run_options: RunOptions | None = None,
+            shape_group: int = 0
+    ) -> np.ndarray:
+        index = next((i for i, one in enumerate(self.get_outputs(shape_group)) if one.name == output_name), None)
+        if index is None:
+            raise ValueError(f"Output name '{output_name}' is not in model outputs name list.")
+        node = self.get_outputs(shape_group)[index]
+
+        def fn():
+            self._run([], input_feed, shape_group)
+            part = self._output_slice(index, node, shape_group, key)
+            return self._read_output_slice(index, part, node.shape, key)
+
+        return self._submit(fn, run_options)
+
+    def _submit(self, run, run_options: RunOptions | None):
+        if run_options is None:
+            priority, deadline, token, tag = 0, None, None, ""
+        else:
+            priority = run_options.priority
+            deadline = run_options.get_deadline()
+            token = run_options.cancel_token
+            tag = run_options.run_tag
+
+        def fn():
+            for name, (_, source, _, _) in self._linked_inputs.items():
+                if source._run_queue.closed:
+                    raise RuntimeError(f"Input '{name}' is linked to an output of a closed session.")
+            # external input memory is taken by this run only
+            external = dict(self._external_inputs)
+            try:
+                for index, phy_addr, vir_addr, size, flush in external.values():
+                    self._set_input_memory(index, phy_addr, vir_addr, size, flush)
+                # the buffers are about to be overwritten
+                self._io_generation += 1
+                outputs = run()
+                for in_index, out_index in self._states.values():
+                    self._swap_state(in_index, out_index)
+                return outputs
+            finally:
+                for name, binding in external.items():
+                    self._reset_input_memory(binding[0])
+                    if self._external_inputs.get(name) is binding:
+                        del self._external_inputs[name]
+                self._last_active = time.monotonic()
+
+        scheduler = get_scheduler()
+        if scheduler is None:
+            return self._run_queue.run(fn, priority, deadline, token, tag)
+        return self._run_queue.run(
+            lambda: scheduler.run(self, fn, priority, deadline, token), priority, deadline, token, tag)
+
+    @abstractmethod
+    def _run(
+            self,
+            output_names: list[str] | None,
+            input_feed: dict[str, np.ndarray],
+            shape_group: int = 0
     ) -> list[np.ndarray]:
         pass
@@ -0,0 +1,55 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import ml_dtypes as mldt
+import numpy as np
+
+__all__ = ["float32_to_bfloat16", "bfloat16_to_float32"]
+
+_BF16 = np.dtype(mldt.bfloat16)
+
+
+def _check_out(x: np.ndarray, out: np.ndarray, dtypes: tuple) -> np.ndarray:
+    if out.dtype not in dtypes:
+        raise ValueError(f"Output dtype must be one of {[str(d) for d in dtypes]}, however gets {out.dtype}.")
+    if out.size != x.size:
+        raise ValueError(f"Output has {out.size} elements, however input has {x.size}.")
+    if not out.flags.c_contiguous:
+        raise ValueError("Output must be C contiguous.")
+    return out.reshape(x.shape)
+
+
+def float32_to_bfloat16(x: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Rounds float32 ``x`` to bfloat16, nearest even, NaN stays NaN. ``out`` is a bfloat16 or uint16 array
+    with as many elements as ``x``, e.g. a view of an input buffer, it is written in a single pass
+    without temporaries. Returns ``out`` with the shape of ``x``, viewed as bfloat16.
+    """
+    x = np.asarray(x, dtype=np.float32)
+    if out is None:
+        out = np.empty(x.shape, dtype=_BF16)
+    dst = _check_out(x, out, (_BF16, np.dtype(np.uint16))).view(_BF16)
+    # the ml_dtypes cast loop rounds exactly like the rounding bias trick on the bits, but in one pass,
+    #   the bias trick needs four full passes plus a NaN fix-up with numpy ufuncs
+    np.copyto(dst, x, casting="unsafe")
+    return dst
+
+
+def bfloat16_to_float32(x: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Widens bfloat16 ``x`` (or its uint16 bits) to float32, exact. ``out`` is a float32 array with as many
+    elements as ``x``, written in a single pass. Returns ``out`` with the shape of ``x``.
+    """
+    x = np.asarray(x)
+    if x.dtype not in (_BF16, np.dtype(np.uint16)):
+        raise ValueError(f"Input dtype must be bfloat16 or uint16, however gets {x.dtype}.")
+    if out is None:
+        out = np.empty(x.shape, dtype=np.float32)
+    dst = _check_out(x, out, (np.dtype(np.float32),))
+    # bfloat16 is the upper half of a float32, shifting the bits up is the whole conversion
+    np.left_shift(x.view(np.uint16), 16, out=dst.view(np.uint32), dtype=np.uint32)
+    return dst
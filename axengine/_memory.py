@@ -0,0 +1,113 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import collections
+import threading
+import time
+import weakref
+
+__all__ = ["MemoryBudget", "set_memory_budget", "get_memory_budget"]
+
+_budget = None
+
+
+def set_memory_budget(budget: "MemoryBudget | None"):
+    """Installs ``budget`` as the process-wide memory budget new sessions are admitted by, None removes it."""
+    global _budget
+    _budget = budget
+
+
+def get_memory_budget() -> "MemoryBudget | None":
+    return _budget
+
+
+def _mib(nbytes: int) -> str:
+    return f"{nbytes / 2 ** 20:.1f} MiB"
+
+
+class MemoryBudget:
+    """
+    Caps the CMM (AxEngine) or device memory (AXCLRT) held by the sessions of one process.
+
+    ``limit`` is a byte count for every device or a ``{device: bytes}`` dict, devices are ``("AxEngine", 0)``
+    or ``("AXCLRT", device_id)`` as for :class:`axengine.Scheduler`, devices missing from the dict are not
+    limited. A model is admitted with an estimate before it is loaded, so a model that can not fit fails
+    fast, then with its real usage (see :meth:`axengine.InferenceSession.get_memory_usage`), and the io
+    buffers of every session running it on top. A model shared by clones (see
+    :meth:`axengine.InferenceSession.clone`) is booked once. When something does not fit, sessions of the
+    same device that have not run for ``evict_idle`` seconds are closed, least recently used first; when
+    that is not enough or ``evict_idle`` is None the new session fails with :class:`MemoryError`. Evicted
+    sessions raise :class:`RuntimeError` on their next run::
+
+        axe.set_memory_budget(axe.MemoryBudget(limit=3 * 2 ** 30, evict_idle=60))
+    """
+
+    def __init__(self, limit: int | dict, evict_idle: float | None = None):
+        self.limit = limit
+        self.evict_idle = evict_idle
+        # evicting closes sessions, which release themselves from here on the same thread
+        self._lock = threading.RLock()
+        # backend session -> (device, bytes, name)
+        self._sessions = weakref.WeakKeyDictionary()
+        self._evictions = collections.Counter()
+
+    def _device_limit(self, device) -> int | None:
+        if isinstance(self.limit, dict):
+            return self.limit.get(device)
+        return self.limit
+
+    def used(self, device) -> int:
+        with self._lock:
+            return sum(nbytes for d, nbytes, _ in self._sessions.values() if d == device)
+
+    def _evict(self, device, nbytes: int, limit: int, name: str):
+        # models are booked apart from the sessions running them, they go with the last of those
+        now = time.monotonic()
+        idle = [s for s, (d, _, _) in self._sessions.items()
+                if d == device and hasattr(s, "_last_active") and now - s._last_active >= self.evict_idle]
+        for session in sorted(idle, key=lambda s: s._last_active):
+            if self.used(device) + nbytes <= limit:
+                break
+            _, held, victim = self._sessions[session]
+            # a session that started running meanwhile is skipped
+            if session._close(f"Session '{victim}' was evicted by the memory budget to load '{name}'.", wait=False):
+                print(f"[INFO] Memory budget: evicted '{victim}' ({_mib(held)}) to load '{name}'.")
+                self._evictions[device] += 1
+
+    def reserve(self, session, device, nbytes: int, name: str):
+        """Books ``nbytes`` of ``device`` for ``session``, replacing what it booked before."""
+        with self._lock:
+            limit = self._device_limit(device)
+            self._sessions.pop(session, None)
+            if limit is not None and self.used(device) + nbytes > limit:
+                if self.evict_idle is not None:
+                    self._evict(device, nbytes, limit, name)
+                others = self.used(device)
+                if others + nbytes > limit:
+                    holders = sorted(((n, b) for d, b, n in self._sessions.values() if d == device),
+                                     key=lambda item: -item[1])
+                    held = f", held by {', '.join(f'{n} {_mib(b)}' for n, b in holders)}" if holders else ""
+                    raise MemoryError(
+                        f"Session '{name}' needs {_mib(nbytes)} of {device} memory, however only "
+                        f"{_mib(max(limit - others, 0))} of the {_mib(limit)} budget is free{held}.")
+            self._sessions[session] = (device, nbytes, name)
+
+    def release(self, session):
+        with self._lock:
+            self._sessions.pop(session, None)
+
+    def stats(self) -> dict:
+        """Budget, bytes held and holders per device."""
+        with self._lock:
+            result = {}
+            for device, nbytes, name in self._sessions.values():
+                entry = result.setdefault(device, {"limit": self._device_limit(device), "used": 0, "sessions": {}})
+                entry["used"] += nbytes
+                entry["sessions"][name] = entry["sessions"].get(name, 0) + nbytes
+            for device, entry in result.items():
+                entry["evictions"] = self._evictions[device]
+            return result
@@ -0,0 +1,124 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import hashlib
+import json
+import os
+
+import ml_dtypes as mldt
+import numpy as np
+
+from ._node import NodeArg
+
+__all__ = ["ModelMetadata", "model_hash", "read_model_metadata"]
+
+_CACHE_VERSION = 3
+_CUSTOM_DTYPES = {"bfloat16": np.dtype(mldt.bfloat16)}
+
+# hashing a large model is not free, remember the hash of files seen in this process
+_hash_memo = {}
+
+
+def model_hash(path_or_bytes: str | bytes | os.PathLike) -> str:
+    """sha256 of the model file content, the key of the metadata cache."""
+    if isinstance(path_or_bytes, bytes):
+        return hashlib.sha256(path_or_bytes).hexdigest()
+    if not isinstance(path_or_bytes, (str, os.PathLike)):
+        raise TypeError(f"Unable to hash model from type '{type(path_or_bytes)}'")
+    stat = os.stat(path_or_bytes)
+    key = (os.path.realpath(path_or_bytes), stat.st_size, stat.st_mtime_ns)
+    digest = _hash_memo.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path_or_bytes, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = _hash_memo[key] = sha.hexdigest()
+    return digest
+
+
+def _dtype_from_name(name: str) -> np.dtype:
+    return _CUSTOM_DTYPES[name] if name in _CUSTOM_DTYPES else np.dtype(name)
+
+
+class ModelMetadata:
+    """Inputs and outputs of every shape group of a model, as cached on disk."""
+
+    def __init__(self, inputs: list[list[NodeArg]], outputs: list[list[NodeArg]]):
+        self.inputs = inputs
+        self.outputs = outputs
+
+    @property
+    def shape_count(self) -> int:
+        return len(self.inputs)
+
+    def get_inputs(self, shape_group: int = 0) -> list[NodeArg]:
+        if shape_group < 0 or shape_group >= self.shape_count:
+            raise ValueError(f"Shape group '{shape_group}' is out of range, total {self.shape_count}.")
+        return self.inputs[shape_group]
+
+    def get_outputs(self, shape_group: int = 0) -> list[NodeArg]:
+        if shape_group < 0 or shape_group >= self.shape_count:
+            raise ValueError(f"Shape group '{shape_group}' is out of range, total {self.shape_count}.")
+        return self.outputs[shape_group]
+
+    def to_dict(self) -> dict:
+        def nodes(groups):
+            return [[{"name": n.name, "dtype": n.dtype.name, "shape": list(n.shape), "layout": n.layout,
+                      "quantization": n.quantization, "size": n.size, "strides": n.strides,
+                      "memory_type": n.memory_type, "color_space": n.color_space} for n in group]
+                    for group in groups]
+
+        return {"version": _CACHE_VERSION, "inputs": nodes(self.inputs), "outputs": nodes(self.outputs)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ModelMetadata":
+        if data.get("version") != _CACHE_VERSION:
+            raise ValueError(f"Unsupported metadata cache version '{data.get('version')}'.")
+
+        def nodes(groups):
+            return [[NodeArg(n["name"], _dtype_from_name(n["dtype"]), list(n["shape"]), n["layout"], n["quantization"],
+                             n["size"], n["strides"], n["memory_type"], n["color_space"]) for n in group]
+                    for group in groups]
+
+        return cls(nodes(data["inputs"]), nodes(data["outputs"]))
+
+    @staticmethod
+    def cache_path(cache_dir: str | os.PathLike, digest: str) -> str:
+        return os.path.join(cache_dir, f"{digest}.json")
+
+    def save(self, cache_dir: str | os.PathLike, digest: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        path = self.cache_path(cache_dir, digest)
+        # write then rename, concurrent readers never see a partial file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, cache_dir: str | os.PathLike, digest: str) -> "ModelMetadata | None":
+        path = cls.cache_path(cache_dir, digest)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[WARNING] Ignoring broken metadata cache '{path}': {e}")
+            return None
+
+
+def read_model_metadata(
+        path_or_bytes: str | bytes | os.PathLike,
+        cache_dir: str | os.PathLike,
+) -> ModelMetadata | None:
+    """
+    Return the inputs and outputs of a model from the metadata cache without loading it, or None if the
+    model was never loaded with ``SessionOptions.metadata_cache_dir`` set to ``cache_dir``.
+    """
+    return ModelMetadata.load(cache_dir, model_hash(path_or_bytes))
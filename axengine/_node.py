@@ -7,7 +7,23 @@
 
 
 class NodeArg(object):
-    def __init__(self, name, dtype, shape):
+    __slots__ = ("name", "dtype", "shape", "layout", "quantization", "size", "strides", "memory_type", "color_space")
+
+    def __init__(self, name, dtype, shape, layout=None, quantization=None, size=None, strides=None, memory_type=None,
+                 color_space=None):
         self.name = name
         self.dtype = dtype
         self.shape = shape
+        # "NHWC" or "NCHW", None when the runtime does not tell
+        self.layout = layout
+        # raw nQuantizationValue of the io meta, AxEngine only
+        self.quantization = quantization
+        # bytes the runtime reserves for the tensor, may be larger than the packed shape
+        self.size = size
+        # per dimension strides as reported by the runtime, AxEngine only
+        self.strides = strides
+        # "physical", "virtual" or "ocm", AxEngine only
+        self.memory_type = memory_type
+        # pixel format of image inputs, e.g. "NV12" or "RGB", None for feature maps or when unknown, AxEngine only
+        self.color_space = color_space
+
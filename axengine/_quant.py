@@ -0,0 +1,55 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import numpy as np
+
+__all__ = ["dequantize"]
+
+
+def _broadcast_param(value, ndim: int, axis: int | None) -> np.ndarray | np.float32:
+    value = np.asarray(value, dtype=np.float32)
+    if value.ndim == 0:
+        return np.float32(value)
+    if axis is None:
+        # already shaped to broadcast against the tensor, e.g. sliced along with it
+        if value.ndim == ndim:
+            return value
+        raise ValueError("Per channel quantization parameters need an axis.")
+    if value.ndim != 1:
+        raise ValueError(f"Per channel quantization parameters must be 1-D, however gets {value.ndim}-D.")
+    shape = [1] * ndim
+    shape[axis] = value.size
+    return value.reshape(shape)
+
+
+def dequantize(
+        x: np.ndarray,
+        scale: float | np.ndarray,
+        zero_point: float | np.ndarray = 0,
+        axis: int | None = None,
+        out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    ``(x - zero_point) * scale`` as float32. ``scale`` and ``zero_point`` are scalars or 1-D per channel
+    values along ``axis``, or with ``axis=None`` arrays shaped to broadcast against ``x``. The integer data
+    is read once: the conversion to float32 is fused into the first arithmetic pass, so ``x`` can be a view
+    of an output buffer and ``out`` the only copy made.
+    """
+    if not np.issubdtype(x.dtype, np.integer):
+        raise ValueError(f"Only integer tensors are dequantized, however gets {x.dtype}.")
+    if out is None:
+        out = np.empty(x.shape, dtype=np.float32)
+    elif out.dtype != np.float32 or out.shape != x.shape:
+        raise ValueError(f"Output must be float32 with shape {x.shape}, however gets {out.dtype} {out.shape}.")
+    scale = _broadcast_param(scale, x.ndim, axis)
+    zero_point = _broadcast_param(zero_point, x.ndim, axis)
+    if np.ndim(zero_point) == 0 and zero_point == 0:
+        np.multiply(x, scale, out=out, dtype=np.float32)
+    else:
+        np.subtract(x, zero_point, out=out, dtype=np.float32)
+        np.multiply(out, scale, out=out)
+    return out
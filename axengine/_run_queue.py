@@ -0,0 +1,169 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import collections
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import CancelledError
+
+__all__ = ["RunQueue"]
+
+
+class _TagStats:
+    __slots__ = ("runs", "timeouts", "cancelled", "errors", "wait_time", "run_time", "max_wait")
+
+    def __init__(self):
+        self.runs = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.wait_time = 0.0
+        self.run_time = 0.0
+        self.max_wait = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "runs": self.runs,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "mean_wait_ms": self.wait_time / self.runs * 1000 if self.runs else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+            "mean_run_ms": self.run_time / self.runs * 1000 if self.runs else 0.0,
+        }
+
+
+class RunQueue:
+    """
+    Admission of runs to one session, which owns a single set of io buffers and so runs one request at a
+    time. Waiting runs are served highest priority first, then in arrival order. A waiting run is dropped
+    with :class:`TimeoutError` once its deadline has passed and with :class:`CancelledError` once its cancel
+    token is set, in both cases before it touches the NPU.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._busy = False
+        self._waiting = []
+        self._seq = itertools.count()
+        self._stats = collections.defaultdict(_TagStats)
+        # why the session can not run any more, None while it is open
+        self._closed = None
+
+    def _acquire(self, priority: int, deadline: float | None, token) -> float:
+        arrival = time.monotonic()
+        with self._cond:
+            if self._closed is not None:
+                raise RuntimeError(self._closed)
+            if not self._busy and not self._waiting:
+                if token is not None and token.cancelled:
+                    raise CancelledError("Run was cancelled before it started.")
+                if deadline is not None and arrival >= deadline:
+                    raise TimeoutError("Run deadline passed before it started.")
+                self._busy = True
+                return 0.0
+            entry = (-priority, next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            if token is not None:
+                token._add_waiter(self._cond)
+            try:
+                while True:
+                    if self._closed is not None:
+                        raise RuntimeError(self._closed)
+                    if token is not None and token.cancelled:
+                        raise CancelledError("Run was cancelled while waiting in the session queue.")
+                    now = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        raise TimeoutError(f"Run deadline passed after waiting {(now - arrival) * 1000:.3f} ms "
+                                           f"in the session queue.")
+                    if not self._busy and self._waiting[0] == entry:
+                        heapq.heappop(self._waiting)
+                        self._busy = True
+                        return now - arrival
+                    self._cond.wait(None if deadline is None else deadline - now)
+            except BaseException:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                # the head may have changed
+                self._cond.notify_all()
+                raise
+            finally:
+                if token is not None:
+                    token._remove_waiter(self._cond)
+
+    def _release(self):
+        with self._cond:
+            self._busy = False
+            self._cond.notify_all()
+
+    def run(self, fn, priority: int = 0, deadline: float | None = None, token=None, tag: str = ""):
+        """Calls ``fn()`` once admitted, ``deadline`` is a ``time.monotonic()`` value."""
+        try:
+            wait = self._acquire(priority, deadline, token)
+        except TimeoutError:
+            with self._cond:
+                self._stats[tag].timeouts += 1
+            raise
+        except CancelledError:
+            with self._cond:
+                self._stats[tag].cancelled += 1
+            raise
+        start = time.monotonic()
+        outcome = "errors"
+        try:
+            result = fn()
+            outcome = "runs"
+            return result
+        except TimeoutError:
+            # dropped further down, e.g. by the process-wide scheduler
+            outcome = "timeouts"
+            raise
+        except CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            self._release()
+            with self._cond:
+                stats = self._stats[tag]
+                if outcome in ("runs", "errors"):
+                    stats.runs += 1
+                    stats.wait_time += wait
+                    stats.run_time += elapsed
+                    stats.max_wait = max(stats.max_wait, wait)
+                if outcome != "runs":
+                    setattr(stats, outcome, getattr(stats, outcome) + 1)
+
+    def close(self, reason: str, wait: bool = True) -> bool:
+        """
+        Rejects every later run with ``RuntimeError(reason)``, queued ones included. Waits for the run in
+        progress, or returns False right away when ``wait`` is not set and the session is in use.
+        """
+        with self._cond:
+            if self._closed is not None:
+                return False
+            if not wait and (self._busy or self._waiting):
+                return False
+            while self._busy:
+                self._cond.wait()
+            self._closed = reason
+            self._cond.notify_all()
+            return True
+
+    @property
+    def closed(self) -> bool:
+        return self._closed is not None
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiting)
+
+    def stats(self) -> dict[str, dict]:
+        with self._cond:
+            return {tag: s.as_dict() for tag, s in self._stats.items()}
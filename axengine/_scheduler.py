@@ -0,0 +1,223 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import collections
+import itertools
+import threading
+import time
+import weakref
+from concurrent.futures import CancelledError
+
+import numpy as np
+
+__all__ = ["Scheduler", "set_scheduler", "get_scheduler"]
+
+_scheduler = None
+
+
+def set_scheduler(scheduler: "Scheduler | None"):
+    """Installs ``scheduler`` as the process-wide scheduler every session run goes through, None removes it."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+def get_scheduler() -> "Scheduler | None":
+    return _scheduler
+
+
+class _Model:
+    __slots__ = ("name", "weight", "priority", "max_inflight", "inflight", "vtime",
+                 "runs", "timeouts", "cancelled", "busy_time", "waits", "last_active")
+
+    def __init__(self, name: str, weight: float, priority: int, max_inflight: int | None, window: int):
+        if weight <= 0:
+            raise ValueError(f"Invalid weight {weight} for model '{name}', must be positive.")
+        self.name = name
+        self.weight = weight
+        self.priority = priority
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        # device time used so far divided by weight, the model with the least goes next
+        self.vtime = 0.0
+        self.runs = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.busy_time = 0.0
+        self.waits = collections.deque(maxlen=window)
+        self.last_active = None
+
+
+class _Waiter:
+    __slots__ = ("model", "device", "priority", "seq")
+
+    def __init__(self, model: _Model, device, priority: int, seq: int):
+        self.model = model
+        self.device = device
+        self.priority = priority
+        self.seq = seq
+
+
+class Scheduler:
+    """
+    Arbitrates NPU access between sessions of one process.
+
+    Every run of every session waits here for a slot of its device, at most ``max_inflight_per_device``
+    runs are in flight per device (an int for all devices or a ``{device: limit}`` dict, devices are
+    ``("AxEngine", 0)`` or ``("AXCLRT", device_id)``). A free slot goes to the waiting run with the highest
+    priority class, the model priority plus ``RunOptions.priority``. Within a class models share the device
+    by weight: the model that used the least device time per unit of weight goes first. ``max_inflight``
+    caps the slots one model may hold at once. A model idle for longer than ``idle_reset`` seconds does not
+    keep the share it left unused, it restarts level with the busy models. Deadlines and cancel tokens of :class:`RunOptions` are
+    honored while waiting here, as in the session queue.
+
+    Sessions are registered on first run with default settings, :meth:`register` sets them explicitly::
+
+        scheduler = axe.Scheduler(max_inflight_per_device=2)
+        scheduler.register(tracker, name="tracker", priority=10)
+        scheduler.register(ocr, name="ocr", weight=0.5)
+        axe.set_scheduler(scheduler)
+    """
+
+    def __init__(self, max_inflight_per_device: int | dict = 1, idle_reset: float = 0.1, window: int = 10000):
+        self.max_inflight_per_device = max_inflight_per_device
+        self.idle_reset = idle_reset
+        self.window = window
+        self._cond = threading.Condition()
+        self._models = weakref.WeakKeyDictionary()
+        self._waiting = []
+        self._inflight = collections.Counter()
+        self._device_time = collections.Counter()
+        self._seq = itertools.count()
+
+    @staticmethod
+    def _backend(session):
+        # accepts both InferenceSession and the backend sessions it wraps
+        return getattr(session, "_sess", session)
+
+    def register(
+            self,
+            session,
+            name: str | None = None,
+            weight: float = 1.0,
+            priority: int = 0,
+            max_inflight: int | None = None,
+    ):
+        backend = self._backend(session)
+        if name is None:
+            name = getattr(backend, "_model_name", None) or f"model{len(self._models)}"
+        with self._cond:
+            self._models[backend] = _Model(name, weight, priority, max_inflight, self.window)
+
+    def _device_limit(self, device) -> int:
+        if isinstance(self.max_inflight_per_device, dict):
+            return self.max_inflight_per_device.get(device, 1)
+        return self.max_inflight_per_device
+
+    def _eligible(self, waiter: _Waiter) -> bool:
+        model = waiter.model
+        if self._inflight[waiter.device] >= self._device_limit(waiter.device):
+            return False
+        return model.max_inflight is None or model.inflight < model.max_inflight
+
+    def _next(self, device) -> _Waiter | None:
+        best, best_key = None, None
+        for w in self._waiting:
+            if w.device != device or not self._eligible(w):
+                continue
+            key = (-w.priority, w.model.vtime, w.seq)
+            if best_key is None or key < best_key:
+                best, best_key = w, key
+        return best
+
+    def _admit(self, model: _Model, device, priority: int, deadline: float | None, token) -> float:
+        arrival = time.monotonic()
+        with self._cond:
+            waiter = _Waiter(model, device, priority, next(self._seq))
+            self._waiting.append(waiter)
+            if token is not None:
+                token._add_waiter(self._cond)
+            try:
+                while True:
+                    if token is not None and token.cancelled:
+                        model.cancelled += 1
+                        raise CancelledError("Run was cancelled while waiting for the NPU.")
+                    now = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        model.timeouts += 1
+                        raise TimeoutError(f"Run deadline passed after waiting {(now - arrival) * 1000:.3f} ms "
+                                           f"for the NPU.")
+                    if self._next(device) is waiter:
+                        break
+                    self._cond.wait(None if deadline is None else deadline - now)
+            finally:
+                self._waiting.remove(waiter)
+                if token is not None:
+                    token._remove_waiter(self._cond)
+            # a model returning from idle must not spend credit saved up while it was away
+            if model.last_active is None or arrival - model.last_active > self.idle_reset:
+                busy = {w.model for w in self._waiting}
+                busy.update(m for m in self._models.values() if m.inflight > 0)
+                busy.discard(model)
+                if busy:
+                    model.vtime = max(model.vtime, min(m.vtime for m in busy))
+            model.inflight += 1
+            self._inflight[device] += 1
+            wait = now - arrival
+            model.waits.append(wait)
+            # other waiters may be eligible too when the device allows several runs in flight
+            self._cond.notify_all()
+            return wait
+
+    def _release(self, model: _Model, device, elapsed: float):
+        with self._cond:
+            model.inflight -= 1
+            model.runs += 1
+            model.busy_time += elapsed
+            model.vtime += elapsed / model.weight
+            model.last_active = time.monotonic()
+            self._inflight[device] -= 1
+            self._device_time[device] += elapsed
+            self._cond.notify_all()
+
+    def run(self, session, fn, priority: int = 0, deadline: float | None = None, token=None):
+        """Calls ``fn()`` once ``session`` got a slot of its device."""
+        backend = self._backend(session)
+        with self._cond:
+            model = self._models.get(backend)
+            if model is None:
+                name = getattr(backend, "_model_name", None) or f"model{len(self._models)}"
+                model = self._models[backend] = _Model(name, 1.0, 0, None, self.window)
+        device = getattr(backend, "_device_key", None)
+        self._admit(model, device, model.priority + priority, deadline, token)
+        start = time.monotonic()
+        try:
+            return fn()
+        finally:
+            self._release(model, device, time.monotonic() - start)
+
+    def stats(self) -> dict[str, dict]:
+        """Queue wait percentiles, run counters and share of device time per model."""
+        with self._cond:
+            result = {}
+            for model in self._models.values():
+                waits = np.array(model.waits) * 1000
+                total = sum(self._device_time.values())
+                result[model.name] = {
+                    "runs": model.runs,
+                    "timeouts": model.timeouts,
+                    "cancelled": model.cancelled,
+                    "inflight": model.inflight,
+                    "busy_ms": model.busy_time * 1000,
+                    "device_share": model.busy_time / total if total else 0.0,
+                    "wait_ms": {
+                        "mean": float(waits.mean()) if waits.size else 0.0,
+                        "p50": float(np.percentile(waits, 50)) if waits.size else 0.0,
+                        "p99": float(np.percentile(waits, 99)) if waits.size else 0.0,
+                        "max": float(waits.max()) if waits.size else 0.0,
+                    },
+                }
+            return result
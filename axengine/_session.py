@@ -10,10 +10,11 @@ from typing import Any, Sequence
 
 import numpy as np
 
-from ._base_session import SessionOptions
+from ._base_session import SessionOptions, RunOptions
 from ._node import NodeArg
 from ._providers import axclrt_provider_name, axengine_provider_name
 from ._providers import get_available_providers
+from ._tensor import TensorView
 
 
 class InferenceSession:
@@ -73,6 +74,10 @@ class InferenceSession:
             raise ValueError(f"No available provider found in {providers}.")
         print(f"[INFO] Using provider: {self._provider}")
 
+        # options given as (provider, options) tuple take effect when provider_options is omitted
+        if provider_options is None and self._provider_options is not None:
+            provider_options = [self._provider_options]
+
         if self._provider == axclrt_provider_name:
             from ._axclrt import AXCLRTSession
             self._sess = AXCLRTSession(path_or_bytes, sess_options, provider_options, **kwargs)
@@ -102,17 +107,207 @@ class InferenceSession:
         """
         return self._provider
 
+    def get_warmup_info(self) -> dict:
+        """
+        Return the warmup done at construction, see ``SessionOptions.warmup_runs``: the number of runs, the
+        total time including buffer pre-faulting, and the first and last run time, all in milliseconds.
+        """
+        return self._sess.get_warmup_info()
+
+    def link_input(self, name: str, source: "InferenceSession", output_name: str, copy: bool = False):
+        """
+        Feed input ``name`` from output ``output_name`` of ``source`` without a host round trip.
+
+        Both sessions must use the same provider and device. By default the input uses the output buffer
+        itself, so this session sees whatever ``source`` ran last; with ``copy`` (or when the buffers do not
+        fit) the output is copied device side (CMM to CMM on AxEngine) at the start of every :meth:`run`. A
+        linked input must be omitted from the input feed, and ``source`` should leave ``output_name`` out of
+        its ``output_names`` so it is not copied to the host either. See :class:`axengine.chain.Chain`.
+        """
+        self._sess.link_input(name, source._sess, output_name, copy)
+
+    def unlink_input(self, name: str):
+        """
+        Undo :meth:`link_input`, the input is fed from the input feed again. Does nothing when the input is
+        not linked, also after the session was closed.
+        """
+        self._sess.unlink_input(name)
+
+    def bind_input_memory(
+            self,
+            name: str,
+            phy_addr: int,
+            vir_addr: int,
+            size: int,
+            shape_group: int = 0,
+            flush: bool = False,
+    ):
+        """
+        Run the next :meth:`run` with input ``name`` read straight from caller owned CMM, e.g. a frame written
+        by the video decoder or the image processor, instead of copying it into the session's own buffer.
+
+        ``size`` must cover the input in ``shape_group`` and ``phy_addr`` must be 128 bytes aligned. The
+        binding is used by one run only, the memory must stay valid until that run returns, and the input
+        must then be omitted from the input feed. Memory filled by hardware needs no cache flush, set
+        ``flush`` when the cpu wrote it through a cached mapping. AxEngine only.
+        """
+        self._sess.bind_input_memory(name, phy_addr, vir_addr, size, shape_group, flush)
+
+    def bind_state(self, output_name: str, input_name: str):
+        """
+        Declare that output ``output_name`` feeds input ``input_name`` on the next run, for RNN hidden states
+        and streaming caches whose output has the same shape as the input.
+
+        The two buffers swap roles after every run instead of going through numpy, the state starts zeroed.
+        The state input may be omitted from the input feed (feeding it overrides the state for that run), and
+        ``output_names=None`` no longer returns the state output.
+        """
+        self._sess.bind_state(output_name, input_name)
+
+    def unbind_state(self, input_name: str):
+        self._sess.unbind_state(input_name)
+
+    def reset_state(self, input_name: str | None = None, value: np.ndarray | None = None):
+        """
+        Zero the state feeding ``input_name``, or all bound states when None, or set it to ``value``.
+        """
+        self._sess.reset_state(input_name, value)
+
+    def get_state(self, input_name: str) -> np.ndarray:
+        """
+        Return a copy of the state that feeds ``input_name`` on the next run.
+        """
+        return self._sess.get_state(input_name)
+
+    def set_output_dequantization(
+            self,
+            output_name: str,
+            scale: float | np.ndarray | None,
+            zero_point: float | np.ndarray = 0,
+            axis: int | None = None,
+    ):
+        """
+        Return integer output ``output_name`` as float32 ``(q - zero_point) * scale``.
+
+        The conversion happens during the copy of the output out of CMM (or the device staging buffer),
+        so postprocessing no longer needs ``out.astype(np.float32) * scale``. ``scale`` and ``zero_point``
+        are scalars or 1-D per channel values along ``axis``; ``scale=None`` returns the raw integers again.
+        """
+        self._sess.set_output_dequantization(output_name, scale, zero_point, axis)
+
+    def get_memory_usage(self) -> dict[str, int]:
+        """
+        Return the memory held by this session in bytes: ``model_cmm`` taken by the loaded model, ``io`` for
+        the input and output buffers, ``host_model_buffer`` for the model copy kept in host memory (AxEngine),
+        ``device`` for the card memory (AXCLRT), and ``total``, what counts against the memory budget.
+        """
+        return self._sess.get_memory_usage()
+
+    def close(self):
+        """
+        Free the model and io buffers now instead of when the session is garbage collected. A run in
+        progress completes first, later runs raise RuntimeError. Closing a session whose outputs feed linked
+        inputs of open sessions raises RuntimeError, they must be unlinked (or their chain closed) before; the
+        memory budget does not evict such sessions either.
+        """
+        self._sess.close()
+
+    def clone(self) -> "InferenceSession":
+        """
+        Return a new session sharing the loaded model of this one, with its own execution context and io
+        buffers, so several threads can run the model at once without loading it again. The model memory is
+        taken once, only the io buffers are per clone; the model is unloaded when the last clone (this session
+        included) is closed or collected. Session options and output dequantization are copied, bound and
+        linked inputs and states are not.
+        """
+        clone = object.__new__(InferenceSession)
+        clone._sess_options = self._sess_options
+        clone._provider = self._provider
+        clone._provider_options = self._provider_options
+        clone._available_providers = self._available_providers
+        clone._sess = self._sess.clone()
+        return clone
+
+    def get_run_stats(self) -> dict[str, dict]:
+        """
+        Return run counters and queue wait times per ``RunOptions.run_tag``, including runs dropped
+        on their deadline or cancelled while queued.
+        """
+        return self._sess.get_run_stats()
+
     def get_inputs(self, shape_group: int = 0) -> list[NodeArg]:
         return self._sess.get_inputs(shape_group)
 
     def get_outputs(self, shape_group: int = 0) -> list[NodeArg]:
         return self._sess.get_outputs(shape_group)
 
+    def get_input_buffer(self, name: str, shape_group: int = 0) -> np.ndarray:
+        """
+        Return a writable array bound to the input ``name``.
+
+        Data written into it is used by the following :meth:`run` calls, the input may then be omitted from
+        the input feed. On AxEngine it is a view of the input CMM buffer itself, on AXCLRT it is a host
+        staging buffer uploaded by :meth:`run`.
+        """
+        return self._sess.get_input_buffer(name, shape_group)
+
+    def get_input_view(self, name: str, shape_group: int = 0) -> TensorView:
+        """
+        Bind input ``name`` like :meth:`get_input_buffer` and return it as a :class:`axengine.TensorView`,
+        so another library can fill it in place through DLPack or ``__array_interface__``. The view stays
+        valid while the buffer is bound and the session open. Linked and state inputs have no fixed buffer.
+        """
+        return self._sess.get_input_view(name, shape_group)
+
+    def run_views(
+            self,
+            output_names: list[str] | None,
+            input_feed: dict[str, np.ndarray],
+            run_options: RunOptions | None = None,
+            shape_group: int = 0
+    ) -> list[TensorView]:
+        """
+        :meth:`run`, returning :class:`axengine.TensorView` objects over the output buffers instead of numpy
+        copies: the CMM itself on AxEngine, a host buffer kept per output on AXCLRT. The views are the raw
+        buffer content, output dequantization and ``bf16_float32_io`` do not apply, and they turn stale at
+        the next run of this session.
+        """
+        return self._sess.run_views(output_names, input_feed, run_options, shape_group)
+
+    def run_slice(
+            self,
+            output_name: str,
+            key,
+            input_feed: dict[str, np.ndarray],
+            run_options: RunOptions | None = None,
+            shape_group: int = 0
+    ) -> np.ndarray:
+        """
+        :meth:`run`, returning only ``output[key]`` of output ``output_name``, e.g. ``(0, -1)`` for the logits
+        of the last token. Only the slice is copied out of CMM, and on AXCLRT only the bytes it spans are
+        copied from the device. Output dequantization and ``bf16_float32_io`` apply as in :meth:`run`.
+        """
+        return self._sess.run_slice(output_name, key, input_feed, run_options, shape_group)
+
     def run(
             self,
             output_names: list[str] | None,
             input_feed: dict[str, np.ndarray],
-            run_options=None,
+            run_options: RunOptions | None = None,
             shape_group: int = 0
     ) -> list[np.ndarray]:
+        """
+        Run the model on ``input_feed`` and return the outputs in ``output_names`` (all when None).
+
+        Runs of one session execute one at a time, ``run_options`` sets the priority, deadline and cancel
+        token used while waiting for the session, see :class:`axengine.RunOptions`.
+
+        Outputs whose layout the runtime reports as padded (``NodeArg.strides``) are returned as strided
+        views over a copy of the padded buffer, ``np.ascontiguousarray()`` gives a dense array when needed.
+
+        Inputs of models compiled for NV12 or NV21 (``NodeArg.color_space``) take the frame as a ``(y, uv)``
+        pair of uint8 arrays, which may be strided views of a decoder frame, or as one uint8 buffer holding
+        both planes. The planes are packed into the input buffer as they are, no color conversion happens on
+        the cpu. AXCLRT does not report color spaces, there only the ``(y, uv)`` pair is recognized.
+        """
         return self._sess.run(output_names, input_feed, run_options, shape_group)
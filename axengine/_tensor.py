@@ -0,0 +1,84 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import numpy as np
+
+__all__ = ["TensorView"]
+
+# DLDeviceType kDLCPU, CMM and host staging buffers are both plain process memory
+_DL_CPU = 1
+
+
+class TensorView:
+    """
+    A tensor in an io buffer of a session, handed to other libraries without a copy through
+    ``__array_interface__`` (numpy, OpenCV) or ``__dlpack__`` (``torch.from_dlpack()`` and other DLPack
+    consumers)::
+
+        outputs = session.run_views(None, feed)
+        logits = torch.from_dlpack(outputs[0])
+
+    A view belongs to the run that produced it: the next run of the session overwrites the buffer, closing
+    the session frees it. Exporting a view after either raises :class:`RuntimeError`, see :attr:`valid`.
+    What was exported before is not tracked, consumers must be done with it by then. bfloat16 tensors are
+    exported by ``__array_interface__`` and :meth:`numpy` only, DLPack through numpy has no bfloat16.
+    """
+
+    __slots__ = ("name", "shape", "dtype", "strides", "_address", "_session", "_generation", "_base")
+
+    def __init__(self, session, name: str, address: int, shape: list[int], dtype: np.dtype,
+                 strides: tuple[int, ...] | None, generation: int | None, base=None):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        # byte strides of a padded layout, None when densely packed
+        self.strides = strides
+        self._address = address
+        self._session = session
+        self._generation = generation
+        # host memory the address points into, kept alive with the view
+        self._base = base
+
+    @property
+    def valid(self) -> bool:
+        """False once the session ran again (outputs), rebound the input, or was closed."""
+        return self._session._view_valid(self)
+
+    def _check(self):
+        if not self.valid:
+            raise RuntimeError(f"Tensor view of '{self.name}' is stale, its buffer was reused or freed.")
+
+    @property
+    def __array_interface__(self) -> dict:
+        self._check()
+        return {
+            "version": 3,
+            "shape": self.shape,
+            "typestr": self.dtype.str,
+            "data": (self._address, False),
+            "strides": self.strides,
+        }
+
+    def numpy(self) -> np.ndarray:
+        """An ndarray over the buffer, no copy is made."""
+        array = np.asarray(self)
+        # custom dtypes such as bfloat16 come through the interface as raw void
+        if array.dtype != self.dtype:
+            array = array.view(self.dtype)
+        return array
+
+    def __dlpack__(self, stream=None, **kwargs):
+        if stream is not None and stream != -1:
+            raise BufferError("Tensor views live in host memory, there is no stream to synchronize with.")
+        return self.numpy().__dlpack__(**kwargs)
+
+    def __dlpack_device__(self) -> tuple[int, int]:
+        return _DL_CPU, 0
+
+    def __repr__(self):
+        return (f"TensorView(name={self.name!r}, shape={list(self.shape)}, dtype={self.dtype}, "
+                f"strides={self.strides}, valid={self.valid})")
@@ -0,0 +1,106 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+from typing import Sequence
+
+import numpy as np
+
+from ._base_session import RunOptions
+from ._session import InferenceSession
+
+__all__ = ["Chain"]
+
+
+class Chain:
+    """
+    Runs sessions back to back with each session's inputs linked to the previous session's outputs, see
+    :meth:`axengine.InferenceSession.link_input`. Intermediate tensors stay in CMM or device memory,
+    only the last session's outputs are copied to the host::
+
+        chain = Chain([encoder, decoder], links=[{"decoder_in": "encoder_out"}])
+        outputs = chain.run({"image": image})
+
+    ``links`` has one ``{input_name: output_name}`` dict per pair of consecutive sessions, when it is None
+    inputs are linked to outputs by position. Inputs that are not linked are given per session through
+    ``feeds`` of :meth:`run`.
+    """
+
+    def __init__(
+            self,
+            sessions: Sequence[InferenceSession],
+            links: Sequence[dict[str, str]] | None = None,
+            copy: bool = False,
+    ):
+        if len(sessions) < 2:
+            raise ValueError("A chain needs at least two sessions.")
+        if links is None:
+            links = []
+            for prev, sess in zip(sessions[:-1], sessions[1:]):
+                inputs, outputs = sess.get_inputs(), prev.get_outputs()
+                if len(inputs) > len(outputs):
+                    raise ValueError(f"Can not link {len(inputs)} inputs to {len(outputs)} outputs by position, "
+                                     f"pass links explicitly.")
+                links.append({i.name: o.name for i, o in zip(inputs, outputs)})
+        if len(links) != len(sessions) - 1:
+            raise ValueError(f"Expected {len(sessions) - 1} link dicts for {len(sessions)} sessions, got {len(links)}.")
+
+        self.sessions = list(sessions)
+        self.links = [dict(link) for link in links]
+        self._linked = []
+        try:
+            for prev, sess, link in zip(self.sessions[:-1], self.sessions[1:], self.links):
+                for input_name, output_name in link.items():
+                    sess.link_input(input_name, prev, output_name, copy)
+                    self._linked.append((sess, input_name))
+        except Exception:
+            self.close()
+            raise
+
+        # outputs feeding the next session stay on the device, the rest is still returned by run_all()
+        self._output_names = []
+        for prev, link in zip(self.sessions[:-1], self.links):
+            consumed = set(link.values())
+            self._output_names.append([o.name for o in prev.get_outputs() if o.name not in consumed])
+
+    def run_all(
+            self,
+            input_feed: dict[str, np.ndarray],
+            feeds: Sequence[dict[str, np.ndarray] | None] | None = None,
+            output_names: list[str] | None = None,
+            run_options: RunOptions | None = None,
+    ) -> list[list[np.ndarray]]:
+        """Runs the chain and returns the outputs of every session that were not consumed by a link."""
+        results = []
+        for k, sess in enumerate(self.sessions):
+            feed = input_feed if k == 0 else {}
+            if feeds is not None and feeds[k]:
+                feed = {**feed, **feeds[k]}
+            names = output_names if k == len(self.sessions) - 1 else self._output_names[k]
+            results.append(sess.run(names, feed, run_options))
+        return results
+
+    def run(
+            self,
+            input_feed: dict[str, np.ndarray],
+            output_names: list[str] | None = None,
+            run_options: RunOptions | None = None,
+            feeds: Sequence[dict[str, np.ndarray] | None] | None = None,
+    ) -> list[np.ndarray]:
+        """Runs the chain and returns the outputs of the last session."""
+        return self.run_all(input_feed, feeds, output_names, run_options)[-1]
+
+    def close(self):
+        """Unlinks all inputs, the sessions can be used on their own again."""
+        for sess, input_name in reversed(self._linked):
+            sess.unlink_input(input_name)
+        self._linked = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,185 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Sequence
+
+import numpy as np
+
+from ._base_session import RunOptions
+from ._session import InferenceSession
+
+__all__ = ["Ensemble", "EnsembleResult"]
+
+
+class EnsembleResult:
+    """
+    Outputs and timing of one :meth:`Ensemble.run`. ``outputs[k]`` are the outputs of member ``k``, also
+    reachable by member name through ``result[name]``. Times are in milliseconds, ``start_ms`` is when the
+    member started relative to the start of the run, ``latency_ms`` how long its run took.
+    """
+
+    def __init__(self, names: list[str], outputs: list[list[np.ndarray]], start_ms: list[float],
+                 latency_ms: list[float], total_ms: float):
+        self.names = names
+        self.outputs = outputs
+        self.start_ms = start_ms
+        self.latency_ms = latency_ms
+        self.total_ms = total_ms
+
+    @property
+    def serial_ms(self) -> float:
+        """Sum of the member latencies, what running the members one after another would roughly take."""
+        return sum(self.latency_ms)
+
+    def __getitem__(self, key: int | str) -> list[np.ndarray]:
+        if isinstance(key, str):
+            key = self.names.index(key)
+        return self.outputs[key]
+
+    def __len__(self):
+        return len(self.outputs)
+
+    def timings(self) -> dict[str, dict[str, float]]:
+        return {name: {"start_ms": start, "latency_ms": latency}
+                for name, start, latency in zip(self.names, self.start_ms, self.latency_ms)}
+
+    def __repr__(self):
+        members = ", ".join(f"{n}={t:.3f}" for n, t in zip(self.names, self.latency_ms))
+        return f"EnsembleResult(total_ms={self.total_ms:.3f}, serial_ms={self.serial_ms:.3f}, {members})"
+
+
+class Ensemble:
+    """
+    Runs several sessions on the same input at once and returns when all of them are done, e.g. the face
+    detector, landmark and attribute models on one crop::
+
+        ensemble = Ensemble({"detect": det, "landmark": lmk, "attr": attr})
+        result = ensemble.run({"image": crop})
+        boxes = result["detect"][0]
+
+    Every member runs from its own thread, the NPU call does not hold the GIL, so members on different NPU
+    cores (AxEngine) or contexts (AXCLRT) execute in parallel and the run takes about as long as the slowest
+    member instead of the sum. Runs of one session are serialized, give each member its own session; the
+    same model twice is a :meth:`axengine.InferenceSession.clone`.
+
+    ``input_maps`` has one ``{input_name: feed_name}`` dict per member. When it is None (or a member's entry
+    is), each input is taken from the feed entry of the same name, and a member with a single input takes a
+    feed with a single entry whatever its name. Inputs that are not shared are given per member through
+    ``feeds`` of :meth:`run`.
+    """
+
+    def __init__(
+            self,
+            sessions: Sequence[InferenceSession] | dict[str, InferenceSession],
+            input_maps: Sequence[dict[str, str] | None] | None = None,
+            output_names: Sequence[list[str] | None] | None = None,
+    ):
+        if isinstance(sessions, dict):
+            self.names = list(sessions.keys())
+            self.sessions = list(sessions.values())
+        else:
+            self.sessions = list(sessions)
+            self.names = [f"member{k}" for k in range(len(self.sessions))]
+        if not self.sessions:
+            raise ValueError("An ensemble needs at least one session.")
+        if len({id(sess) for sess in self.sessions}) != len(self.sessions):
+            raise ValueError("The same session is given twice, its runs would not overlap; use clone().")
+        if input_maps is None:
+            input_maps = [None] * len(self.sessions)
+        if len(input_maps) != len(self.sessions):
+            raise ValueError(f"Expected {len(self.sessions)} input maps, got {len(input_maps)}.")
+        if output_names is None:
+            output_names = [None] * len(self.sessions)
+        if len(output_names) != len(self.sessions):
+            raise ValueError(f"Expected {len(self.sessions)} output name lists, got {len(output_names)}.")
+
+        self.input_maps = [dict(m) if m is not None else None for m in input_maps]
+        self.output_names = list(output_names)
+        self._input_names = [[i.name for i in sess.get_inputs()] for sess in self.sessions]
+        # the caller's thread runs the first member, the others get a thread each
+        self._executor = None
+        if len(self.sessions) > 1:
+            self._executor = ThreadPoolExecutor(len(self.sessions) - 1, thread_name_prefix="axengine-ensemble")
+
+    def _feed(self, k: int, input_feed: dict[str, np.ndarray], extra: dict[str, np.ndarray] | None):
+        input_map = self.input_maps[k]
+        if input_map is not None:
+            missing = [src for src in input_map.values() if src not in input_feed]
+            if missing:
+                raise ValueError(f"Ensemble member '{self.names[k]}' maps inputs from {missing}, "
+                                 f"not in the input feed.")
+            feed = {name: input_feed[src] for name, src in input_map.items()}
+        elif len(self._input_names[k]) == 1 and len(input_feed) == 1:
+            feed = {self._input_names[k][0]: next(iter(input_feed.values()))}
+        else:
+            feed = {name: input_feed[name] for name in self._input_names[k] if name in input_feed}
+        if extra:
+            feed.update(extra)
+        return feed
+
+    def run(
+            self,
+            input_feed: dict[str, np.ndarray],
+            feeds: Sequence[dict[str, np.ndarray] | None] | None = None,
+            run_options: RunOptions | None = None,
+    ) -> EnsembleResult:
+        """
+        Runs all members on ``input_feed`` and returns their outputs and timing. When a member fails the
+        others still complete, then the first error is raised.
+        """
+        if feeds is not None and len(feeds) != len(self.sessions):
+            raise ValueError(f"Expected {len(self.sessions)} per member feeds, got {len(feeds)}.")
+        member_feeds = [self._feed(k, input_feed, feeds[k] if feeds is not None else None)
+                        for k in range(len(self.sessions))]
+
+        t0 = time.perf_counter()
+
+        def run_member(k):
+            t1 = time.perf_counter()
+            outputs = self.sessions[k].run(self.output_names[k], member_feeds[k], run_options)
+            return outputs, t1, time.perf_counter()
+
+        if len(self.sessions) > 1 and self._executor is None:
+            raise RuntimeError("The ensemble is closed.")
+        futures = [self._executor.submit(run_member, k) for k in range(1, len(self.sessions))]
+        results, errors = [], []
+        try:
+            results.append(run_member(0))
+        except Exception as e:
+            results.append(None)
+            errors.append(e)
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(None)
+                errors.append(e)
+        total = time.perf_counter() - t0
+        if errors:
+            raise errors[0]
+
+        return EnsembleResult(
+            self.names,
+            [r[0] for r in results],
+            [(r[1] - t0) * 1000 for r in results],
+            [(r[2] - r[1]) * 1000 for r in results],
+            total * 1000,
+        )
+
+    def close(self):
+        """Stops the member threads, the sessions are not closed."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
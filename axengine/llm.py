@@ -0,0 +1,251 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+"""
+Token generation on top of shape groups: one group prefills the prompt in chunks of its sequence
+length, another decodes one token per run. KV caches stay in CMM or device memory through
+:meth:`axengine.InferenceSession.bind_state`, only the logits of the last token reach numpy::
+
+    runner = LLMRunner(session, prefill_group=1, decode_group=0, states={"k_out": "k_in", "v_out": "v_in"})
+    for token in runner.generate(prompt_ids, max_new_tokens=128, sampler=Sampler(top_p=0.8)):
+        print(tokenizer.decode([token]), end="", flush=True)
+"""
+
+import time
+from typing import Callable, Iterator, Sequence
+
+import numpy as np
+
+from ._session import InferenceSession
+
+__all__ = ["Sampler", "LLMRunner", "GenerationStats"]
+
+# candidates looked at first by a top-p only sampler
+_NUCLEUS_PROBE = 256
+
+
+class Sampler:
+    """
+    Samples one token id from a ``(vocab,)`` logits vector.
+
+    ``temperature=0`` or ``top_k=1`` is greedy. Otherwise the ``top_k`` largest logits (all when 0) are
+    selected with ``argpartition``, the softmax and the ``top_p`` nucleus cut only run on those.
+    """
+
+    def __init__(self, temperature: float = 1.0, top_k: int = 0, top_p: float = 1.0, seed: int | None = None):
+        if temperature < 0:
+            raise ValueError(f"Invalid temperature {temperature}, must not be negative.")
+        if not 0.0 < top_p <= 1.0:
+            raise ValueError(f"Invalid top_p {top_p}, must be in (0, 1].")
+        self.temperature = temperature
+        self.top_k = top_k
+        self.top_p = top_p
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def greedy(self) -> bool:
+        return self.temperature == 0 or self.top_k == 1
+
+    def __call__(self, logits: np.ndarray) -> int:
+        logits = logits.reshape(-1)
+        if self.greedy:
+            return int(np.argmax(logits))
+        total = None
+        if 0 < self.top_k < logits.size:
+            candidates = np.argpartition(logits, logits.size - self.top_k)[-self.top_k:]
+        elif self.top_p < 1.0 and logits.size > _NUCLEUS_PROBE:
+            # the nucleus is the largest logits up to a mass of top_p, usually within the largest few hundred,
+            # so only a growing probe of the largest logits is sorted
+            scaled = logits.astype(np.float32) / self.temperature
+            weights = np.exp(scaled - scaled.max())
+            total = weights.sum()
+            probe = _NUCLEUS_PROBE
+            while True:
+                candidates = np.argpartition(weights, logits.size - probe)[-probe:]
+                if probe * 8 >= logits.size or weights[candidates].sum() >= self.top_p * total:
+                    break
+                probe *= 8
+            if weights[candidates].sum() < self.top_p * total:
+                candidates, total = np.arange(logits.size), None
+        else:
+            candidates = np.arange(logits.size)
+        scores = logits[candidates].astype(np.float32) / self.temperature
+        order = np.argsort(-scores, kind="stable")
+        candidates, scores = candidates[order], scores[order]
+        if total is None:
+            probs = np.exp(scores - scores[0])
+            probs /= probs.sum()
+        else:
+            # normalized over the whole vocabulary, only a probe was sorted
+            probs = weights[candidates] / total
+        if self.top_p < 1.0:
+            # keep the smallest prefix whose mass reaches top_p, the first token always stays
+            keep = int(np.searchsorted(np.cumsum(probs), self.top_p)) + 1
+            candidates, probs = candidates[:keep], probs[:keep]
+        probs /= probs.sum()
+        return int(candidates[self._rng.choice(len(probs), p=probs)])
+
+
+class GenerationStats:
+    """Timings of the last :meth:`LLMRunner.generate` call, in milliseconds."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.generated_tokens = 0
+        self.prefill_ms = 0.0
+        self.decode_ms = 0.0
+        # time spent in session.run() while decoding, the rest is python overhead
+        self.decode_run_ms = 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.generated_tokens / self.decode_ms * 1000 if self.decode_ms else 0.0
+
+    @property
+    def overhead_per_token_ms(self) -> float:
+        if not self.generated_tokens:
+            return 0.0
+        return (self.decode_ms - self.decode_run_ms) / self.generated_tokens
+
+    def __repr__(self):
+        return (f"GenerationStats(prompt_tokens={self.prompt_tokens}, generated_tokens={self.generated_tokens}, "
+                f"prefill_ms={self.prefill_ms:.3f}, tokens_per_second={self.tokens_per_second:.1f}, "
+                f"overhead_per_token_ms={self.overhead_per_token_ms:.3f})")
+
+
+class LLMRunner:
+    """
+    Drives a decoder model exported with a prefill and a decode shape group.
+
+    Both groups take the tokens through ``token_input`` with shape ``(1, seq_len)``, integer token ids, or
+    ``(1, seq_len, hidden)`` when ``embed`` maps ids to embeddings, and optionally their absolute positions
+    through ``position_input``. ``logits_output`` has shape ``(1, seq_len, vocab)`` or ``(1, vocab)``.
+    ``states`` maps every KV cache output to the input it feeds on the next run, those are bound with
+    :meth:`axengine.InferenceSession.bind_state` and never leave the device. Feed arrays are allocated once
+    per group and reused, so the per token python work is a few small writes and one sampling call.
+    """
+
+    def __init__(
+            self,
+            session: InferenceSession,
+            prefill_group: int,
+            decode_group: int,
+            token_input: str = "input_ids",
+            logits_output: str = "logits",
+            position_input: str | None = None,
+            states: dict[str, str] | None = None,
+            embed: Callable[[np.ndarray], np.ndarray] | None = None,
+    ):
+        self.session = session
+        self.prefill_group = prefill_group
+        self.decode_group = decode_group
+        self.token_input = token_input
+        self.logits_output = logits_output
+        self.position_input = position_input
+        self.embed = embed
+        self.states = dict(states or {})
+        for output_name, input_name in self.states.items():
+            session.bind_state(output_name, input_name)
+
+        self._feeds = {}
+        self._seq_len = {}
+        self._logits_ndim = {}
+        for group in (prefill_group, decode_group):
+            feed = {}
+            for node in session.get_inputs(group):
+                if node.name == token_input or node.name == position_input:
+                    feed[node.name] = np.zeros(node.shape, dtype=node.dtype)
+            if token_input not in feed:
+                raise ValueError(f"Input '{token_input}' is not in model inputs of shape group {group}.")
+            if position_input is not None and position_input not in feed:
+                raise ValueError(f"Input '{position_input}' is not in model inputs of shape group {group}.")
+            logits = next((o for o in session.get_outputs(group) if o.name == logits_output), None)
+            if logits is None:
+                raise ValueError(f"Output '{logits_output}' is not in model outputs of shape group {group}.")
+            self._logits_ndim[group] = len(logits.shape)
+            self._feeds[group] = feed
+            self._seq_len[group] = feed[token_input].shape[1]
+        if self._seq_len[decode_group] != 1:
+            print(f"[WARNING] Decode group {decode_group} has sequence length {self._seq_len[decode_group]}, "
+                  f"only the first position is used.")
+        self.stats = GenerationStats()
+        self._last_run_ms = 0.0
+
+    def reset(self):
+        """Clears the KV caches, the next call starts a new conversation."""
+        if self.states:
+            self.session.reset_state()
+
+    def _run(self, group: int, tokens: np.ndarray, start: int, logits: bool = True) -> np.ndarray | None:
+        feed = self._feeds[group]
+        ids = feed[self.token_input]
+        n = len(tokens)
+        ids[0, :n] = tokens if self.embed is None else self.embed(tokens)
+        ids[0, n:] = 0
+        if self.position_input is not None:
+            positions = feed[self.position_input]
+            positions[0, :n] = np.arange(start, start + n)
+            positions[0, n:] = 0
+        t0 = time.perf_counter()
+        if not logits:
+            # a prefill chunk before the last one only fills the KV caches
+            self.session.run([], feed, shape_group=group)
+            self._last_run_ms = (time.perf_counter() - t0) * 1000
+            return None
+        # only the last real token is sampled from, the rest of the logits never leave the io buffer
+        key = (0, n - 1) if self._logits_ndim[group] == 3 else 0
+        logits = self.session.run_slice(self.logits_output, key, feed, shape_group=group)
+        self._last_run_ms = (time.perf_counter() - t0) * 1000
+        return logits
+
+    def prefill(self, prompt: Sequence[int], start: int = 0) -> np.ndarray:
+        """Runs the prompt in chunks of the prefill length, returns the logits of its last token."""
+        prompt = np.asarray(prompt, dtype=np.int64)
+        if prompt.size == 0:
+            raise ValueError("Prompt must not be empty.")
+        chunk = self._seq_len[self.prefill_group]
+        logits = None
+        for offset in range(0, len(prompt), chunk):
+            last = offset + chunk >= len(prompt)
+            logits = self._run(self.prefill_group, prompt[offset:offset + chunk], start + offset, last)
+        return logits
+
+    def generate(
+            self,
+            prompt: Sequence[int],
+            max_new_tokens: int = 128,
+            sampler: Sampler | None = None,
+            stop_tokens: Sequence[int] = (),
+            start: int = 0,
+    ) -> Iterator[int]:
+        """Yields generated token ids one by one, stops after ``max_new_tokens`` or at a stop token."""
+        sampler = sampler if sampler is not None else Sampler(temperature=0)
+        stop_tokens = set(stop_tokens)
+        stats = self.stats = GenerationStats()
+        stats.prompt_tokens = len(prompt)
+
+        t0 = time.perf_counter()
+        logits = self.prefill(prompt, start)
+        stats.prefill_ms = (time.perf_counter() - t0) * 1000
+
+        position = start + len(prompt)
+        token_buffer = np.empty((1,), dtype=np.int64)
+        for _ in range(max_new_tokens):
+            # time spent by the consumer between two tokens is not counted
+            t0 = time.perf_counter()
+            token = sampler(logits)
+            stats.generated_tokens += 1
+            stats.decode_ms += (time.perf_counter() - t0) * 1000
+            yield token
+            if token in stop_tokens or stats.generated_tokens == max_new_tokens:
+                break
+            t0 = time.perf_counter()
+            token_buffer[0] = token
+            logits = self._run(self.decode_group, token_buffer, position)
+            position += 1
+            stats.decode_ms += (time.perf_counter() - t0) * 1000
+            stats.decode_run_ms += self._last_run_ms
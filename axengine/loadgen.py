@@ -0,0 +1,298 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+"""
+Open-loop load generator::
+
+    python -m axengine.loadgen --model m.axmodel --qps 100 --duration 10
+    python -m axengine.loadgen --model m.axmodel --sweep --slo-p99-ms 30
+
+Requests arrive at a target rate whether or not earlier ones have returned, as they would from
+independent clients, so the reported latency includes the time spent queueing behind a busy NPU, which
+a ``for i in range(repeat)`` loop never sees.
+"""
+
+import argparse
+import asyncio
+import inspect
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+
+from ._providers import axclrt_provider_name, axengine_provider_name
+from ._session import InferenceSession
+
+__all__ = ["LoadGenerator", "LoadResult"]
+
+_PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _summary(values_ms: np.ndarray) -> dict[str, float]:
+    if not len(values_ms):
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "p99.9": 0.0, "max": 0.0, "mean": 0.0}
+    p50, p90, p99, p999 = np.percentile(values_ms, _PERCENTILES).tolist()
+    return {"p50": p50, "p90": p90, "p99": p99, "p99.9": p999, "max": float(values_ms.max()),
+            "mean": float(values_ms.mean())}
+
+
+class LoadResult:
+    """
+    One load level. ``offered_qps`` is the rate the requests were actually sent at (poisson arrivals vary
+    around the target), ``achieved_qps`` the completions over the time until the last one returned, which
+    falls behind once the target saturates. ``latency_ms`` is measured from the scheduled arrival to
+    completion, ``queue_wait_ms`` from the scheduled arrival to the start of the call, both as percentiles
+    of the successful requests.
+    """
+
+    def __init__(self, target_qps: float, arrival: str, duration: float, sent: int, errors: int,
+                 latencies: np.ndarray, waits: np.ndarray, elapsed: float):
+        self.target_qps = target_qps
+        self.arrival = arrival
+        self.duration = duration
+        self.sent = sent
+        self.errors = errors
+        self.completed = len(latencies)
+        self.offered_qps = sent / duration if duration > 0 else 0.0
+        self.achieved_qps = self.completed / max(elapsed, duration) if duration > 0 else 0.0
+        self.latency_ms = _summary(latencies * 1000)
+        self.queue_wait_ms = _summary(waits * 1000)
+
+    def meets(self, slo_p99_ms: float) -> bool:
+        """True when the p99 latency is within ``slo_p99_ms``, there were no errors and the rate was held."""
+        return (self.errors == 0 and self.latency_ms["p99"] <= slo_p99_ms
+                and self.achieved_qps >= 0.95 * self.offered_qps)
+
+    def as_dict(self) -> dict:
+        return {
+            "target_qps": self.target_qps,
+            "arrival": self.arrival,
+            "duration": self.duration,
+            "sent": self.sent,
+            "offered_qps": self.offered_qps,
+            "completed": self.completed,
+            "errors": self.errors,
+            "achieved_qps": self.achieved_qps,
+            "latency_ms": dict(self.latency_ms),
+            "queue_wait_ms": dict(self.queue_wait_ms),
+        }
+
+    def __repr__(self):
+        return (f"LoadResult(target_qps={self.target_qps:.1f}, offered_qps={self.offered_qps:.1f}, "
+                f"achieved_qps={self.achieved_qps:.1f}, completed={self.completed}, errors={self.errors}, "
+                f"p50={self.latency_ms['p50']:.3f} ms, "
+                f"p99={self.latency_ms['p99']:.3f} ms, wait_p99={self.queue_wait_ms['p99']:.3f} ms)")
+
+
+class LoadGenerator:
+    """
+    Drives ``target`` with open-loop arrivals.
+
+    ``target`` is an :class:`axengine.InferenceSession` (or anything with its ``run``), a plain callable or
+    an async callable, e.g. :meth:`axengine.serve.InferenceServer.infer`; callables are called with
+    ``feed``, or without arguments when ``feed`` is None. For sessions ``feed`` defaults to zeros.
+
+    Synchronous targets are called on ``workers`` threads. A session runs one request at a time, so with
+    the default of one worker requests queue in front of the worker and ``queue_wait_ms`` is the full
+    time spent waiting for the NPU; with more workers (e.g. for :meth:`axengine.InferenceSession.clone`
+    pools behind a callable) the wait inside the target counts as latency only.
+    """
+
+    def __init__(self, target: Any, feed: dict[str, np.ndarray] | None = None, workers: int = 1):
+        self.target = target
+        self.workers = workers
+        if hasattr(target, "run") and not callable(target):
+            if feed is None:
+                feed = {i.name: np.zeros(i.shape, dtype=i.dtype) for i in target.get_inputs()}
+            self._call = lambda: target.run(None, feed)
+            self._is_async = False
+        elif callable(target):
+            self._call = (lambda: target(feed)) if feed is not None else target
+            self._is_async = inspect.iscoroutinefunction(target) or inspect.iscoroutinefunction(
+                getattr(target, "__call__", None))
+        else:
+            raise TypeError(f"Unable to drive load on '{type(target)}', expected a session or a callable.")
+
+    @staticmethod
+    def _arrivals(qps: float, duration: float, arrival: str, rng: np.random.Generator) -> np.ndarray:
+        if qps <= 0:
+            raise ValueError(f"Target qps must be positive, however gets {qps}.")
+        if arrival == "constant":
+            return np.arange(0.0, duration, 1.0 / qps)
+        if arrival == "poisson":
+            # exponential gaps, drawn with some headroom and cut at the duration
+            count = int(qps * duration * 1.2) + 16
+            times = np.cumsum(rng.exponential(1.0 / qps, count))
+            while times[-1] < duration:
+                times = np.concatenate([times, times[-1] + np.cumsum(rng.exponential(1.0 / qps, count))])
+            return times[times < duration]
+        raise ValueError(f"Unknown arrival process '{arrival}', expected 'poisson' or 'constant'.")
+
+    async def _drive(self, arrivals: np.ndarray, executor: ThreadPoolExecutor | None):
+        loop = asyncio.get_running_loop()
+        latencies, waits = [], []
+        errors = 0
+
+        def timed():
+            start = time.perf_counter()
+            self._call()
+            return start
+
+        async def one(scheduled: float):
+            nonlocal errors
+            try:
+                if self._is_async:
+                    start = time.perf_counter()
+                    await self._call()
+                else:
+                    start = await loop.run_in_executor(executor, timed)
+            except Exception:
+                errors += 1
+                return
+            end = time.perf_counter()
+            latencies.append(end - scheduled)
+            waits.append(start - scheduled)
+
+        tasks = []
+        t0 = time.perf_counter()
+        for offset in arrivals:
+            scheduled = t0 + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # a late dispatcher does not hold arrivals back, the lag shows up as queue wait
+            tasks.append(asyncio.ensure_future(one(scheduled)))
+        await asyncio.gather(*tasks)
+        return np.array(latencies), np.array(waits), errors, time.perf_counter() - t0
+
+    async def run_async(self, qps: float, duration: float = 10.0, arrival: str = "poisson", seed: int | None = None,
+                        warmup: int = 3) -> LoadResult:
+        """:meth:`run` from inside a running event loop, e.g. next to an in-process server."""
+        arrivals = self._arrivals(qps, duration, arrival, np.random.default_rng(seed))
+        executor = None if self._is_async else ThreadPoolExecutor(self.workers, thread_name_prefix="axengine-loadgen")
+        try:
+            for _ in range(warmup):
+                if self._is_async:
+                    await self._call()
+                else:
+                    await asyncio.get_running_loop().run_in_executor(executor, self._call)
+            latencies, waits, errors, elapsed = await self._drive(arrivals, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        return LoadResult(qps, arrival, duration, len(arrivals), errors, latencies, waits, elapsed)
+
+    def run(self, qps: float, duration: float = 10.0, arrival: str = "poisson", seed: int | None = None,
+            warmup: int = 3) -> LoadResult:
+        """
+        Send requests at ``qps`` for ``duration`` seconds, with ``"poisson"`` (exponential gaps) or
+        ``"constant"`` arrivals, after ``warmup`` calls that are not measured. Waits for every request sent.
+        """
+        return asyncio.run(self.run_async(qps, duration, arrival, seed, warmup))
+
+    def sweep(
+            self,
+            slo_p99_ms: float,
+            start_qps: float = 10.0,
+            factor: float = 1.25,
+            max_qps: float | None = None,
+            duration: float = 10.0,
+            arrival: str = "poisson",
+            seed: int | None = None,
+            callback: Callable[[LoadResult], None] | None = None,
+    ) -> list[LoadResult]:
+        """
+        Raise the rate by ``factor`` from ``start_qps`` until the p99 latency breaks ``slo_p99_ms`` (see
+        :meth:`LoadResult.meets`) or ``max_qps`` is passed. Returns every level run, the breaking one last;
+        ``callback`` sees each result as it is done.
+        """
+        if factor <= 1:
+            raise ValueError(f"Sweep factor must be larger than 1, however gets {factor}.")
+        results = []
+        qps = start_qps
+        while max_qps is None or qps <= max_qps:
+            result = self.run(qps, duration, arrival, seed, warmup=3 if not results else 0)
+            results.append(result)
+            if callback is not None:
+                callback(result)
+            if not result.meets(slo_p99_ms):
+                break
+            qps *= factor
+        return results
+
+
+def _print_header():
+    print(f"  {'target':>8} {'offered':>8} {'achieved':>9} {'errors':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'p99.9 ms':>9} {'max ms':>9} {'wait p99':>9}")
+
+
+def _print_result(result: LoadResult):
+    lat, wait = result.latency_ms, result.queue_wait_ms
+    print(f"  {result.target_qps:>8.1f} {result.offered_qps:>8.1f} {result.achieved_qps:>9.1f} {result.errors:>7d} "
+          f"{lat['p50']:>9.3f} {lat['p90']:>9.3f} {lat['p99']:>9.3f} {lat['p99.9']:>9.3f} {lat['max']:>9.3f} "
+          f"{wait['p99']:>9.3f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m axengine.loadgen", description="axengine open-loop load generator")
+    ap.add_argument('-m', '--model', type=str, help='model path', required=True)
+    ap.add_argument('--qps', type=float, help='target requests per second, the start rate with --sweep', default=10.0)
+    ap.add_argument('--duration', type=float, help='seconds per load level', default=10.0)
+    ap.add_argument('--arrival', type=str, choices=["poisson", "constant"], help='arrival process', default="poisson")
+    ap.add_argument('--sweep', action='store_true', help='raise the rate until the p99 SLO breaks')
+    ap.add_argument('--slo-p99-ms', type=float, help='p99 latency objective for --sweep', default=50.0)
+    ap.add_argument('--factor', type=float, help='rate step of --sweep', default=1.25)
+    ap.add_argument('--max-qps', type=float, help='stop --sweep above this rate', default=None)
+    ap.add_argument('--seed', type=int, help='seed of the poisson arrivals', default=None)
+    ap.add_argument(
+        '-p',
+        '--provider',
+        type=str,
+        choices=["AUTO", f"{axclrt_provider_name}", f"{axengine_provider_name}"],
+        help=f'"AUTO", "{axclrt_provider_name}", "{axengine_provider_name}"',
+        default='AUTO'
+    )
+    ap.add_argument(
+        '-d',
+        '--device-id',
+        type=int,
+        help=R'axclrt device index, depends on how many cards inserted',
+        default=0
+    )
+    args = ap.parse_args(argv)
+
+    if args.provider == 'AUTO':
+        session = InferenceSession(args.model)
+    elif args.provider == axclrt_provider_name:
+        session = InferenceSession(args.model, providers=[(axclrt_provider_name, {"device_id": args.device_id})])
+    else:
+        session = InferenceSession(args.model, providers=[axengine_provider_name])
+
+    generator = LoadGenerator(session)
+    print("  ------------------------------------------------------")
+    print(f"  {args.arrival} arrivals, {args.duration:.1f} s per level")
+    _print_header()
+    if args.sweep:
+        results = generator.sweep(args.slo_p99_ms, args.qps, args.factor, args.max_qps, args.duration,
+                                  args.arrival, args.seed, callback=_print_result)
+        passing = [r for r in results if r.meets(args.slo_p99_ms)]
+        print("  ------------------------------------------------------")
+        if passing:
+            print(f"  max rate within p99 {args.slo_p99_ms:.1f} ms: {passing[-1].achieved_qps:.1f} qps")
+        else:
+            print(f"  p99 {args.slo_p99_ms:.1f} ms is not met at {args.qps:.1f} qps")
+    else:
+        _print_result(generator.run(args.qps, args.duration, args.arrival, args.seed))
+        print("  ------------------------------------------------------")
+    session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+"""
+Multi-process serving over a shared memory ring.
+
+One owner process holds the :class:`axengine.InferenceSession` and runs a :class:`SharedMemoryServer`.
+Any number of worker processes get a :class:`SharedMemoryClient` (pass it as a ``Process`` argument) and
+write their input tensors straight into a slot of the ring. The owner copies the slot into CMM or device
+memory, runs the model and writes the outputs back into the same slot. Tensors are never pickled and no
+memory is allocated per request, only one copy of the model and its io buffers exists::
+
+    def worker(client):
+        with client.request() as req:
+            preprocess(frame, out=req.inputs["images"])
+            outputs = req.submit()   # views into the ring, valid until the block exits
+
+    with SharedMemoryServer(session, slots=8) as server:
+        procs = [mp.Process(target=worker, args=(server.client(),)) for _ in range(4)]
+        ...
+"""
+
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ._session import InferenceSession
+
+__all__ = ["SharedMemoryServer", "SharedMemoryClient"]
+
+_ALIGN = 64
+_HEADER = np.dtype([("status", "<i4"), ("group", "<i4"), ("message", "S248")])
+
+_PENDING, _OK, _ERROR, _SKIP = 0, 1, 2, 3
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class _Layout:
+    """Offsets of every tensor inside a slot, per shape group, slots are sized for the largest group."""
+
+    def __init__(self, session: InferenceSession, shape_count: int):
+        self.inputs = []
+        self.outputs = []
+        self.offsets = []
+        slot_size = 0
+        for group in range(shape_count):
+            # dtype objects, not typestr strings: bfloat16 would come back from '<V2' as raw void
+            ins = [(i.name, np.dtype(i.dtype), tuple(i.shape)) for i in session.get_inputs(group)]
+            outs = [(o.name, np.dtype(o.dtype), tuple(o.shape)) for o in session.get_outputs(group)]
+            offset = _align(_HEADER.itemsize)
+            group_offsets = ([], [])
+            for nodes, offsets in zip((ins, outs), group_offsets):
+                for _, dtype, shape in nodes:
+                    offsets.append(offset)
+                    offset += _align(dtype.itemsize * int(np.prod(shape)))
+            self.inputs.append(ins)
+            self.outputs.append(outs)
+            self.offsets.append(group_offsets)
+            slot_size = max(slot_size, offset)
+        self.slot_size = _align(slot_size)
+
+
+class _Ring:
+    """Per process numpy views of the shared memory, created once and reused."""
+
+    def __init__(self, name: str, layout: _Layout, slots: int, create: bool = False):
+        self.layout = layout
+        self.slots = slots
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=slots * layout.slot_size)
+        self.header = np.ndarray((slots,), dtype=_HEADER, buffer=self.shm.buf, strides=(layout.slot_size,))
+        self._views = {}
+
+    def views(self, slot: int, group: int) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+        key = (slot, group)
+        views = self._views.get(key)
+        if views is None:
+            base = slot * self.layout.slot_size
+            views = tuple(
+                {
+                    name: np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=base + offset)
+                    for (name, dtype, shape), offset in zip(nodes, offsets)
+                }
+                for nodes, offsets in zip((self.layout.inputs[group], self.layout.outputs[group]),
+                                          self.layout.offsets[group])
+            )
+            self._views[key] = views
+        return views
+
+    def close(self, unlink: bool = False):
+        # views export the shared buffer, they must be gone before it can be closed
+        self._views.clear()
+        self.header = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class SharedMemoryRequest:
+    """One claimed slot, returned by :meth:`SharedMemoryClient.request`."""
+
+    def __init__(self, client: "SharedMemoryClient", slot: int, shape_group: int):
+        self._client = client
+        self.slot = slot
+        self.shape_group = shape_group
+        # input tensors of the slot, write them in place
+        self.inputs, self._outputs = client._ring.views(slot, shape_group)
+        self._submitted = False
+
+    def submit(self) -> dict[str, np.ndarray]:
+        """
+        Hands the slot to the owner process and waits for the result. The returned output views point
+        into the ring and stay valid until the request is released.
+        """
+        if self._submitted:
+            raise RuntimeError("Request was already submitted.")
+        self._client._submit(self.slot, self.shape_group, _PENDING)
+        self._submitted = True
+        header = self._client._ring.header
+        if header["status"][self.slot] == _ERROR:
+            message = header["message"][self.slot].decode("utf-8", "replace")
+            raise RuntimeError(f"Inference in the owner process failed: {message}")
+        return self._outputs
+
+    def release(self):
+        if not self._submitted:
+            # the owner consumes slots in order, an unused slot is still handed over so it can move on
+            self._client._submit(self.slot, self.shape_group, _SKIP)
+            self._submitted = True
+        self._client._free[self.slot].release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class SharedMemoryClient:
+    """
+    Worker side handle of a :class:`SharedMemoryServer`. It is picklable while a process is being started,
+    so pass it as an argument of ``multiprocessing.Process``. The shared memory is attached on first use.
+    """
+
+    def __init__(self, name, layout, slots, head, free, ready, done):
+        self._name = name
+        self._layout = layout
+        self._slots = slots
+        self._head = head
+        self._free = free
+        self._ready = ready
+        self._done = done
+        self._ring = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_ring"] = None
+        return state
+
+    def _attach(self):
+        if self._ring is None:
+            self._ring = _Ring(self._name, self._layout, self._slots)
+
+    def _submit(self, slot: int, group: int, status: int):
+        header = self._ring.header
+        header["group"][slot] = group
+        header["status"][slot] = status
+        self._ready[slot].release()
+        self._done[slot].acquire()
+
+    def get_inputs(self, shape_group: int = 0) -> list[tuple[str, np.dtype, tuple[int, ...]]]:
+        """``(name, dtype, shape)`` of every model input."""
+        return list(self._layout.inputs[shape_group])
+
+    def get_outputs(self, shape_group: int = 0) -> list[tuple[str, np.dtype, tuple[int, ...]]]:
+        """``(name, dtype, shape)`` of every model output."""
+        return list(self._layout.outputs[shape_group])
+
+    def request(self, shape_group: int = 0) -> SharedMemoryRequest:
+        """Claims the next slot of the ring, blocks while it is still in use by an earlier request."""
+        if shape_group < 0 or shape_group >= len(self._layout.inputs):
+            raise ValueError(f"Invalid shape group: {shape_group}")
+        self._attach()
+        with self._head.get_lock():
+            seq = self._head.value
+            self._head.value = seq + 1
+        slot = seq % self._slots
+        self._free[slot].acquire()
+        return SharedMemoryRequest(self, slot, shape_group)
+
+    def run(
+            self,
+            input_feed: dict[str, np.ndarray],
+            shape_group: int = 0,
+            out: list[np.ndarray] | None = None
+    ) -> list[np.ndarray]:
+        """
+        Same as :meth:`axengine.InferenceSession.run` with all outputs. Outputs are copied out of the
+        ring, into ``out`` when given.
+        """
+        missing = [name for name, _, _ in self._layout.inputs[shape_group] if name not in input_feed]
+        if missing:
+            raise ValueError(f"Required inputs ({missing}) are missing from input feed.")
+        with self.request(shape_group) as req:
+            for name, npy in input_feed.items():
+                if name not in req.inputs:
+                    raise ValueError(f"Input name '{name}' is not in model inputs name list.")
+                dst = req.inputs[name]
+                if dst.shape != npy.shape or dst.dtype != npy.dtype:
+                    raise ValueError(f"model inputs({name}) expect shape {dst.shape} and dtype {dst.dtype}, "
+                                     f"however gets input with shape {npy.shape} and dtype {npy.dtype}")
+                dst[...] = npy
+            outputs = req.submit()
+            if out is None:
+                return [o.copy() for o in outputs.values()]
+            for dst, src in zip(out, outputs.values()):
+                dst[...] = src
+            return out
+
+    def close(self):
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+
+class SharedMemoryServer:
+    """
+    Owner side of the ring, runs requests of all clients on one session in a background thread.
+
+    Slots are handed out in order by a shared counter and every slot has its own free, ready and done
+    semaphore, so clients only wait for the slot they claimed and the owner only wakes up for work.
+    Outputs are copied from the io buffers into the slot as the model produces them, see
+    :meth:`axengine.InferenceSession.run_views`, output dequantization does not apply.
+    ``context`` is the multiprocessing context the clients are started with.
+    """
+
+    def __init__(self, session: InferenceSession, slots: int = 8, context=None):
+        if slots < 1:
+            raise ValueError(f"Invalid slot count: {slots}")
+        ctx = context if context is not None else multiprocessing.get_context()
+        self.session = session
+        self.slots = slots
+        shape_count = 1
+        while True:
+            try:
+                session.get_inputs(shape_count)[0]
+            except (ValueError, IndexError):
+                break
+            shape_count += 1
+        self._layout = _Layout(session, shape_count)
+        self._ring = _Ring(None, self._layout, slots, create=True)
+        self._head = ctx.Value("q", 0)
+        self._free = [ctx.Semaphore(1) for _ in range(slots)]
+        self._ready = [ctx.Semaphore(0) for _ in range(slots)]
+        self._done = [ctx.Semaphore(0) for _ in range(slots)]
+        self._tail = 0
+        self._thread = None
+        self._stopping = threading.Event()
+        self._stats = {"requests": 0, "errors": 0, "skipped": 0, "busy_time": 0.0}
+        print(f"[INFO] Shared memory ring '{self._ring.shm.name}': {slots} slots x {self._layout.slot_size} bytes")
+
+    @property
+    def name(self) -> str:
+        return self._ring.shm.name
+
+    def client(self) -> SharedMemoryClient:
+        return SharedMemoryClient(self.name, self._layout, self.slots, self._head, self._free, self._ready, self._done)
+
+    def _serve_one(self, slot: int):
+        header = self._ring.header
+        status = header["status"][slot]
+        if status == _SKIP:
+            self._stats["skipped"] += 1
+            return
+        group = int(header["group"][slot])
+        start = time.perf_counter()
+        try:
+            inputs, outputs = self._ring.views(slot, group)
+            # the outputs go from the io buffers straight into the slot, no host arrays in between
+            for view in self.session.run_views(None, inputs, shape_group=group):
+                outputs[view.name][...] = view.numpy()
+            header["status"][slot] = _OK
+        except Exception as e:
+            header["message"][slot] = str(e).encode("utf-8")[:_HEADER["message"].itemsize]
+            header["status"][slot] = _ERROR
+            self._stats["errors"] += 1
+        self._stats["requests"] += 1
+        self._stats["busy_time"] += time.perf_counter() - start
+
+    def serve_forever(self, poll_interval: float = 0.1):
+        """Serves requests in the calling thread until :meth:`stop` is called."""
+        while not self._stopping.is_set():
+            slot = self._tail % self.slots
+            if not self._ready[slot].acquire(timeout=poll_interval):
+                continue
+            self._tail += 1
+            try:
+                self._serve_one(slot)
+            finally:
+                self._done[slot].release()
+
+    def start(self) -> "SharedMemoryServer":
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self.serve_forever, name="axengine-mp", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return dict(self._stats)
+
+    def close(self):
+        """Stops serving and removes the shared memory, clients must not be used afterwards."""
+        self.stop()
+        if self._ring is not None:
+            self._ring.close(unlink=True)
+            self._ring = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
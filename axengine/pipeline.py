@@ -0,0 +1,300 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+import numpy as np
+
+from ._session import InferenceSession
+
+__all__ = ["Stage", "InferStage", "StageStats", "Pipeline"]
+
+# how often blocked workers wake up to check if the pipeline is shutting down
+_POLL_INTERVAL = 0.1
+
+
+class _Stop:
+    pass
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.max_latency = 0.0
+        self._first_start = None
+        self._last_end = None
+        self._lock = threading.Lock()
+
+    def _record(self, start: float, end: float, failed: bool):
+        with self._lock:
+            self.count += 1
+            self.errors += int(failed)
+            self.busy_time += end - start
+            self.max_latency = max(self.max_latency, end - start)
+            if self._first_start is None:
+                self._first_start = start
+            self._last_end = end
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean seconds spent in the stage function per item."""
+        return self.busy_time / self.count if self.count else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Items per second, measured from the first item entering to the last item leaving the stage."""
+        if not self.count or self._last_end == self._first_start:
+            return 0.0
+        return self.count / (self._last_end - self._first_start)
+
+    def __repr__(self):
+        return (f"StageStats(name={self.name!r}, count={self.count}, errors={self.errors}, "
+                f"mean_latency={self.mean_latency * 1000:.3f} ms, max_latency={self.max_latency * 1000:.3f} ms, "
+                f"throughput={self.throughput:.1f}/s)")
+
+
+class Stage:
+    """
+    One step of a :class:`Pipeline`, ``fn`` is called with the output of the previous stage.
+
+    ``workers`` threads run the stage concurrently; with ``use_process=True`` every call is
+    executed in a process pool of the same size instead, so GIL-bound work scales across cores.
+    In that case ``fn`` and the items passed to it must be picklable.
+    """
+
+    def __init__(self, fn: Callable[[Any], Any], name: str | None = None, workers: int = 1, use_process: bool = False):
+        if workers < 1:
+            raise ValueError(f"Stage workers must be at least 1, got {workers}.")
+        self.fn = fn
+        self.name = name if name is not None else getattr(fn, "__name__", type(fn).__name__)
+        self.workers = workers
+        self.use_process = use_process
+
+    def __call__(self, item):
+        return self.fn(item)
+
+
+class InferStage(Stage):
+    """
+    Runs items through an :class:`axengine.InferenceSession`.
+
+    An item is either the input feed dict, a single array for single input models, or a tuple whose first
+    element is one of those; the remaining tuple elements are passed through, the stage then outputs
+    ``(outputs, *rest)``. This lets per-frame context such as the original image shape travel with the frame.
+    """
+
+    def __init__(
+            self,
+            session: InferenceSession,
+            output_names: list[str] | None = None,
+            shape_group: int = 0,
+            name: str = "infer",
+    ):
+        # one session owns one set of io buffers, so runs on it are always serialized
+        super().__init__(self._infer, name=name, workers=1)
+        self.session = session
+        self.output_names = output_names
+        self.shape_group = shape_group
+        self._input_name = session.get_inputs(shape_group)[0].name
+
+    def _infer(self, item):
+        rest = None
+        if isinstance(item, tuple):
+            item, rest = item[0], item[1:]
+        feed = item if isinstance(item, dict) else {self._input_name: item}
+        outputs = self.session.run(self.output_names, feed, shape_group=self.shape_group)
+        return outputs if rest is None else (outputs, *rest)
+
+
+class Pipeline:
+    """
+    Runs stages concurrently, connected by bounded queues.
+
+    A full queue blocks the stage in front of it, so a slow stage throttles the whole pipeline instead of
+    growing memory (back-pressure). With ``drop_frames=True`` the source is never blocked: items arriving
+    while the first queue is full are dropped and counted in :attr:`dropped`. Results are always delivered
+    in source order, even when a stage has several workers.
+
+    Example::
+
+        pipe = Pipeline([Stage(preprocess, workers=2), session, Stage(postprocess, workers=2)])
+        for result in pipe.run(frames):
+            ...
+        print(pipe.stats())
+    """
+
+    def __init__(
+            self,
+            stages: Sequence[Stage | InferenceSession | Callable[[Any], Any]],
+            queue_size: int = 4,
+            drop_frames: bool = False,
+    ):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage.")
+        if queue_size < 1:
+            raise ValueError(f"Pipeline queue size must be at least 1, got {queue_size}.")
+        self._stages = []
+        for s in stages:
+            if isinstance(s, InferenceSession):
+                s = InferStage(s)
+            elif not isinstance(s, Stage):
+                s = Stage(s)
+            self._stages.append(s)
+        self._queue_size = queue_size
+        self._drop_frames = drop_frames
+        self._stats = {}
+        self._latencies = []
+        self.dropped = 0
+        self._stop = threading.Event()
+
+    def stats(self) -> dict[str, StageStats]:
+        """Per-stage counters of the current or last run, keyed by stage name."""
+        return dict(self._stats)
+
+    def latency_percentiles(self, percentiles: Sequence[float] = (50, 90, 99)) -> dict[float, float]:
+        """End-to-end seconds from an item entering the pipeline to its result being delivered."""
+        if not self._latencies:
+            return {p: 0.0 for p in percentiles}
+        values = np.percentile(np.array(self._latencies), percentiles)
+        return dict(zip(percentiles, values.tolist()))
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return None, _Stop
+
+    def _feed(self, source: Iterable, q: queue.Queue, start_times: dict, n_next: int):
+        seq = 0
+        try:
+            for item in source:
+                if self._stop.is_set():
+                    return
+                start_times[seq] = time.perf_counter()
+                if self._drop_frames:
+                    try:
+                        q.put_nowait((seq, item))
+                    except queue.Full:
+                        del start_times[seq]
+                        self.dropped += 1
+                        continue
+                elif not self._put(q, (seq, item)):
+                    return
+                seq += 1
+        except BaseException as e:
+            # surface errors of the source iterator at the position they happened
+            start_times[seq] = time.perf_counter()
+            self._put(q, (seq, _Failure(e)))
+        finally:
+            for _ in range(n_next):
+                self._put(q, (None, _Stop))
+
+    def _work(self, stage: Stage, stats: StageStats, executor, q_in: queue.Queue, q_out: queue.Queue,
+              remaining: list, lock: threading.Lock, n_next: int):
+        while True:
+            seq, item = self._get(q_in)
+            if item is _Stop or seq is None:
+                break
+            if not isinstance(item, _Failure):
+                start = time.perf_counter()
+                try:
+                    item = executor.submit(stage, item).result() if executor is not None else stage(item)
+                except BaseException as e:
+                    item = _Failure(e)
+                stats._record(start, time.perf_counter(), isinstance(item, _Failure))
+            if not self._put(q_out, (seq, item)):
+                return
+        # the last worker of this stage tells every worker of the next stage to stop
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            for _ in range(n_next):
+                self._put(q_out, (None, _Stop))
+
+    def run(self, source: Iterable) -> Iterator:
+        """Feeds ``source`` through the stages and yields the results in order."""
+        self._stop.clear()
+        self._stats = {}
+        self._latencies = []
+        self.dropped = 0
+
+        queues = [queue.Queue(maxsize=self._queue_size) for _ in range(len(self._stages) + 1)]
+        start_times = {}
+        threads = []
+        executors = []
+        for i, stage in enumerate(self._stages):
+            name = stage.name
+            if name in self._stats:
+                name = f"{name}_{i}"
+            stats = self._stats[name] = StageStats(name)
+            executor = None
+            if stage.use_process:
+                executor = ProcessPoolExecutor(max_workers=stage.workers)
+                executors.append(executor)
+            n_next = self._stages[i + 1].workers if i + 1 < len(self._stages) else 1
+            remaining, lock = [stage.workers], threading.Lock()
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(stage, stats, executor, queues[i], queues[i + 1], remaining, lock, n_next),
+                    name=f"axengine-pipeline-{name}",
+                    daemon=True,
+                ))
+        threads.append(threading.Thread(
+            target=self._feed,
+            args=(source, queues[0], start_times, self._stages[0].workers),
+            name="axengine-pipeline-source",
+            daemon=True,
+        ))
+        for t in threads:
+            t.start()
+
+        pending = {}
+        expected = 0
+        try:
+            while True:
+                seq, item = self._get(queues[-1])
+                if item is _Stop:
+                    break
+                pending[seq] = item
+                while expected in pending:
+                    item = pending.pop(expected)
+                    self._latencies.append(time.perf_counter() - start_times.pop(expected))
+                    expected += 1
+                    if isinstance(item, _Failure):
+                        raise item.exc
+                    yield item
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join()
+            for executor in executors:
+                executor.shutdown(cancel_futures=True)
@@ -0,0 +1,203 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import math
+from typing import Sequence
+
+import numpy as np
+
+__all__ = ["sigmoid", "box_iou", "nms", "batched_nms", "top_k", "YoloDecoder"]
+
+
+def sigmoid(x: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """Logistic function, computed in place when ``out`` is ``x``."""
+    out = np.negative(x, out=out)
+    np.exp(out, out=out)
+    np.add(out, 1.0, out=out)
+    return np.reciprocal(out, out=out)
+
+
+def _logit(p: float) -> float:
+    if p <= 0.0:
+        return -math.inf
+    if p >= 1.0:
+        return math.inf
+    return math.log(p / (1.0 - p))
+
+
+def box_iou(boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of two sets of ``(x1, y1, x2, y2)`` boxes, returns an ``(N, M)`` matrix."""
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    lt = np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    rb = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:])
+    wh = np.clip(rb - lt, 0.0, None)
+    inter = wh[..., 0] * wh[..., 1]
+    union = area1[:, None] + area2[None, :] - inter
+    return inter / np.maximum(union, np.finfo(np.float32).eps)
+
+
+def nms(
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        iou_threshold: float,
+        max_candidates: int | None = None,
+) -> np.ndarray:
+    """
+    Greedy non-maximum suppression.
+
+    Only the ``max_candidates`` highest scoring boxes are considered. The IoU of all candidate pairs is
+    computed in one shot, the greedy pass then only walks the boolean matrix. Returns the indices of the
+    kept boxes, highest score first.
+    """
+    if len(boxes) == 0:
+        return np.empty((0,), dtype=np.int64)
+    order = np.argsort(-scores, kind="stable")
+    if max_candidates is not None:
+        order = order[:max_candidates]
+    candidates = boxes[order]
+    suppress = np.triu(box_iou(candidates, candidates) > iou_threshold, k=1)
+
+    n = len(order)
+    keep = np.ones(n, dtype=bool)
+    for i in range(n):
+        if keep[i]:
+            keep &= ~suppress[i]
+    return order[keep]
+
+
+def batched_nms(
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        idxs: np.ndarray,
+        iou_threshold: float,
+        max_candidates: int | None = None,
+) -> np.ndarray:
+    """
+    Class-aware NMS, boxes only suppress boxes with the same ``idxs`` value.
+
+    Every category is shifted by an offset larger than all coordinates, so boxes of different categories
+    never overlap and a single :func:`nms` call handles all of them.
+    """
+    if len(boxes) == 0:
+        return np.empty((0,), dtype=np.int64)
+    offsets = idxs.astype(boxes.dtype) * (boxes.max() - boxes.min() + 1)
+    return nms(boxes + offsets[:, None], scores, iou_threshold, max_candidates)
+
+
+def top_k(x: np.ndarray, k: int, axis: int = -1) -> tuple[np.ndarray, np.ndarray]:
+    """The ``k`` largest values along ``axis`` and their indices, largest first."""
+    k = min(k, x.shape[axis])
+    if k < x.shape[axis]:
+        indices = np.argpartition(-x, k - 1, axis=axis)
+        indices = np.take(indices, np.arange(k), axis=axis)
+    else:
+        indices = np.broadcast_to(
+            np.arange(k).reshape([-1 if i == axis % x.ndim else 1 for i in range(x.ndim)]), x.shape)
+    values = np.take_along_axis(x, indices, axis=axis)
+    order = np.argsort(-values, axis=axis, kind="stable")
+    return np.take_along_axis(values, order, axis=axis), np.take_along_axis(indices, order, axis=axis)
+
+
+class YoloDecoder:
+    """
+    Decoder and NMS for anchor based YOLO heads (YOLOv5 and alike) with ``NHWC`` outputs of
+    shape ``(n, h, w, num_anchors * (5 + num_classes))``.
+
+    Grids and anchors are built once per output shape and cached. Cells are filtered on the raw
+    objectness logit before any ``sigmoid``/``exp`` work, so the expensive math only touches
+    candidate rows. Calling the decoder returns one ``(N, 6)`` array per image with
+    ``[x1, y1, x2, y2, score, class_id]`` rows, highest score first.
+    """
+
+    def __init__(
+            self,
+            anchors: Sequence[Sequence[float]],
+            strides: Sequence[int],
+            num_classes: int = 80,
+            conf_threshold: float = 0.25,
+            iou_threshold: float = 0.45,
+            multi_label: bool = False,
+            max_candidates: int = 300,
+            max_detections: int | None = None,
+    ):
+        if len(anchors) != len(strides):
+            raise ValueError(f"Got {len(anchors)} anchor levels but {len(strides)} strides.")
+        self.anchors = [np.asarray(a, dtype=np.float32).reshape(-1, 2) for a in anchors]
+        self.strides = list(strides)
+        self.num_classes = num_classes
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.multi_label = multi_label
+        self.max_candidates = max_candidates
+        self.max_detections = max_detections
+        self._grids = {}
+
+    def _grid(self, level: int, h: int, w: int) -> tuple[np.ndarray, np.ndarray]:
+        key = (level, h, w)
+        grid = self._grids.get(key)
+        if grid is None:
+            num_anchors = len(self.anchors[level])
+            ys, xs, _ = np.meshgrid(np.arange(h), np.arange(w), np.arange(num_anchors), indexing="ij")
+            xy = np.stack([xs, ys], axis=-1).reshape(-1, 2).astype(np.float32)
+            wh = np.tile(self.anchors[level], (h * w, 1))
+            grid = self._grids[key] = (xy, wh)
+        return grid
+
+    def decode(self, outputs: Sequence[np.ndarray]) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Boxes, scores and class ids per image, before NMS."""
+        no = 5 + self.num_classes
+        obj_threshold = _logit(self.conf_threshold)
+        batch = outputs[0].shape[0]
+        results = []
+        for b in range(batch):
+            all_boxes, all_scores, all_classes = [], [], []
+            for level, out in enumerate(outputs):
+                _, h, w, c = out.shape
+                pred = out[b].reshape(-1, no)
+                # sigmoid is monotonic, thresholding the logit is the same as thresholding the probability
+                rows = np.flatnonzero(pred[:, 4] > obj_threshold)
+                if rows.size == 0:
+                    continue
+                p = sigmoid(pred[rows].astype(np.float32, copy=False))
+                grid_xy, anchor_wh = self._grid(level, h, w)
+                boxes = np.empty((len(rows), 4), dtype=np.float32)
+                xy = (p[:, 0:2] * 2.0 - 0.5 + grid_xy[rows]) * self.strides[level]
+                half_wh = (p[:, 2:4] * 2.0) ** 2 * anchor_wh[rows] * 0.5
+                np.subtract(xy, half_wh, out=boxes[:, :2])
+                np.add(xy, half_wh, out=boxes[:, 2:])
+                cls_scores = p[:, 5:] * p[:, 4:5]
+                if self.multi_label:
+                    i, j = np.nonzero(cls_scores > self.conf_threshold)
+                    all_boxes.append(boxes[i])
+                    all_scores.append(cls_scores[i, j])
+                    all_classes.append(j)
+                else:
+                    j = cls_scores.argmax(axis=1)
+                    scores = cls_scores[np.arange(len(j)), j]
+                    mask = scores > self.conf_threshold
+                    all_boxes.append(boxes[mask])
+                    all_scores.append(scores[mask])
+                    all_classes.append(j[mask])
+            if all_boxes:
+                results.append((np.concatenate(all_boxes), np.concatenate(all_scores), np.concatenate(all_classes)))
+            else:
+                results.append((np.empty((0, 4), np.float32), np.empty((0,), np.float32), np.empty((0,), np.int64)))
+        return results
+
+    def __call__(self, outputs: Sequence[np.ndarray]) -> list[np.ndarray]:
+        detections = []
+        for boxes, scores, classes in self.decode(outputs):
+            keep = batched_nms(boxes, scores, classes, self.iou_threshold, self.max_candidates)
+            if self.max_detections is not None:
+                keep = keep[:self.max_detections]
+            det = np.empty((len(keep), 6), dtype=np.float32)
+            det[:, :4] = boxes[keep]
+            det[:, 4] = scores[keep]
+            det[:, 5] = classes[keep]
+            detections.append(det)
+        return detections
@@ -0,0 +1,210 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+from typing import Sequence
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+__all__ = ["LetterboxParams", "Letterbox", "CenterCrop"]
+
+_INTERPOLATIONS = ("nearest", "linear", "area")
+
+
+def _check_interpolation(interpolation: str):
+    if interpolation not in _INTERPOLATIONS:
+        raise ValueError(f"Invalid interpolation '{interpolation}', must be one of {list(_INTERPOLATIONS)}.")
+    if cv2 is None and interpolation != "nearest":
+        raise ImportError(f"Interpolation '{interpolation}' needs OpenCV, install opencv-python-headless "
+                          f"or use interpolation='nearest'.")
+
+
+def _cv2_interpolation(interpolation: str):
+    return {"nearest": cv2.INTER_NEAREST, "linear": cv2.INTER_LINEAR, "area": cv2.INTER_AREA}[interpolation]
+
+
+def _prepare_out(out: np.ndarray | None, size: tuple[int, int], channels: int, dtype) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the array handed back to the caller and its (h, w, c) image view."""
+    if out is None:
+        out = np.empty((size[0], size[1], channels), dtype=dtype)
+    image = out[0] if out.ndim == 4 and out.shape[0] == 1 else out
+    if image.shape != (size[0], size[1], channels):
+        raise ValueError(f"Output expects shape {(size[0], size[1], channels)} (NHWC), got {out.shape}.")
+    if image.dtype != dtype:
+        raise ValueError(f"Output dtype {image.dtype} does not match image dtype {dtype}.")
+    return out, image
+
+
+def _resize_into(image: np.ndarray, dst: np.ndarray, src_box: tuple[int, int, int, int],
+                 interpolation: str, swap_rb: bool, index_cache: dict):
+    """Resize ``image[y0:y1, x0:x1]`` into the preallocated ``dst`` view, optionally swapping R and B."""
+    x0, y0, x1, y1 = src_box
+    src = image[y0:y1, x0:x1]
+    h, w = dst.shape[:2]
+    if cv2 is not None:
+        if src.shape[:2] == (h, w):
+            dst[...] = src
+        else:
+            cv2.resize(src, (w, h), dst=dst, interpolation=_cv2_interpolation(interpolation))
+        if swap_rb:
+            # in place on the already written, still cache warm roi
+            cv2.cvtColor(dst, cv2.COLOR_BGR2RGB, dst=dst)
+        return
+    # nearest neighbour gather with cached source indices, resize and channel swap in one pass
+    key = (src.shape[:2], (h, w))
+    indices = index_cache.get(key)
+    if indices is None:
+        ys = (np.arange(h) * src.shape[0] // h)[:, None]
+        xs = (np.arange(w) * src.shape[1] // w)[None, :]
+        indices = index_cache[key] = (ys, xs)
+    ys, xs = indices
+    if swap_rb:
+        dst[...] = src[ys, xs, ::-1]
+    else:
+        dst[...] = src[ys, xs]
+
+
+class LetterboxParams:
+    """Resize and pad parameters for one source resolution, all in pixels of the network input."""
+
+    __slots__ = ("scale", "resized", "pad")
+
+    def __init__(self, scale: float, resized: tuple[int, int], pad: tuple[int, int, int, int]):
+        self.scale = scale
+        # (height, width) of the resized image
+        self.resized = resized
+        # (top, bottom, left, right)
+        self.pad = pad
+
+    def __repr__(self):
+        return f"LetterboxParams(scale={self.scale}, resized={self.resized}, pad={self.pad})"
+
+    def scale_boxes(self, boxes: np.ndarray, source_shape: Sequence[int] | None = None) -> np.ndarray:
+        """Maps ``(x1, y1, x2, y2)`` boxes from network input back to source pixels, in place."""
+        top, _, left, _ = self.pad
+        boxes[:, [0, 2]] -= left
+        boxes[:, [1, 3]] -= top
+        boxes[:, :4] /= self.scale
+        if source_shape is not None:
+            boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, source_shape[1])
+            boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, source_shape[0])
+        return boxes
+
+
+class Letterbox:
+    """
+    Aspect preserving resize plus constant padding, as used by YOLO models.
+
+    Parameters are computed once per source resolution and cached. The resized image is written
+    straight into ``out``, which may be a caller provided array or the session input buffer from
+    :meth:`axengine.InferenceSession.get_input_buffer`, so no intermediate images are allocated::
+
+        letterbox = Letterbox((640, 640), swap_rb=True)
+        buffer = session.get_input_buffer("images")
+        _, params = letterbox(frame, out=buffer)
+        outputs = session.run(None, {})
+    """
+
+    def __init__(
+            self,
+            size: tuple[int, int] = (640, 640),
+            color: tuple[int, int, int] = (114, 114, 114),
+            swap_rb: bool = True,
+            scaleup: bool = True,
+            interpolation: str = "linear",
+    ):
+        _check_interpolation(interpolation)
+        # (height, width) of the network input
+        self.size = tuple(size)
+        self.color = np.asarray(color)
+        self.swap_rb = swap_rb
+        self.scaleup = scaleup
+        self.interpolation = interpolation
+        self._params = {}
+        self._index_cache = {}
+
+    def params(self, source_shape: Sequence[int]) -> LetterboxParams:
+        key = (source_shape[0], source_shape[1])
+        params = self._params.get(key)
+        if params is None:
+            h, w = key
+            scale = min(self.size[0] / h, self.size[1] / w)
+            if not self.scaleup:
+                scale = min(scale, 1.0)
+            resized = (int(round(h * scale)), int(round(w * scale)))
+            dh, dw = (self.size[0] - resized[0]) / 2, (self.size[1] - resized[1]) / 2
+            top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+            left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+            params = self._params[key] = LetterboxParams(scale, resized, (top, bottom, left, right))
+        return params
+
+    def __call__(self, image: np.ndarray, out: np.ndarray | None = None) -> tuple[np.ndarray, LetterboxParams]:
+        params = self.params(image.shape)
+        out, dst = _prepare_out(out, self.size, image.shape[2], image.dtype)
+        top, bottom, left, right = params.pad
+        h, w = params.resized
+        color = self.color[::-1] if self.swap_rb else self.color
+        # only the border is filled, the inside is written once by the resize
+        if top:
+            dst[:top] = color
+        if bottom:
+            dst[top + h:] = color
+        if left:
+            dst[top:top + h, :left] = color
+        if right:
+            dst[top:top + h, left + w:] = color
+        _resize_into(image, dst[top:top + h, left:left + w], (0, 0, image.shape[1], image.shape[0]),
+                     self.interpolation, self.swap_rb, self._index_cache)
+        return out, params
+
+
+class CenterCrop:
+    """
+    ImageNet style resize of the shorter side followed by a center crop.
+
+    Resizing to ``resize_size`` and then cropping ``size`` is the same as cropping the matching
+    region of the source and resizing it once, so the source region is computed once per source
+    resolution and the result is written with a single resize into ``out``.
+    """
+
+    def __init__(
+            self,
+            size: tuple[int, int] = (224, 224),
+            resize_size: tuple[int, int] = (256, 256),
+            swap_rb: bool = False,
+            interpolation: str = "linear",
+    ):
+        _check_interpolation(interpolation)
+        self.size = tuple(size)
+        self.resize_size = tuple(resize_size)
+        self.swap_rb = swap_rb
+        self.interpolation = interpolation
+        self._boxes = {}
+        self._index_cache = {}
+
+    def source_box(self, source_shape: Sequence[int]) -> tuple[int, int, int, int]:
+        """``(x0, y0, x1, y1)`` of the source region that ends up in the output."""
+        key = (source_shape[0], source_shape[1])
+        box = self._boxes.get(key)
+        if box is None:
+            h, w = key
+            side = min(h, w)
+            crop_h = side * self.size[0] / self.resize_size[0]
+            crop_w = side * self.size[1] / self.resize_size[1]
+            y0 = int(round((h - crop_h) / 2))
+            x0 = int(round((w - crop_w) / 2))
+            box = self._boxes[key] = (x0, y0, x0 + int(round(crop_w)), y0 + int(round(crop_h)))
+        return box
+
+    def __call__(self, image: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        out, dst = _prepare_out(out, self.size, image.shape[2], image.dtype)
+        _resize_into(image, dst, self.source_box(image.shape), self.interpolation, self.swap_rb, self._index_cache)
+        return out
@@ -0,0 +1,384 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+"""
+Lightweight asyncio HTTP inference server::
+
+    python -m axengine.serve --model m.axmodel --port 8000
+
+Endpoints:
+
+- ``POST /infer``: the body is an ``.npy`` (``Content-Type: application/x-npy``) for single input models,
+  an ``.npz`` keyed by input name (``application/x-npz``), or raw tensor bytes (``application/octet-stream``)
+  whose shape and dtype come from the model, the input is selected by the ``X-Input-Name`` header. The
+  response is an ``.npz`` keyed by output name. When the in-flight limit is reached the server answers
+  ``429`` immediately instead of queueing.
+- ``GET /stats``: JSON with request counters, queue depth, batch sizes and latency percentiles.
+- ``GET /health``: ``200 ok`` once the model is loaded.
+"""
+
+import argparse
+import asyncio
+import collections
+import io
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ._providers import axclrt_provider_name, axengine_provider_name
+from ._session import InferenceSession
+
+__all__ = ["InferenceServer"]
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _Request:
+    __slots__ = ("feed", "future", "arrival", "started")
+
+    def __init__(self, feed: dict[str, np.ndarray], future: asyncio.Future):
+        self.feed = feed
+        self.future = future
+        self.arrival = time.perf_counter()
+        self.started = None
+
+
+class InferenceServer:
+    """
+    Serves one :class:`axengine.InferenceSession` over HTTP.
+
+    Requests are queued in a bounded queue of ``max_queue`` entries, a full queue is answered with 429. A
+    single worker drains the queue in micro-batches of up to ``max_batch`` requests, waiting at most
+    ``max_delay_ms`` for a batch to fill. When the model has a batch dimension larger than one, requests
+    of batch size one are stacked into a single run; otherwise the batch is run back to back in one hop
+    to the worker thread, so the event loop stays free for parsing and answering requests.
+    """
+
+    def __init__(
+            self,
+            session: InferenceSession,
+            max_batch: int = 8,
+            max_delay_ms: float = 2.0,
+            max_queue: int = 64,
+            max_body_size: int = 256 * 2 ** 20,
+    ):
+        self.session = session
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.max_queue = max_queue
+        self.max_body_size = max_body_size
+        self._inputs = session.get_inputs()
+        self._outputs = session.get_outputs()
+        self._model_batch = self._inputs[0].shape[0] if self._inputs[0].shape else 1
+        self._stackable = self._model_batch > 1 and all(
+            len(i.shape) > 0 and i.shape[0] == self._model_batch for i in self._inputs + self._outputs)
+        # the session owns one set of io buffers, runs go through a single thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="axengine-serve")
+        self._queue = None
+        self._worker = None
+        self._server = None
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=10000)
+        self._waits = collections.deque(maxlen=10000)
+        self._counters = collections.Counter()
+
+    # --- inference -------------------------------------------------------------------------------
+
+    def _run_batch(self, batch: list[_Request]) -> list:
+        if not self._stackable:
+            return self._run_each(batch)
+        results = [None] * len(batch)
+        singles = [k for k, r in enumerate(batch) if next(iter(r.feed.values())).shape[0] == 1]
+        full = [k for k in range(len(batch)) if k not in singles]
+        for k, result in zip(full, self._run_each([batch[k] for k in full])):
+            results[k] = result
+        # requests of batch size one are stacked into the model batch, unused rows stay zero
+        for start in range(0, len(singles), self._model_batch):
+            chunk = singles[start:start + self._model_batch]
+            feed = {}
+            for one in self._inputs:
+                stacked = np.zeros(one.shape, dtype=one.dtype)
+                for row, k in enumerate(chunk):
+                    stacked[row] = batch[k].feed[one.name][0]
+                feed[one.name] = stacked
+            now = time.perf_counter()
+            for k in chunk:
+                batch[k].started = now
+            try:
+                outputs = self.session.run(None, feed)
+            except Exception as e:
+                for k in chunk:
+                    results[k] = e
+                continue
+            for row, k in enumerate(chunk):
+                results[k] = [o[row:row + 1].copy() for o in outputs]
+        return results
+
+    def _run_each(self, batch: list[_Request]) -> list:
+        results = []
+        for r in batch:
+            r.started = time.perf_counter()
+            try:
+                results.append(self.session.run(None, r.feed))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            results = await loop.run_in_executor(self._executor, self._run_batch, batch)
+            now = time.perf_counter()
+            with self._lock:
+                self._counters["batches"] += 1
+                self._counters["batched_requests"] += len(batch)
+                for r in batch:
+                    self._latencies.append(now - r.arrival)
+                    self._waits.append(r.started - r.arrival)
+            for r, result in zip(batch, results):
+                if r.future.done():
+                    continue
+                if isinstance(result, Exception):
+                    r.future.set_exception(result)
+                else:
+                    r.future.set_result(result)
+
+    async def infer(self, feed: dict[str, np.ndarray]) -> list[np.ndarray]:
+        """Queues one request, raises :class:`asyncio.QueueFull` when the server is at its limit."""
+        request = _Request(feed, asyncio.get_running_loop().create_future())
+        try:
+            self._queue.put_nowait(request)
+        except asyncio.QueueFull:
+            with self._lock:
+                self._counters["rejected"] += 1
+            raise
+        with self._lock:
+            self._counters["accepted"] += 1
+        return await request.future
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            waits = np.array(self._waits) * 1000
+            counters = dict(self._counters)
+        stats = {
+            "accepted": counters.get("accepted", 0),
+            "rejected": counters.get("rejected", 0),
+            "errors": counters.get("errors", 0),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "batches": counters.get("batches", 0),
+            "mean_batch_size": counters.get("batched_requests", 0) / max(counters.get("batches", 0), 1),
+        }
+        for name, values in (("latency_ms", latencies), ("queue_wait_ms", waits)):
+            if len(values):
+                p50, p90, p99 = np.percentile(values, [50, 90, 99]).tolist()
+                stats[name] = {"p50": p50, "p90": p90, "p99": p99, "max": float(values.max())}
+            else:
+                stats[name] = {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+        return stats
+
+    # --- http ------------------------------------------------------------------------------------
+
+    def _parse_feed(self, headers: dict[str, str], body: bytes) -> dict[str, np.ndarray]:
+        content_type = headers.get("content-type", "application/x-npy").split(";")[0].strip()
+        try:
+            if content_type == "application/x-npz":
+                with np.load(io.BytesIO(body), allow_pickle=False) as data:
+                    feed = {k: data[k] for k in data.files}
+            elif content_type == "application/x-npy":
+                if len(self._inputs) != 1:
+                    raise _HttpError(400, "Model has several inputs, send an npz keyed by input name.")
+                feed = {self._inputs[0].name: np.load(io.BytesIO(body), allow_pickle=False)}
+            elif content_type == "application/octet-stream":
+                name = headers.get("x-input-name", self._inputs[0].name)
+                node = next((i for i in self._inputs if i.name == name), None)
+                if node is None:
+                    raise _HttpError(400, f"Unknown input '{name}'.")
+                if len(self._inputs) != 1:
+                    raise _HttpError(400, "Raw payloads are only supported for single input models.")
+                x = np.frombuffer(body, dtype=node.dtype)
+                if self._stackable and x.size * self._model_batch == int(np.prod(node.shape)):
+                    feed = {name: x.reshape([1] + list(node.shape[1:]))}
+                else:
+                    feed = {name: x.reshape(node.shape)}
+            else:
+                raise _HttpError(400, f"Unsupported content type '{content_type}'.")
+        except (ValueError, OSError) as e:
+            raise _HttpError(400, f"Invalid payload: {e}") from None
+        for one in self._inputs:
+            x = feed.get(one.name)
+            if x is None:
+                raise _HttpError(400, f"Missing input '{one.name}'.")
+            shape = list(x.shape)
+            if self._stackable and shape[:1] == [1]:
+                shape[0] = one.shape[0]
+            if shape != list(one.shape) or x.dtype != one.dtype:
+                raise _HttpError(
+                    400, f"Input '{one.name}' expects shape {one.shape} and dtype {one.dtype}, "
+                         f"got shape {list(x.shape)} and dtype {x.dtype}.")
+        return feed
+
+    async def _handle_request(self, method: str, path: str, headers: dict[str, str], body: bytes):
+        path = path.split("?")[0]
+        if path == "/health":
+            return 200, "text/plain", b"ok"
+        if path == "/stats":
+            return 200, "application/json", json.dumps(self.stats()).encode()
+        if path != "/infer":
+            raise _HttpError(404, f"Unknown path '{path}'.")
+        if method != "POST":
+            raise _HttpError(405, "Use POST for /infer.")
+        feed = self._parse_feed(headers, body)
+        try:
+            outputs = await self.infer(feed)
+        except asyncio.QueueFull:
+            raise _HttpError(429, "Server is at its in-flight limit, retry later.") from None
+        buffer = io.BytesIO()
+        np.savez(buffer, **{o.name: x for o, x in zip(self._outputs, outputs)})
+        return 200, "application/x-npz", buffer.getvalue()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > self.max_body_size:
+                        keep_alive = False
+                        raise _HttpError(413, f"Payload larger than {self.max_body_size} bytes.")
+                    body = await reader.readexactly(length) if length else b""
+                    status, content_type, payload = await self._handle_request(method, path, headers, body)
+                except _HttpError as e:
+                    status, content_type, payload = e.status, "text/plain", str(e).encode()
+                except Exception as e:
+                    with self._lock:
+                        self._counters["errors"] += 1
+                    status, content_type, payload = 500, "text/plain", f"{type(e).__name__}: {e}".encode()
+
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1"))
+                writer.write(payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker = asyncio.create_task(self._work())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._worker is not None:
+            self._worker.cancel()
+        self._executor.shutdown(wait=True)
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8000):
+        server = await self.start(host, port)
+        print(f"[INFO] Serving on {', '.join(str(s.getsockname()) for s in server.sockets)}")
+        try:
+            await server.serve_forever()
+        finally:
+            await self.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m axengine.serve", description="axengine HTTP inference server")
+    ap.add_argument('-m', '--model', type=str, help='model path', required=True)
+    ap.add_argument('--host', type=str, help='bind address', default='127.0.0.1')
+    ap.add_argument('--port', type=int, help='bind port', default=8000)
+    ap.add_argument('--max-batch', type=int, help='max requests per micro-batch', default=8)
+    ap.add_argument('--max-delay-ms', type=float, help='max wait for a micro-batch to fill', default=2.0)
+    ap.add_argument('--max-queue', type=int, help='max queued requests before answering 429', default=64)
+    ap.add_argument(
+        '-p',
+        '--provider',
+        type=str,
+        choices=["AUTO", f"{axclrt_provider_name}", f"{axengine_provider_name}"],
+        help=f'"AUTO", "{axclrt_provider_name}", "{axengine_provider_name}"',
+        default='AUTO'
+    )
+    ap.add_argument(
+        '-d',
+        '--device-id',
+        type=int,
+        help=R'axclrt device index, depends on how many cards inserted',
+        default=0
+    )
+    args = ap.parse_args(argv)
+
+    if args.provider == 'AUTO':
+        session = InferenceSession(args.model)
+    elif args.provider == axclrt_provider_name:
+        session = InferenceSession(args.model, providers=[(axclrt_provider_name, {"device_id": args.device_id})])
+    else:
+        session = InferenceSession(args.model, providers=[axengine_provider_name])
+
+    server = InferenceServer(session, args.max_batch, args.max_delay_ms, args.max_queue)
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
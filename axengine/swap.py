@@ -0,0 +1,201 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import collections
+import copy
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Sequence
+
+import numpy as np
+
+from ._base_session import RunOptions, SessionOptions
+from ._node import NodeArg
+from ._session import InferenceSession
+
+__all__ = ["SwappableSession"]
+
+
+def _io_signature(session: InferenceSession) -> list:
+    return [[(n.name, list(n.shape), n.dtype) for n in nodes] for nodes in (session.get_inputs(), session.get_outputs())]
+
+
+class SwappableSession:
+    """
+    An :class:`axengine.InferenceSession` whose model can be replaced while it keeps serving::
+
+        sess = SwappableSession("v1.axmodel")
+        ...
+        sess.reload("v2.axmodel")  # returns at once, runs keep going to v1 meanwhile
+
+    :meth:`reload` loads and warms the new model on a background thread, then switches between two runs:
+    runs that started before the switch finish on the old model, later ones go to the new one. Once the
+    last run on the old model returns it is closed, freeing its CMM or device memory. Both models are
+    loaded during the switch, a :class:`axengine.MemoryBudget` must leave room for that.
+
+    The constructor takes the arguments of :class:`axengine.InferenceSession`, reloads reuse them unless
+    given. It can be passed wherever a session is run, e.g. to :class:`axengine.serve.InferenceServer`.
+    """
+
+    def __init__(
+            self,
+            path_or_bytes: str | bytes | os.PathLike,
+            sess_options: SessionOptions | None = None,
+            providers: Sequence[str | tuple[str, dict[Any, Any]]] | None = None,
+            provider_options: Sequence[dict[Any, Any]] | None = None, **kwargs,
+    ) -> None:
+        self._sess_options = sess_options
+        self._providers = providers
+        self._provider_options = provider_options
+        self._kwargs = kwargs
+        self._current = InferenceSession(path_or_bytes, sess_options, providers, provider_options, **kwargs)
+        self._path = path_or_bytes if not isinstance(path_or_bytes, bytes) else None
+        self._generation = 0
+        self._lock = threading.Condition()
+        # runs in progress per session, retired sessions are closed once theirs drop to zero
+        self._in_flight = collections.Counter()
+        self._reloading = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @property
+    def session(self) -> InferenceSession:
+        """The session new runs go to."""
+        return self._current
+
+    @property
+    def generation(self) -> int:
+        """Number of completed swaps."""
+        return self._generation
+
+    @property
+    def model_path(self) -> str | os.PathLike | None:
+        """Path of the model serving now, None when it was loaded from bytes."""
+        return self._path
+
+    def _load(self, path_or_bytes, sess_options, allow_io_change: bool) -> InferenceSession:
+        if sess_options is None:
+            sess_options = self._sess_options
+        # the first runs on a fresh model are slow, they are taken here instead of by callers
+        if not getattr(sess_options, "warmup_runs", 0):
+            sess_options = copy.copy(sess_options) if sess_options is not None else SessionOptions()
+            sess_options.warmup_runs = 1
+        session = InferenceSession(
+            path_or_bytes, sess_options, self._providers, self._provider_options, **self._kwargs)
+        if not allow_io_change and _io_signature(session) != _io_signature(self._current):
+            session.close()
+            raise ValueError("The new model has different inputs or outputs, pass allow_io_change=True to swap "
+                             "it in anyway.")
+        return session
+
+    def _swap(self, session: InferenceSession, path_or_bytes):
+        with self._lock:
+            if self._closed:
+                retired = session
+            else:
+                retired, self._current = self._current, session
+                self._path = path_or_bytes if not isinstance(path_or_bytes, bytes) else None
+                self._generation += 1
+            # runs still on the old model finish first
+            while self._in_flight[retired]:
+                self._lock.wait()
+            del self._in_flight[retired]
+        retired.close()
+
+    def _reload(self, future: Future, path_or_bytes, sess_options, allow_io_change: bool):
+        try:
+            session = self._load(path_or_bytes, sess_options, allow_io_change)
+            self._swap(session, path_or_bytes)
+        except BaseException as e:
+            print(f"[WARNING] Reload failed, keeping the current model: {e}")
+            future.set_exception(e)
+        else:
+            future.set_result(self._generation)
+        finally:
+            with self._lock:
+                self._reloading = None
+
+    def reload(
+            self,
+            path_or_bytes: str | bytes | os.PathLike,
+            sess_options: SessionOptions | None = None,
+            allow_io_change: bool = False,
+    ) -> Future:
+        """
+        Swap in the model ``path_or_bytes`` without stopping runs. Returns a future done once the old model
+        is released, with the new :attr:`generation`, or with the load error while the old model keeps
+        serving. The new model is warmed with one run unless ``sess_options.warmup_runs`` says otherwise.
+        Its inputs and outputs must match the current ones, unless ``allow_io_change`` is set.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Can not reload a closed session.")
+            if self._reloading is not None:
+                raise RuntimeError("A reload is already in progress.")
+            future = self._reloading = Future()
+        threading.Thread(target=self._reload, args=(future, path_or_bytes, sess_options, allow_io_change),
+                         name="axengine-reload", daemon=True).start()
+        return future
+
+    def run(
+            self,
+            output_names: list[str] | None,
+            input_feed: dict[str, np.ndarray],
+            run_options: RunOptions | None = None,
+            shape_group: int = 0
+    ) -> list[np.ndarray]:
+        with self._lock:
+            session = self._current
+            self._in_flight[session] += 1
+        try:
+            return session.run(output_names, input_feed, run_options, shape_group)
+        finally:
+            with self._lock:
+                self._in_flight[session] -= 1
+                if not self._in_flight[session] and session is not self._current:
+                    self._lock.notify_all()
+
+    def close(self):
+        """Close the serving model, waiting for a reload in progress first."""
+        with self._lock:
+            self._closed = True
+            reloading = self._reloading
+        if reloading is not None:
+            try:
+                reloading.result()
+            except BaseException:
+                pass
+        self._current.close()
+
+    def get_session_options(self) -> SessionOptions | None:
+        return self._current.get_session_options()
+
+    def get_providers(self):
+        return self._current.get_providers()
+
+    def get_inputs(self, shape_group: int = 0) -> list[NodeArg]:
+        return self._current.get_inputs(shape_group)
+
+    def get_outputs(self, shape_group: int = 0) -> list[NodeArg]:
+        return self._current.get_outputs(shape_group)
+
+    def get_memory_usage(self) -> dict[str, int]:
+        return self._current.get_memory_usage()
+
+    def get_run_stats(self) -> dict[str, dict]:
+        """Run stats of the model serving now, counters start over with every swap."""
+        return self._current.get_run_stats()
+
+    def get_warmup_info(self) -> dict:
+        return self._current.get_warmup_info()
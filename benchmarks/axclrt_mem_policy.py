@@ -0,0 +1,129 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import argparse
+import itertools
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+import axengine as axe
+from axengine import axclrt_provider_name
+
+POLICIES = ["normal_only", "huge_first", "huge_only"]
+
+
+def random_feed(session, shape_group=0):
+    feed = {}
+    for one in session.get_inputs(shape_group):
+        if np.issubdtype(one.dtype, np.integer):
+            info = np.iinfo(one.dtype)
+            feed[one.name] = np.random.randint(info.min, info.max, size=one.shape, dtype=one.dtype)
+        else:
+            feed[one.name] = np.random.rand(*one.shape).astype(one.dtype)
+    return feed
+
+
+def bench_one(model_data, policy, cached, repeat, device_id):
+    options = {
+        "device_id": device_id,
+        "model_mem_policy": policy,
+        "model_mem_cached": cached,
+        "io_mem_policy": policy,
+        "io_mem_cached": cached,
+    }
+    t1 = time.perf_counter()
+    session = axe.InferenceSession(model_data, providers=[(axclrt_provider_name, options)])
+    load_cost = (time.perf_counter() - t1) * 1000
+
+    feed = random_feed(session)
+    io_bytes = sum(v.nbytes for v in feed.values())
+    io_bytes += sum(o.dtype.itemsize * int(np.prod(o.shape)) for o in session.get_outputs())
+
+    # first run is reported separately, it pays for the page faults of fresh buffers
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    t1 = time.perf_counter()
+    session.run(None, feed)
+    first_cost = (time.perf_counter() - t1) * 1000
+    first_faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - faults
+
+    time_costs = []
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    for _ in range(repeat):
+        t1 = time.perf_counter()
+        session.run(None, feed)
+        time_costs.append((time.perf_counter() - t1) * 1000)
+    steady_faults = (resource.getrusage(resource.RUSAGE_SELF).ru_minflt - faults) / repeat
+
+    time_costs = np.array(time_costs)
+    return {
+        "io_mb": io_bytes / 2 ** 20,
+        "load": load_cost,
+        "first": first_cost,
+        "first_faults": first_faults,
+        "min": time_costs.min(),
+        "avg": time_costs.mean(),
+        "p99": np.percentile(time_costs, 99),
+        "faults": steady_faults,
+    }
+
+
+def main(model_paths, repeat, device_id):
+    for model_path in model_paths:
+        # load from bytes, so the model staging buffer policy is exercised as well
+        with open(model_path, "rb") as f:
+            model_data = f.read()
+
+        print("  ------------------------------------------------------")
+        print(f"  {os.path.basename(model_path)}, model {len(model_data) / 2 ** 20:.1f} MB")
+        print(f"  {'policy':<12} {'cached':<7} {'io MB':>7} {'load ms':>9} {'first ms':>9} {'faults':>7}"
+              f" {'min ms':>8} {'avg ms':>8} {'p99 ms':>8} {'faults/run':>11}")
+        for policy, cached in itertools.product(POLICIES, [False, True]):
+            try:
+                r = bench_one(model_data, policy, cached, repeat, device_id)
+            except RuntimeError as e:
+                # huge only policy fails when the device has no huge pages reserved
+                print(f"  {policy:<12} {str(cached):<7} failed: {e}")
+                continue
+            print(f"  {policy:<12} {str(cached):<7} {r['io_mb']:>7.2f} {r['load']:>9.2f} {r['first']:>9.3f}"
+                  f" {r['first_faults']:>7d} {r['min']:>8.3f} {r['avg']:>8.3f} {r['p99']:>8.3f} {r['faults']:>11.1f}")
+    print("  ------------------------------------------------------")
+    print("  huge page buffers need far fewer device TLB entries for large tensors, which shows up as lower")
+    print("  first run and p99 latency; host side page faults are reported for the staging copies.")
+
+
+class BenchmarkParser(argparse.ArgumentParser):
+    def error(self, message):
+        self.print_usage(sys.stderr)
+        print(f"\nError: {message}")
+        print("\nExample usage:")
+        print("  python3 axclrt_mem_policy.py -m <model_file> [<model_file> ...]")
+        print("  python3 axclrt_mem_policy.py -m /opt/data/npu/models/qwen2.5_0.5b_p128_l0.axmodel "
+              "/opt/data/npu/models/yolov5s.axmodel")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    ap = BenchmarkParser(description="AXCLRT device memory policy benchmark")
+    ap.add_argument('-m', '--model-path', type=str, nargs='+', help='model path(s)', required=True)
+    ap.add_argument('-r', '--repeat', type=int, help='repeat times', default=100)
+    ap.add_argument(
+        '-d',
+        '--device-id',
+        type=int,
+        help=R'axclrt device index, depends on how many cards inserted',
+        default=0
+    )
+    args = ap.parse_args()
+
+    for model_file in args.model_path:
+        assert os.path.exists(model_file), f"model file path {model_file} does not exist"
+
+    main(args.model_path, args.repeat, args.device_id)
@@ -0,0 +1,134 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import argparse
+import os
+import sys
+import time
+
+import ml_dtypes as mldt
+import numpy as np
+
+import axengine as axe
+from axengine import axclrt_provider_name, axengine_provider_name
+
+
+def timeit(fn, repeat):
+    fn()
+    time_costs = []
+    for _ in range(repeat):
+        t1 = time.perf_counter()
+        fn()
+        time_costs.append((time.perf_counter() - t1) * 1000)
+    return float(np.median(time_costs))
+
+
+def bench_host(sizes, repeat):
+    rng = np.random.default_rng(0)
+    print("  ------------------------------------------------------")
+    print("  host conversion, median ms")
+    print(f"  {'elements':>10} {'astype bf16':>12} {'to bf16 out=':>13} {'astype f32':>11} {'to f32 out=':>12}")
+    for size in sizes:
+        x = rng.standard_normal(size, dtype=np.float32)
+        # the special values must round trip like ml_dtypes does
+        x[:4] = [np.nan, np.inf, -np.inf, 3.3895314e38]
+        narrow = np.empty(size, dtype=mldt.bfloat16)
+        wide = np.empty(size, dtype=np.float32)
+
+        reference = x.astype(mldt.bfloat16)
+        axe.float32_to_bfloat16(x, out=narrow)
+        assert np.array_equal(narrow.view(np.uint16), reference.view(np.uint16)), "float32 to bfloat16 mismatch"
+        axe.bfloat16_to_float32(reference, out=wide)
+        assert np.array_equal(wide, reference.astype(np.float32), equal_nan=True), "bfloat16 to float32 mismatch"
+
+        # astype stands for what callers did before: a new array, then the copy into the io buffer
+        astype_narrow = timeit(lambda: np.copyto(narrow, x.astype(mldt.bfloat16)), repeat)
+        out_narrow = timeit(lambda: axe.float32_to_bfloat16(x, out=narrow), repeat)
+        astype_wide = timeit(lambda: np.copyto(wide, reference.astype(np.float32)), repeat)
+        out_wide = timeit(lambda: axe.bfloat16_to_float32(reference, out=wide), repeat)
+        print(f"  {size:>10} {astype_narrow:>12.3f} {out_narrow:>13.3f} {astype_wide:>11.3f} {out_wide:>12.3f}")
+
+
+def bench_session(model_path, providers, repeat):
+    sessions = {}
+    for converted in (False, True):
+        sess_options = axe.SessionOptions()
+        sess_options.bf16_float32_io = converted
+        sessions[converted] = axe.InferenceSession(model_path, sess_options, providers=providers)
+
+    feed = {}
+    for one in sessions[False].get_inputs():
+        if one.dtype == np.dtype(mldt.bfloat16):
+            feed[one.name] = np.random.rand(*one.shape).astype(np.float32)
+    if not feed:
+        print(f"  {os.path.basename(model_path)} has no bfloat16 inputs")
+        return
+    rest = {one.name: np.zeros(one.shape, dtype=one.dtype)
+            for one in sessions[False].get_inputs() if one.name not in feed}
+
+    def by_hand():
+        outputs = sessions[False].run(None, {**rest, **{k: v.astype(mldt.bfloat16) for k, v in feed.items()}})
+        return [o.astype(np.float32) if o.dtype == np.dtype(mldt.bfloat16) else o for o in outputs]
+
+    def converted():
+        return sessions[True].run(None, {**rest, **feed})
+
+    print("  ------------------------------------------------------")
+    print(f"  {os.path.basename(model_path)}, {sum(v.nbytes for v in feed.values()) / 2 ** 20:.2f} MB float32 input")
+    print(f"  astype by hand   {timeit(by_hand, repeat):>9.3f} ms/run")
+    print(f"  bf16_float32_io  {timeit(converted, repeat):>9.3f} ms/run")
+
+
+def main(args):
+    bench_host(args.sizes, args.repeat)
+    if args.model_path is not None:
+        providers = None
+        if args.provider == axclrt_provider_name:
+            providers = [(axclrt_provider_name, {"device_id": args.device_id})]
+        if args.provider == axengine_provider_name:
+            providers = [axengine_provider_name]
+        bench_session(args.model_path, providers, args.repeat)
+    print("  ------------------------------------------------------")
+
+
+class BenchmarkParser(argparse.ArgumentParser):
+    def error(self, message):
+        self.print_usage(sys.stderr)
+        print(f"\nError: {message}")
+        print("\nExample usage:")
+        print("  python3 bf16_convert.py")
+        print("  python3 bf16_convert.py -m /opt/data/npu/models/qwen2.5_0.5b_p128_l0.axmodel")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    ap = BenchmarkParser(description="float32 <-> bfloat16 conversion against ml_dtypes astype")
+    ap.add_argument('-m', '--model-path', type=str, help='model with bfloat16 io, optional', default=None)
+    ap.add_argument('-s', '--sizes', type=int, nargs='+', help='element counts',
+                    default=[4096, 262144, 1572864, 4194304])
+    ap.add_argument('-r', '--repeat', type=int, help='repeat times', default=50)
+    ap.add_argument(
+        '-p',
+        '--provider',
+        type=str,
+        choices=["AUTO", f"{axclrt_provider_name}", f"{axengine_provider_name}"],
+        help=f'"AUTO", "{axclrt_provider_name}", "{axengine_provider_name}"',
+        default='AUTO'
+    )
+    ap.add_argument(
+        '-d',
+        '--device-id',
+        type=int,
+        help=R'axclrt device index, depends on how many cards inserted',
+        default=0
+    )
+    args = ap.parse_args()
+
+    if args.model_path is not None:
+        assert os.path.exists(args.model_path), f"model file path {args.model_path} does not exist"
+
+    main(args)
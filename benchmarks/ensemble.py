@@ -0,0 +1,97 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+import axengine as axe
+from axengine import axclrt_provider_name, axengine_provider_name
+from axengine.ensemble import Ensemble
+
+
+def main(args, providers):
+    sessions = [axe.InferenceSession(path, providers=providers) for path in args.model_path]
+    names = [f"{k}:{os.path.basename(path)}" for k, path in enumerate(args.model_path)]
+    feeds = [{i.name: np.zeros(i.shape, dtype=i.dtype) for i in sess.get_inputs()} for sess in sessions]
+
+    # serial, what an application does without the ensemble
+    serial = []
+    for _ in range(args.warmup + args.repeat):
+        t1 = time.perf_counter()
+        for sess, feed in zip(sessions, feeds):
+            sess.run(None, feed)
+        serial.append((time.perf_counter() - t1) * 1000)
+    serial = np.array(serial[args.warmup:])
+
+    ensemble = Ensemble(dict(zip(names, sessions)), input_maps=[{} for _ in sessions])
+    parallel, latencies = [], []
+    for _ in range(args.warmup + args.repeat):
+        result = ensemble.run({}, feeds=feeds)
+        parallel.append(result.total_ms)
+        latencies.append(result.latency_ms)
+    ensemble.close()
+    parallel = np.array(parallel[args.warmup:])
+    latencies = np.array(latencies[args.warmup:])
+
+    print("  ------------------------------------------------------")
+    print(f"  {'member':<32} {'avg ms':>9}")
+    for name, cost in zip(names, latencies.mean(axis=0)):
+        print(f"  {name:<32} {cost:>9.3f}")
+    print(f"  {'case':<32} {'avg ms':>9} {'p99 ms':>9}")
+    print(f"  {'serial':<32} {serial.mean():>9.3f} {np.percentile(serial, 99):>9.3f}")
+    print(f"  {'ensemble':<32} {parallel.mean():>9.3f} {np.percentile(parallel, 99):>9.3f}")
+    print(f"  speedup {serial.mean() / parallel.mean():.2f}x, slowest member {latencies.mean(axis=0).max():.3f} ms")
+    print("  ------------------------------------------------------")
+    for sess in sessions:
+        sess.close()
+
+
+class BenchmarkParser(argparse.ArgumentParser):
+    def error(self, message):
+        self.print_usage(sys.stderr)
+        print(f"\nError: {message}")
+        print("\nExample usage:")
+        print("  python3 ensemble.py -m <model_file> <model_file> [<model_file> ...]")
+        print("  python3 ensemble.py -m /opt/data/npu/models/face_det.axmodel /opt/data/npu/models/face_attr.axmodel")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    ap = BenchmarkParser(description="serial against concurrent runs of several models on one input")
+    ap.add_argument('-m', '--model-path', type=str, nargs='+', help='ensemble member models', required=True)
+    ap.add_argument('-w', '--warmup', type=int, help='warmup runs', default=10)
+    ap.add_argument('-r', '--repeat', type=int, help='repeat times', default=200)
+    ap.add_argument(
+        '-p',
+        '--provider',
+        type=str,
+        choices=["AUTO", f"{axclrt_provider_name}", f"{axengine_provider_name}"],
+        help=f'"AUTO", "{axclrt_provider_name}", "{axengine_provider_name}"',
+        default='AUTO'
+    )
+    ap.add_argument(
+        '-d',
+        '--device-id',
+        type=int,
+        help=R'axclrt device index, depends on how many cards inserted',
+        default=0
+    )
+    args = ap.parse_args()
+
+    for model_file in args.model_path:
+        assert os.path.exists(model_file), f"model file path {model_file} does not exist"
+
+    providers = None
+    if args.provider == axclrt_provider_name:
+        providers = [(axclrt_provider_name, {"device_id": args.device_id})]
+    if args.provider == axengine_provider_name:
+        providers = [axengine_provider_name]
+    main(args, providers)
@@ -0,0 +1,143 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+import axengine as axe
+from axengine import axclrt_provider_name, axengine_provider_name
+from axengine.swap import SwappableSession
+
+
+class StopTheWorld:
+    """What a rollout looked like before: runs wait while the old model is closed and the new one loaded."""
+
+    def __init__(self, model_path, providers):
+        self._providers = providers
+        self._lock = threading.Lock()
+        self._session = axe.InferenceSession(model_path, providers=providers)
+
+    def run(self, output_names, feed):
+        with self._lock:
+            return self._session.run(output_names, feed)
+
+    def reload(self, model_path):
+        with self._lock:
+            self._session.close()
+            self._session = axe.InferenceSession(model_path, providers=self._providers)
+
+    def close(self):
+        self._session.close()
+
+
+def measure(session, reload, feed, clients, duration, swaps):
+    latencies = [[] for _ in range(clients)]
+    stop = threading.Event()
+
+    def client(costs):
+        while not stop.is_set():
+            t1 = time.perf_counter()
+            session.run(None, feed)
+            costs.append((time.perf_counter() - t1) * 1000)
+
+    threads = [threading.Thread(target=client, args=(costs,)) for costs in latencies]
+    for t in threads:
+        t.start()
+    for _ in range(swaps):
+        time.sleep(duration / (swaps + 1))
+        reload()
+    time.sleep(duration / (swaps + 1))
+    stop.set()
+    for t in threads:
+        t.join()
+    costs = np.concatenate([np.array(c) for c in latencies])
+    return len(costs), np.percentile(costs, 50), np.percentile(costs, 99), costs.max()
+
+
+def main(args, providers):
+    paths = args.model_path if len(args.model_path) > 1 else args.model_path * 2
+    session = axe.InferenceSession(paths[0], providers=providers)
+    feed = {i.name: np.zeros(i.shape, dtype=i.dtype) for i in session.get_inputs()}
+    session.close()
+
+    print("  ------------------------------------------------------")
+    print(f"  {args.clients} clients, {args.duration:.1f} s per case, {args.swaps} swaps")
+    print(f"  {'case':<16} {'runs':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+
+    swappable = SwappableSession(paths[0], providers=providers)
+    r = measure(swappable, lambda: None, feed, args.clients, args.duration, 0)
+    print(f"  {'no swap':<16} {r[0]:>7d} {r[1]:>9.3f} {r[2]:>9.3f} {r[3]:>9.3f}")
+
+    turn = [0]
+
+    def hot_reload():
+        turn[0] += 1
+        swappable.reload(paths[turn[0] % len(paths)]).result()
+
+    r = measure(swappable, hot_reload, feed, args.clients, args.duration, args.swaps)
+    print(f"  {'SwappableSession':<16} {r[0]:>7d} {r[1]:>9.3f} {r[2]:>9.3f} {r[3]:>9.3f}")
+    swappable.close()
+
+    blocking = StopTheWorld(paths[0], providers)
+
+    def blocking_reload():
+        turn[0] += 1
+        blocking.reload(paths[turn[0] % len(paths)])
+
+    r = measure(blocking, blocking_reload, feed, args.clients, args.duration, args.swaps)
+    print(f"  {'stop the world':<16} {r[0]:>7d} {r[1]:>9.3f} {r[2]:>9.3f} {r[3]:>9.3f}")
+    blocking.close()
+    print("  ------------------------------------------------------")
+
+
+class BenchmarkParser(argparse.ArgumentParser):
+    def error(self, message):
+        self.print_usage(sys.stderr)
+        print(f"\nError: {message}")
+        print("\nExample usage:")
+        print("  python3 hot_swap.py -m <model_file> [<model_file> ...]")
+        print("  python3 hot_swap.py -m /opt/data/npu/models/yolov5s.axmodel /opt/data/npu/models/yolov5s_v2.axmodel")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    ap = BenchmarkParser(description="latency of runs while the model is swapped")
+    ap.add_argument('-m', '--model-path', type=str, nargs='+', help='models swapped in turn', required=True)
+    ap.add_argument('-c', '--clients', type=int, help='concurrent client threads', default=4)
+    ap.add_argument('-t', '--duration', type=float, help='seconds per case', default=5.0)
+    ap.add_argument('-s', '--swaps', type=int, help='swaps per case', default=4)
+    ap.add_argument(
+        '-p',
+        '--provider',
+        type=str,
+        choices=["AUTO", f"{axclrt_provider_name}", f"{axengine_provider_name}"],
+        help=f'"AUTO", "{axclrt_provider_name}", "{axengine_provider_name}"',
+        default='AUTO'
+    )
+    ap.add_argument(
+        '-d',
+        '--device-id',
+        type=int,
+        help=R'axclrt device index, depends on how many cards inserted',
+        default=0
+    )
+    args = ap.parse_args()
+
+    for model_file in args.model_path:
+        assert os.path.exists(model_file), f"model file path {model_file} does not exist"
+
+    providers = None
+    if args.provider == axclrt_provider_name:
+        providers = [(axclrt_provider_name, {"device_id": args.device_id})]
+    if args.provider == axengine_provider_name:
+        providers = [axengine_provider_name]
+    main(args, providers)
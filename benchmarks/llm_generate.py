@@ -0,0 +1,102 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+import axengine as axe
+from axengine import axclrt_provider_name, axengine_provider_name
+from axengine.llm import LLMRunner, Sampler
+
+
+def parse_states(states_str):
+    # "k_out:k_in,v_out:v_in"
+    states = {}
+    for pair in filter(None, states_str.split(',')):
+        if pair.count(':') != 1:
+            raise argparse.ArgumentTypeError(R'states should looks like: "k_out:k_in,v_out:v_in"')
+        output_name, input_name = pair.split(':')
+        states[output_name.strip()] = input_name.strip()
+    return states
+
+
+def main(args):
+    providers = None
+    if args.provider == axclrt_provider_name:
+        providers = [(axclrt_provider_name, {"device_id": args.device_id})]
+    if args.provider == axengine_provider_name:
+        providers = [axengine_provider_name]
+    session = axe.InferenceSession(args.model_path, providers=providers)
+
+    runner = LLMRunner(session, args.prefill_group, args.decode_group, args.token_input, args.logits_output,
+                       args.position_input, args.states)
+    prompt = np.random.default_rng(0).integers(0, 1000, size=args.prompt_len).tolist()
+
+    samplers = (
+        ("greedy", Sampler(temperature=0)),
+        ("top-k 40", Sampler(top_k=40, seed=0)),
+        ("top-p 0.8", Sampler(top_p=0.8, seed=0)),
+        ("top-k 40, top-p 0.8", Sampler(top_k=40, top_p=0.8, seed=0)),
+    )
+    print("  ------------------------------------------------------")
+    print(f"  prompt {args.prompt_len} tokens, {args.max_new_tokens} new tokens")
+    print(f"  {'sampler':<20} {'prefill ms':>10} {'tokens/s':>9} {'run ms/tok':>10} {'py ms/tok':>10}")
+    for name, sampler in samplers:
+        runner.reset()
+        for _ in runner.generate(prompt, args.max_new_tokens, sampler):
+            pass
+        stats = runner.stats
+        run_per_token = stats.decode_run_ms / max(stats.generated_tokens, 1)
+        print(f"  {name:<20} {stats.prefill_ms:>10.3f} {stats.tokens_per_second:>9.1f} {run_per_token:>10.3f} "
+              f"{stats.overhead_per_token_ms:>10.3f}")
+    print("  ------------------------------------------------------")
+    print("  py ms/tok is the decode time outside session.run(): feed updates, logits slice and sampling.")
+
+
+class BenchmarkParser(argparse.ArgumentParser):
+    def error(self, message):
+        self.print_usage(sys.stderr)
+        print(f"\nError: {message}")
+        print("\nExample usage:")
+        print("  python3 llm_generate.py -m <model_file> --prefill-group 1 --decode-group 0 -s k_out:k_in,v_out:v_in")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    ap = BenchmarkParser(description="Token generation throughput and per token python overhead")
+    ap.add_argument('-m', '--model-path', type=str, help='model path', required=True)
+    ap.add_argument('--prefill-group', type=int, help='prefill shape group', default=1)
+    ap.add_argument('--decode-group', type=int, help='decode shape group', default=0)
+    ap.add_argument('--token-input', type=str, help='token ids input name', default='input_ids')
+    ap.add_argument('--position-input', type=str, help='positions input name', default=None)
+    ap.add_argument('--logits-output', type=str, help='logits output name', default='logits')
+    ap.add_argument('-s', '--states', type=parse_states, help='kv cache "output:input" pairs', default={})
+    ap.add_argument('-l', '--prompt-len', type=int, help='prompt tokens', default=64)
+    ap.add_argument('-n', '--max-new-tokens', type=int, help='generated tokens per sampler', default=128)
+    ap.add_argument(
+        '-p',
+        '--provider',
+        type=str,
+        choices=["AUTO", f"{axclrt_provider_name}", f"{axengine_provider_name}"],
+        help=f'"AUTO", "{axclrt_provider_name}", "{axengine_provider_name}"',
+        default='AUTO'
+    )
+    ap.add_argument(
+        '-d',
+        '--device-id',
+        type=int,
+        help=R'axclrt device index, depends on how many cards inserted',
+        default=0
+    )
+    args = ap.parse_args()
+
+    assert os.path.exists(args.model_path), f"model file path {args.model_path} does not exist"
+
+    main(args)
@@ -0,0 +1,207 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+import axengine as axe
+from axengine import axclrt_provider_name, axengine_provider_name
+
+STUB_MODELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub", "models")
+
+
+def make_session(model_path, provider, device_id):
+    if provider == axclrt_provider_name:
+        return axe.InferenceSession(model_path, providers=[(axclrt_provider_name, {"device_id": device_id})])
+    return axe.InferenceSession(model_path, providers=[provider])
+
+
+def zero_feed(session):
+    return {i.name: np.zeros(i.shape, dtype=i.dtype) for i in session.get_inputs()}
+
+
+def bench_overhead(session, feed, repeat):
+    for _ in range(10):
+        session.run(None, feed)
+    time_costs = []
+    for _ in range(repeat):
+        t1 = time.perf_counter()
+        session.run(None, feed)
+        time_costs.append((time.perf_counter() - t1) * 1e6)
+    time_costs = np.array(time_costs)
+    return {"median_us": float(np.median(time_costs)), "p99_us": float(np.percentile(time_costs, 99))}
+
+
+def bench_allocations(session, feed, repeat):
+    for _ in range(10):
+        session.run(None, feed)
+    tracemalloc.start()
+    try:
+        # transient allocations of one run, outputs included, and what stays behind after many
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        session.run(None, feed)
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        for _ in range(repeat):
+            session.run(None, feed)
+        stats = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+    finally:
+        tracemalloc.stop()
+    retained = sum(s.size_diff for s in stats)
+    blocks = sum(s.count_diff for s in stats)
+    return {"peak_kib": (peak - before) / 1024, "retained_b_per_run": retained / repeat,
+            "retained_blocks_per_run": blocks / repeat}
+
+
+def bench_scaling(session, feed, threads, seconds):
+    """Runs per second of ``threads`` clones of ``session`` run back to back from their own thread."""
+    clones = [session] + [session.clone() for _ in range(threads - 1)]
+    counts = [0] * threads
+    stop = threading.Event()
+
+    def worker(k):
+        sess = clones[k]
+        while not stop.is_set():
+            sess.run(None, feed)
+            counts[k] += 1
+
+    workers = [threading.Thread(target=worker, args=(k,)) for k in range(threads)]
+    t1 = time.perf_counter()
+    for w in workers:
+        w.start()
+    time.sleep(seconds)
+    stop.set()
+    for w in workers:
+        w.join()
+    qps = sum(counts) / (time.perf_counter() - t1)
+    for clone in clones[1:]:
+        clone.close()
+    return qps
+
+
+def main(args):
+    providers = axe.get_available_providers() if args.provider == "AUTO" else [args.provider]
+    results = {}
+    for provider in providers:
+        print("  ------------------------------------------------------")
+        print(f"  {provider}, per run overhead with AXSTUB_EXEC_US=0")
+        print(f"  {'model':<18} {'median us':>10} {'p99 us':>10} {'peak KiB':>10} {'retained B/run':>15}")
+        os.environ["AXSTUB_EXEC_US"] = "0"
+        for model_path in args.model_path:
+            name = os.path.basename(model_path)
+            session = make_session(model_path, provider, args.device_id)
+            feed = zero_feed(session)
+            r = bench_overhead(session, feed, args.repeat)
+            r.update(bench_allocations(session, feed, args.repeat))
+            session.close()
+            results[f"{provider}/{name}"] = r
+            print(f"  {name:<18} {r['median_us']:>10.1f} {r['p99_us']:>10.1f} {r['peak_kib']:>10.1f}"
+                  f" {r['retained_b_per_run']:>15.1f}")
+
+        # a run that waits on the NPU must not hold the GIL, clones should scale with threads
+        print(f"  {provider}, scaling with AXSTUB_EXEC_US={args.exec_us} on {os.path.basename(args.model_path[0])}")
+        print(f"  {'threads':>7} {'runs/s':>10} {'efficiency':>11}")
+        os.environ["AXSTUB_EXEC_US"] = str(args.exec_us)
+        session = make_session(args.model_path[0], provider, args.device_id)
+        feed = zero_feed(session)
+        single = None
+        for threads in args.threads:
+            qps = bench_scaling(session, feed, threads, args.seconds)
+            single = single or qps / threads
+            results[f"{provider}/scaling/{threads}"] = {"runs_per_s": qps}
+            print(f"  {threads:>7d} {qps:>10.1f} {qps / (single * threads):>10.1%}")
+        session.close()
+    print("  ------------------------------------------------------")
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline is not None:
+        return compare(results, args.baseline, args.tolerance)
+    return 0
+
+
+def compare(results, baseline_path, tolerance):
+    """Flags times and allocations that grew, or throughput that fell, by more than ``tolerance``."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for key, values in results.items():
+        for metric, value in values.items():
+            old = baseline.get(key, {}).get(metric)
+            if old is None:
+                continue
+            if metric == "runs_per_s":
+                worse = value < old * (1 - tolerance)
+            else:
+                # allocations close to zero are noise, a few hundred bytes are allowed on top of the ratio
+                worse = value > old * (1 + tolerance) + (256 if "_b" in metric or "kib" in metric else 0)
+            if worse:
+                regressions.append(f"{key} {metric}: {old:.1f} -> {value:.1f}")
+    if regressions:
+        print(f"  regressions against {baseline_path}:")
+        for line in regressions:
+            print(f"    {line}")
+        return 1
+    print(f"  no regressions against {baseline_path}")
+    return 0
+
+
+class BenchmarkParser(argparse.ArgumentParser):
+    def error(self, message):
+        self.print_usage(sys.stderr)
+        print(f"\nError: {message}")
+        print("\nExample usage:")
+        print("  make -C benchmarks/stub")
+        print("  LD_LIBRARY_PATH=benchmarks/stub python3 python_overhead.py -o baseline.json")
+        print("  LD_LIBRARY_PATH=benchmarks/stub python3 python_overhead.py --baseline baseline.json")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    ap = BenchmarkParser(description="Python side run overhead, allocations and thread scaling")
+    ap.add_argument('-m', '--model-path', type=str, nargs='+', help='model path(s), the stub models by default',
+                    default=sorted(glob.glob(os.path.join(STUB_MODELS, "*.axmodel"))))
+    ap.add_argument('-r', '--repeat', type=int, help='repeat times', default=1000)
+    ap.add_argument('-t', '--threads', type=int, nargs='+', help='thread counts of the scaling run',
+                    default=[1, 2, 4, 8])
+    ap.add_argument('-e', '--exec-us', type=int, help='stub execute time of the scaling run', default=2000)
+    ap.add_argument('-s', '--seconds', type=float, help='seconds per thread count', default=2.0)
+    ap.add_argument('-o', '--output', type=str, help='write the results as json', default=None)
+    ap.add_argument('-b', '--baseline', type=str, help='compare against a previous json, exit 1 on regressions',
+                    default=None)
+    ap.add_argument('--tolerance', type=float, help='allowed relative regression', default=0.2)
+    ap.add_argument(
+        '-p',
+        '--provider',
+        type=str,
+        choices=["AUTO", f"{axclrt_provider_name}", f"{axengine_provider_name}"],
+        help=f'"AUTO", "{axclrt_provider_name}", "{axengine_provider_name}"',
+        default='AUTO'
+    )
+    ap.add_argument(
+        '-d',
+        '--device-id',
+        type=int,
+        help=R'axclrt device index, depends on how many cards inserted',
+        default=0
+    )
+    args = ap.parse_args()
+
+    for model_file in args.model_path:
+        assert os.path.exists(model_file), f"model file path {model_file} does not exist"
+
+    sys.exit(main(args))
@@ -0,0 +1,780 @@
+/*
+ * Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+ *
+ * This source file is the property of Axera Semiconductor Co., Ltd. and
+ * may not be copied or distributed in any isomorphic form without the prior
+ * written consent of Axera Semiconductor Co., Ltd.
+ *
+ * Hardware-free stand-in for libax_sys.so, libax_engine.so and libaxcl_rt.so,
+ * so the Python side of axengine can be run and benchmarked without a board:
+ *
+ *     make -C benchmarks/stub
+ *     LD_LIBRARY_PATH=benchmarks/stub python3 benchmarks/python_overhead.py
+ *
+ * The same source is built into all three libraries, only the entry points
+ * declared in axengine/_axe_capi.py and axengine/_axclrt_capi.py are provided.
+ * Both providers are available, memory is plain host memory.
+ *
+ * The "model" is a plain text file (or the same bytes in memory), one tensor
+ * per line, see models/ for examples:
+ *
+ *     # group  kind    name    dtype    shape      [key=value ...]
+ *     0        input   images  uint8    1,640,640,3
+ *     0        output  out0    float32  1,80,80,255  quant=0 stride=...
+ *
+ * Optional keys: quant= (nQuantizationValue), layout= (AX_ENGINE_DATA_LAYOUT_T),
+ * cs= (color space) and stride= (byte strides, outermost first, for padded
+ * tensors). Lines starting with # are comments.
+ *
+ * Every group must list the same tensors in the same order, only the shapes
+ * may differ. Running a model sleeps for AXSTUB_EXEC_US microseconds (default
+ * 0) and then copies input[i % n_inputs] into output[i], zero-padding the rest.
+ * With AXSTUB_OUTPUT=accumulate float outputs are the elementwise sum of all inputs.
+ * With AXSTUB_OUTPUT=random the outputs are filled with reproducible values
+ * instead: float outputs uniform in [-6, 2), integer outputs uniform bytes.
+ */
+
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <pthread.h>
+
+#define MAX_GROUPS 64
+#define MAX_TENSORS 64
+#define MAX_DIMS 8
+#define MAX_NAME 128
+
+enum {
+    DT_UINT8 = 0,
+    DT_INT8,
+    DT_UINT16,
+    DT_INT16,
+    DT_UINT32,
+    DT_INT32,
+    DT_FLOAT32,
+    DT_BF16,
+    DT_COUNT,
+};
+
+static const char *dt_names[DT_COUNT] = {"uint8", "int8", "uint16", "int16", "uint32", "int32", "float32", "bfloat16"};
+static const int dt_sizes[DT_COUNT] = {1, 1, 2, 2, 4, 4, 4, 2};
+/* AX_ENGINE_DATA_TYPE_T */
+static const int dt_engine[DT_COUNT] = {1, 5, 2, 4, 7, 6, 3, 9};
+/* axclrtEngineDataType */
+static const int dt_axcl[DT_COUNT] = {4, 3, 6, 5, 8, 7, 15, 14};
+
+typedef struct {
+    char name[MAX_NAME];
+    int dtype;
+    int32_t shape[MAX_DIMS];
+    int32_t stride[MAX_DIMS];
+    int ndim;
+    int has_stride;
+    int layout;
+    int color_space;
+    uint32_t quant;
+    uint64_t size;
+} tensor_t;
+
+typedef struct {
+    int n_inputs;
+    int n_outputs;
+    tensor_t inputs[MAX_TENSORS];
+    tensor_t outputs[MAX_TENSORS];
+} group_t;
+
+typedef struct {
+    int n_groups;
+    group_t groups[MAX_GROUPS];
+    uint32_t cmm_size;
+} model_t;
+
+static uint64_t exec_us(void) {
+    const char *s = getenv("AXSTUB_EXEC_US");
+    return s ? strtoull(s, NULL, 10) : 0;
+}
+
+static void fake_execute(void) {
+    uint64_t us = exec_us();
+    if (us) {
+        struct timespec ts = {(time_t)(us / 1000000), (long)(us % 1000000) * 1000};
+        nanosleep(&ts, NULL);
+    }
+}
+
+static int parse_dims(const char *s, int32_t *out) {
+    int n = 0;
+    while (*s && n < MAX_DIMS) {
+        out[n++] = (int32_t)strtol(s, (char **)&s, 10);
+        if (*s == ',') s++;
+        else break;
+    }
+    return n;
+}
+
+static model_t *parse_model(const char *data, size_t size) {
+    model_t *m = calloc(1, sizeof(model_t));
+    char *text = malloc(size + 1);
+    memcpy(text, data, size);
+    text[size] = 0;
+
+    char *save = NULL;
+    for (char *line = strtok_r(text, "\n", &save); line; line = strtok_r(NULL, "\n", &save)) {
+        char kind[16], name[MAX_NAME], dtype[16], dims[256], rest[512] = {0};
+        int group;
+        if (line[0] == '#' || line[0] == 0) continue;
+        int got = sscanf(line, "%d %15s %127s %15s %255s %511[^\n]", &group, kind, name, dtype, dims, rest);
+        if (got < 5 || group < 0 || group >= MAX_GROUPS) continue;
+        if (group + 1 > m->n_groups) m->n_groups = group + 1;
+        group_t *g = &m->groups[group];
+        tensor_t *t;
+        if (0 == strcmp(kind, "input")) {
+            if (g->n_inputs >= MAX_TENSORS) continue;
+            t = &g->inputs[g->n_inputs++];
+        } else {
+            if (g->n_outputs >= MAX_TENSORS) continue;
+            t = &g->outputs[g->n_outputs++];
+        }
+        snprintf(t->name, MAX_NAME, "%s", name);
+        t->dtype = DT_FLOAT32;
+        for (int i = 0; i < DT_COUNT; i++)
+            if (0 == strcmp(dtype, dt_names[i])) t->dtype = i;
+        t->ndim = parse_dims(dims, t->shape);
+        t->layout = 1;
+        t->size = dt_sizes[t->dtype];
+        for (int i = 0; i < t->ndim; i++) t->size *= (uint64_t)t->shape[i];
+
+        char *rsave = NULL;
+        for (char *kv = strtok_r(rest, " \t", &rsave); kv; kv = strtok_r(NULL, " \t", &rsave)) {
+            if (0 == strncmp(kv, "quant=", 6)) t->quant = (uint32_t)strtoul(kv + 6, NULL, 10);
+            else if (0 == strncmp(kv, "layout=", 7)) t->layout = atoi(kv + 7);
+            else if (0 == strncmp(kv, "cs=", 3)) t->color_space = atoi(kv + 3);
+            else if (0 == strncmp(kv, "stride=", 7)) {
+                /* byte strides, outermost first, size becomes shape[0] * stride[0] */
+                t->has_stride = parse_dims(kv + 7, t->stride) == t->ndim;
+                if (t->has_stride && t->ndim > 0) t->size = (uint64_t)t->shape[0] * (uint64_t)t->stride[0];
+            }
+        }
+    }
+    free(text);
+    if (m->n_groups == 0) m->n_groups = 1;
+    for (int gi = 0; gi < m->n_groups; gi++) {
+        for (int i = 0; i < m->groups[gi].n_inputs; i++) m->cmm_size += (uint32_t)m->groups[gi].inputs[i].size;
+        for (int i = 0; i < m->groups[gi].n_outputs; i++) m->cmm_size += (uint32_t)m->groups[gi].outputs[i].size;
+    }
+    m->cmm_size += (uint32_t)size;
+    return m;
+}
+
+static int random_outputs(void) {
+    const char *s = getenv("AXSTUB_OUTPUT");
+    return s && 0 == strcmp(s, "random");
+}
+
+static void fill_random(void *out, uint64_t size, int dtype, uint32_t *state) {
+    if (dtype == DT_FLOAT32) {
+        float *p = out;
+        for (uint64_t i = 0; i < size / 4; i++) {
+            *state = *state * 1664525u + 1013904223u;
+            p[i] = (float)(*state >> 8) / (float)(1u << 24) * 8.0f - 6.0f;
+        }
+        return;
+    }
+    uint8_t *p = out;
+    for (uint64_t i = 0; i < size; i++) {
+        *state = *state * 1664525u + 1013904223u;
+        p[i] = (uint8_t)(*state >> 24);
+    }
+}
+
+static int accumulate_outputs(void) {
+    const char *s = getenv("AXSTUB_OUTPUT");
+    return s && 0 == strcmp(s, "accumulate");
+}
+
+static void copy_through(void **in, uint64_t *in_size, int n_in, void **out, uint64_t *out_size, int n_out,
+                         tensor_t *out_t) {
+    uint32_t state = 12345;
+    for (int i = 0; i < n_out; i++) {
+        if (!out[i]) continue;
+        if (random_outputs()) {
+            fill_random(out[i], out_size[i], out_t[i].dtype, &state);
+            continue;
+        }
+        if (accumulate_outputs() && out_t[i].dtype == DT_FLOAT32) {
+            /* float outputs become the elementwise sum of all inputs, for recurrent state tests */
+            float *o = out[i];
+            for (uint64_t k = 0; k < out_size[i] / 4; k++) {
+                float acc = 0.0f;
+                for (int j = 0; j < n_in; j++)
+                    if (in[j] && k < in_size[j] / 4) acc += ((const float *)in[j])[k];
+                o[k] = acc;
+            }
+            continue;
+        }
+        uint64_t n = 0;
+        if (n_in > 0 && in[i % n_in]) {
+            n = in_size[i % n_in] < out_size[i] ? in_size[i % n_in] : out_size[i];
+            memmove(out[i], in[i % n_in], n);
+        }
+        memset((char *)out[i] + n, 0, out_size[i] - n);
+    }
+}
+
+static void *aligned_zalloc(size_t size, size_t align) {
+    void *p = NULL;
+    if (align < sizeof(void *)) align = sizeof(void *);
+    if (posix_memalign(&p, align, size ? size : 1)) return NULL;
+    memset(p, 0, size);
+    return p;
+}
+
+/* ------------------------------------------------------------------------ */
+/* ax_sys                                                                    */
+/* ------------------------------------------------------------------------ */
+
+int AX_SYS_Init(void) { return 0; }
+int AX_SYS_Deinit(void) { return 0; }
+
+int AX_SYS_MemAllocCached(uint64_t *phy, void **vir, uint32_t size, uint32_t align, const signed char *token) {
+    (void)token;
+    void *p = aligned_zalloc(size, align ? align : 128);
+    if (!p) return -1;
+    *vir = p;
+    *phy = (uint64_t)(uintptr_t)p;
+    return 0;
+}
+
+int AX_SYS_MemAlloc(uint64_t *phy, void **vir, uint32_t size, uint32_t align, const signed char *token) {
+    return AX_SYS_MemAllocCached(phy, vir, size, align, token);
+}
+
+int AX_SYS_MemFree(uint64_t phy, void *vir) {
+    (void)phy;
+    free(vir);
+    return 0;
+}
+
+int AX_SYS_MflushCache(uint64_t phy, void *vir, uint32_t size) {
+    (void)phy, (void)vir, (void)size;
+    return 0;
+}
+
+int AX_SYS_MinvalidateCache(uint64_t phy, void *vir, uint32_t size) {
+    (void)phy, (void)vir, (void)size;
+    return 0;
+}
+
+/* ------------------------------------------------------------------------ */
+/* ax_engine                                                                 */
+/* ------------------------------------------------------------------------ */
+
+typedef struct {
+    int eColorSpace;
+    uint64_t u64Reserved[18];
+} AX_ENGINE_IO_META_EX_T;
+
+typedef struct {
+    char *pName;
+    int32_t *pShape;
+    uint8_t nShapeSize;
+    int eLayout;
+    int eMemoryType;
+    int eDataType;
+    AX_ENGINE_IO_META_EX_T *pExtraMeta;
+    uint32_t nSize;
+    uint32_t nQuantizationValue;
+    int32_t *pStride;
+    uint64_t u64Reserved[9];
+} AX_ENGINE_IO_META_T;
+
+typedef struct {
+    AX_ENGINE_IO_META_T *pInputs;
+    uint32_t nInputSize;
+    AX_ENGINE_IO_META_T *pOutputs;
+    uint32_t nOutputSize;
+    uint32_t nMaxBatchSize;
+    int bDynamicBatchSize;
+    uint64_t u64Reserved[11];
+} AX_ENGINE_IO_INFO_T;
+
+typedef struct {
+    uint64_t phyAddr;
+    void *pVirAddr;
+    uint32_t nSize;
+    int32_t *pStride;
+    uint8_t nStrideSize;
+    uint64_t u64Reserved[11];
+} AX_ENGINE_IO_BUFFER_T;
+
+typedef struct {
+    AX_ENGINE_IO_BUFFER_T *pInputs;
+    uint32_t nInputSize;
+    AX_ENGINE_IO_BUFFER_T *pOutputs;
+    uint32_t nOutputSize;
+    uint32_t nBatchSize;
+    void *pIoSetting;
+    uint64_t u64Reserved[10];
+} AX_ENGINE_IO_T;
+
+typedef struct {
+    int eHardMode;
+    uint32_t reserve[8];
+} AX_ENGINE_NPU_ATTR_T;
+
+typedef struct {
+    uint32_t nNpuSet;
+    signed char *pName;
+    uint32_t reserve[8];
+} AX_ENGINE_HANDLE_EXTRA_T;
+
+typedef struct {
+    uint32_t nCMMSize;
+} AX_ENGINE_CMM_INFO_T;
+
+typedef struct {
+    model_t *model;
+    AX_ENGINE_IO_INFO_T infos[MAX_GROUPS];
+    AX_ENGINE_IO_META_EX_T *extra;
+    uint32_t affinity;
+} engine_handle_t;
+
+static void fill_meta(AX_ENGINE_IO_META_T *meta, tensor_t *t, AX_ENGINE_IO_META_EX_T *extra) {
+    meta->pName = t->name;
+    meta->pShape = t->shape;
+    meta->nShapeSize = (uint8_t)t->ndim;
+    meta->eLayout = t->layout;
+    meta->eMemoryType = 0;
+    meta->eDataType = dt_engine[t->dtype];
+    extra->eColorSpace = t->color_space;
+    meta->pExtraMeta = extra;
+    meta->nSize = (uint32_t)t->size;
+    meta->nQuantizationValue = t->quant;
+    meta->pStride = t->has_stride ? t->stride : NULL;
+}
+
+const char *AX_ENGINE_GetVersion(void) { return "stub"; }
+void AX_ENGINE_NPUReset(void) {}
+int AX_ENGINE_Init(AX_ENGINE_NPU_ATTR_T *attr) {
+    (void)attr;
+    return 0;
+}
+int AX_ENGINE_GetVNPUAttr(AX_ENGINE_NPU_ATTR_T *attr) {
+    attr->eHardMode = 0;
+    return 0;
+}
+int AX_ENGINE_Deinit(void) { return 0; }
+
+int AX_ENGINE_GetModelType(const void *data, uint32_t size, int *type) {
+    (void)data, (void)size;
+    *type = 0;
+    return 0;
+}
+
+int AX_ENGINE_CreateHandleV2(uint64_t **handle, const void *data, uint32_t size, AX_ENGINE_HANDLE_EXTRA_T *extra) {
+    (void)extra;
+    engine_handle_t *h = calloc(1, sizeof(engine_handle_t));
+    h->model = parse_model(data, size);
+    h->extra = calloc(MAX_GROUPS * MAX_TENSORS * 2, sizeof(AX_ENGINE_IO_META_EX_T));
+    for (int gi = 0; gi < h->model->n_groups; gi++) {
+        group_t *g = &h->model->groups[gi];
+        AX_ENGINE_IO_INFO_T *info = &h->infos[gi];
+        info->nInputSize = g->n_inputs;
+        info->nOutputSize = g->n_outputs;
+        info->pInputs = calloc(g->n_inputs ? g->n_inputs : 1, sizeof(AX_ENGINE_IO_META_T));
+        info->pOutputs = calloc(g->n_outputs ? g->n_outputs : 1, sizeof(AX_ENGINE_IO_META_T));
+        info->nMaxBatchSize = 1;
+        for (int i = 0; i < g->n_inputs; i++)
+            fill_meta(&info->pInputs[i], &g->inputs[i], &h->extra[(gi * MAX_TENSORS + i) * 2]);
+        for (int i = 0; i < g->n_outputs; i++)
+            fill_meta(&info->pOutputs[i], &g->outputs[i], &h->extra[(gi * MAX_TENSORS + i) * 2 + 1]);
+    }
+    *handle = (uint64_t *)h;
+    return 0;
+}
+
+int AX_ENGINE_DestroyHandle(uint64_t *handle) {
+    engine_handle_t *h = (engine_handle_t *)handle;
+    if (!h) return 0;
+    for (int gi = 0; gi < h->model->n_groups; gi++) {
+        free(h->infos[gi].pInputs);
+        free(h->infos[gi].pOutputs);
+    }
+    free(h->extra);
+    free(h->model);
+    free(h);
+    return 0;
+}
+
+int AX_ENGINE_GetIOInfo(uint64_t *handle, AX_ENGINE_IO_INFO_T **io) {
+    *io = &((engine_handle_t *)handle)->infos[0];
+    return 0;
+}
+
+int AX_ENGINE_GetGroupIOInfoCount(uint64_t *handle, uint32_t *count) {
+    *count = (uint32_t)((engine_handle_t *)handle)->model->n_groups;
+    return 0;
+}
+
+int AX_ENGINE_GetGroupIOInfo(uint64_t *handle, uint32_t index, AX_ENGINE_IO_INFO_T **io) {
+    engine_handle_t *h = (engine_handle_t *)handle;
+    if ((int)index >= h->model->n_groups) return -1;
+    *io = &h->infos[index];
+    return 0;
+}
+
+int AX_ENGINE_GetHandleModelType(uint64_t *handle, int *type) {
+    (void)handle;
+    *type = 0;
+    return 0;
+}
+
+int AX_ENGINE_CreateContextV2(uint64_t *handle, uint64_t **context) {
+    *context = (uint64_t *)calloc(1, sizeof(uint64_t));
+    **context = (uint64_t)(uintptr_t)handle;
+    return 0;
+}
+
+static int engine_run(uint64_t *handle, uint32_t group, AX_ENGINE_IO_T *io) {
+    engine_handle_t *h = (engine_handle_t *)handle;
+    if (!h || !io || (int)group >= h->model->n_groups) return -1;
+    group_t *g = &h->model->groups[group];
+    if ((int)io->nInputSize < g->n_inputs || (int)io->nOutputSize < g->n_outputs) return -1;
+    void *in[MAX_TENSORS], *out[MAX_TENSORS];
+    uint64_t in_size[MAX_TENSORS], out_size[MAX_TENSORS];
+    for (int i = 0; i < g->n_inputs; i++) {
+        if (io->pInputs[i].nSize < g->inputs[i].size || !io->pInputs[i].pVirAddr) return -1;
+        in[i] = io->pInputs[i].pVirAddr;
+        in_size[i] = g->inputs[i].size;
+    }
+    for (int i = 0; i < g->n_outputs; i++) {
+        if (io->pOutputs[i].nSize < g->outputs[i].size || !io->pOutputs[i].pVirAddr) return -1;
+        out[i] = io->pOutputs[i].pVirAddr;
+        out_size[i] = g->outputs[i].size;
+    }
+    fake_execute();
+    copy_through(in, in_size, g->n_inputs, out, out_size, g->n_outputs, g->outputs);
+    return 0;
+}
+
+int AX_ENGINE_RunSyncV2(uint64_t *handle, uint64_t *context, AX_ENGINE_IO_T *io) {
+    (void)context;
+    return engine_run(handle, 0, io);
+}
+
+int AX_ENGINE_RunGroupIOSync(uint64_t *handle, uint64_t *context, uint32_t index, AX_ENGINE_IO_T *io) {
+    (void)context;
+    return engine_run(handle, index, io);
+}
+
+int AX_ENGINE_SetAffinity(uint64_t *handle, uint32_t set) {
+    ((engine_handle_t *)handle)->affinity = set;
+    return 0;
+}
+
+int AX_ENGINE_GetAffinity(uint64_t *handle, uint32_t *set) {
+    *set = ((engine_handle_t *)handle)->affinity;
+    return 0;
+}
+
+int AX_ENGINE_GetCMMUsage(uint64_t *handle, AX_ENGINE_CMM_INFO_T *info) {
+    info->nCMMSize = ((engine_handle_t *)handle)->model->cmm_size;
+    return 0;
+}
+
+const char *AX_ENGINE_GetModelToolsVersion(uint64_t *handle) {
+    (void)handle;
+    return "stub";
+}
+
+int AX_ENGINE_GetTotalOps(void) { return 0; }
+
+/* ------------------------------------------------------------------------ */
+/* axcl_rt                                                                   */
+/* ------------------------------------------------------------------------ */
+
+typedef struct {
+    uint32_t num;
+    int32_t devices[256];
+} axclrtDeviceList;
+
+typedef struct {
+    int32_t dimCount;
+    int32_t dims[32];
+} axclrtEngineIODims;
+
+typedef struct {
+    int n_inputs;
+    int n_outputs;
+    void *inputs[MAX_TENSORS];
+    uint64_t input_sizes[MAX_TENSORS];
+    void *outputs[MAX_TENSORS];
+    uint64_t output_sizes[MAX_TENSORS];
+} axcl_io_t;
+
+static int axcl_context_token;
+
+int axclInit(const char *config) {
+    (void)config;
+    return 0;
+}
+int axclFinalize(void) { return 0; }
+
+int axclrtGetVersion(int32_t *major, int32_t *minor, int32_t *patch) {
+    *major = 0, *minor = 0, *patch = 0;
+    return 0;
+}
+const char *axclrtGetSocName(void) { return "STUB"; }
+
+int axclrtGetDeviceList(axclrtDeviceList *list) {
+    list->num = 1;
+    list->devices[0] = 0;
+    return 0;
+}
+int axclrtSetDevice(int32_t id) {
+    (void)id;
+    return 0;
+}
+int axclrtResetDevice(int32_t id) {
+    (void)id;
+    return 0;
+}
+
+int axclrtCreateContext(void **context, int32_t id) {
+    (void)id;
+    *context = &axcl_context_token;
+    return 0;
+}
+int axclrtDestroyContext(void *context) {
+    (void)context;
+    return 0;
+}
+int axclrtSetCurrentContext(void *context) {
+    (void)context;
+    return 0;
+}
+int axclrtGetCurrentContext(void **context) {
+    *context = &axcl_context_token;
+    return 0;
+}
+int axclrtGetDefaultContext(void **context, int32_t id) {
+    (void)id;
+    *context = &axcl_context_token;
+    return 0;
+}
+
+int axclrtEngineInit(int kind) {
+    (void)kind;
+    return 0;
+}
+int axclrtEngineGetVNpuKind(int *kind) {
+    *kind = 0;
+    return 0;
+}
+int axclrtEngineFinalize(void) { return 0; }
+
+int axclrtEngineLoadFromMem(const void *data, uint64_t size, uint64_t *model_id) {
+    *model_id = (uint64_t)(uintptr_t)parse_model(data, size);
+    return 0;
+}
+
+int axclrtEngineLoadFromFile(const char *path, uint64_t *model_id) {
+    FILE *f = fopen(path, "rb");
+    if (!f) return -1;
+    fseek(f, 0, SEEK_END);
+    long size = ftell(f);
+    fseek(f, 0, SEEK_SET);
+    char *data = malloc(size > 0 ? size : 1);
+    size_t got = fread(data, 1, size, f);
+    fclose(f);
+    int ret = axclrtEngineLoadFromMem(data, got, model_id);
+    free(data);
+    return ret;
+}
+
+int axclrtEngineGetUsageFromMem(const void *data, uint64_t size, int64_t *sys_size, int64_t *cmm_size) {
+    model_t *m = parse_model(data, size);
+    *sys_size = 0;
+    *cmm_size = m->cmm_size;
+    free(m);
+    return 0;
+}
+
+int axclrtEngineGetUsage(const char *path, int64_t *sys_size, int64_t *cmm_size) {
+    FILE *f = fopen(path, "rb");
+    if (!f) return -1;
+    fseek(f, 0, SEEK_END);
+    long size = ftell(f);
+    fseek(f, 0, SEEK_SET);
+    char *data = malloc(size > 0 ? size : 1);
+    size_t got = fread(data, 1, size, f);
+    fclose(f);
+    int ret = axclrtEngineGetUsageFromMem(data, got, sys_size, cmm_size);
+    free(data);
+    return ret;
+}
+
+const char *axclrtEngineGetModelCompilerVersion(uint64_t model_id) {
+    (void)model_id;
+    return "stub";
+}
+
+int axclrtEngineUnload(uint64_t model_id) {
+    free((model_t *)(uintptr_t)model_id);
+    return 0;
+}
+
+int axclrtEngineGetIOInfo(uint64_t model_id, void **info) {
+    *info = (void *)(uintptr_t)model_id;
+    return 0;
+}
+
+int axclrtEngineGetShapeGroupsCount(void *info, int32_t *count) {
+    *count = ((model_t *)info)->n_groups;
+    return 0;
+}
+
+uint32_t axclrtEngineGetNumInputs(void *info) { return ((model_t *)info)->groups[0].n_inputs; }
+uint32_t axclrtEngineGetNumOutputs(void *info) { return ((model_t *)info)->groups[0].n_outputs; }
+
+uint64_t axclrtEngineGetInputSizeByIndex(void *info, uint32_t group, uint32_t index) {
+    return ((model_t *)info)->groups[group].inputs[index].size;
+}
+uint64_t axclrtEngineGetOutputSizeByIndex(void *info, uint32_t group, uint32_t index) {
+    return ((model_t *)info)->groups[group].outputs[index].size;
+}
+
+static int fill_dims(tensor_t *t, axclrtEngineIODims *dims) {
+    dims->dimCount = t->ndim;
+    for (int i = 0; i < t->ndim; i++) dims->dims[i] = t->shape[i];
+    return 0;
+}
+
+int axclrtEngineGetInputDims(void *info, uint32_t group, uint32_t index, axclrtEngineIODims *dims) {
+    return fill_dims(&((model_t *)info)->groups[group].inputs[index], dims);
+}
+int axclrtEngineGetOutputDims(void *info, uint32_t group, uint32_t index, axclrtEngineIODims *dims) {
+    return fill_dims(&((model_t *)info)->groups[group].outputs[index], dims);
+}
+
+const char *axclrtEngineGetInputNameByIndex(void *info, uint32_t index) {
+    return ((model_t *)info)->groups[0].inputs[index].name;
+}
+const char *axclrtEngineGetOutputNameByIndex(void *info, uint32_t index) {
+    return ((model_t *)info)->groups[0].outputs[index].name;
+}
+
+int32_t axclrtEngineGetInputDataType(void *info, uint32_t index, int *type) {
+    *type = dt_axcl[((model_t *)info)->groups[0].inputs[index].dtype];
+    return 0;
+}
+int32_t axclrtEngineGetOutputDataType(void *info, uint32_t index, int *type) {
+    *type = dt_axcl[((model_t *)info)->groups[0].outputs[index].dtype];
+    return 0;
+}
+
+int32_t axclrtEngineGetInputDataLayout(void *info, uint32_t index, int *layout) {
+    *layout = ((model_t *)info)->groups[0].inputs[index].layout == 2 ? 1 : 0;
+    return 0;
+}
+int32_t axclrtEngineGetOutputDataLayout(void *info, uint32_t index, int *layout) {
+    *layout = ((model_t *)info)->groups[0].outputs[index].layout == 2 ? 1 : 0;
+    return 0;
+}
+
+int axclrtEngineCreateIO(void *info, void **io) {
+    axcl_io_t *p = calloc(1, sizeof(axcl_io_t));
+    p->n_inputs = ((model_t *)info)->groups[0].n_inputs;
+    p->n_outputs = ((model_t *)info)->groups[0].n_outputs;
+    *io = p;
+    return 0;
+}
+
+int axclrtEngineDestroyIO(void *io) {
+    free(io);
+    return 0;
+}
+
+int axclrtEngineSetInputBufferByIndex(void *io, uint32_t index, const void *buf, uint64_t size) {
+    axcl_io_t *p = io;
+    if ((int)index >= p->n_inputs) return -1;
+    p->inputs[index] = (void *)buf;
+    p->input_sizes[index] = size;
+    return 0;
+}
+int axclrtEngineSetOutputBufferByIndex(void *io, uint32_t index, const void *buf, uint64_t size) {
+    axcl_io_t *p = io;
+    if ((int)index >= p->n_outputs) return -1;
+    p->outputs[index] = (void *)buf;
+    p->output_sizes[index] = size;
+    return 0;
+}
+int axclrtEngineGetInputBufferByIndex(void *io, uint32_t index, void **buf, uint64_t *size) {
+    axcl_io_t *p = io;
+    if ((int)index >= p->n_inputs) return -1;
+    *buf = p->inputs[index];
+    *size = p->input_sizes[index];
+    return 0;
+}
+int axclrtEngineGetOutputBufferByIndex(void *io, uint32_t index, void **buf, uint64_t *size) {
+    axcl_io_t *p = io;
+    if ((int)index >= p->n_outputs) return -1;
+    *buf = p->outputs[index];
+    *size = p->output_sizes[index];
+    return 0;
+}
+
+int axclrtEngineCreateContext(uint64_t model_id, uint64_t *context_id) {
+    *context_id = model_id;
+    return 0;
+}
+
+int axclrtEngineExecute(uint64_t model_id, uint64_t context_id, uint32_t group, void *io) {
+    (void)context_id;
+    model_t *m = (model_t *)(uintptr_t)model_id;
+    axcl_io_t *p = io;
+    if (!m || !p || (int)group >= m->n_groups) return -1;
+    group_t *g = &m->groups[group];
+    uint64_t in_size[MAX_TENSORS], out_size[MAX_TENSORS];
+    for (int i = 0; i < g->n_inputs; i++) {
+        if (!p->inputs[i] || p->input_sizes[i] < g->inputs[i].size) return -1;
+        in_size[i] = g->inputs[i].size;
+    }
+    for (int i = 0; i < g->n_outputs; i++) {
+        if (!p->outputs[i] || p->output_sizes[i] < g->outputs[i].size) return -1;
+        out_size[i] = g->outputs[i].size;
+    }
+    fake_execute();
+    copy_through(p->inputs, in_size, g->n_inputs, p->outputs, out_size, g->n_outputs, g->outputs);
+    return 0;
+}
+
+int axclrtMalloc(void **ptr, size_t size, int policy) {
+    (void)policy;
+    *ptr = aligned_zalloc(size, 128);
+    return *ptr ? 0 : -1;
+}
+int axclrtMallocCached(void **ptr, size_t size, int policy) { return axclrtMalloc(ptr, size, policy); }
+int axclrtMemcpy(void *dst, const void *src, size_t count, int kind) {
+    (void)kind;
+    memmove(dst, src, count);
+    return 0;
+}
+int axclrtMemset(void *ptr, uint8_t value, size_t count) {
+    memset(ptr, value, count);
+    return 0;
+}
+int axclrtFree(void *ptr) {
+    free(ptr);
+    return 0;
+}
+int axclrtMemFlush(void *ptr, size_t size) {
+    (void)ptr, (void)size;
+    return 0;
+}
+int axclrtMemInvalidate(void *ptr, size_t size) {
+    (void)ptr, (void)size;
+    return 0;
+}
@@ -0,0 +1,93 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# the reference implementation lives in the yolov5 example
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples"))
+
+from yolov5 import ANCHORS, STRIDES, CONF_THRESH, IOU_THRESH, gen_proposals, nms  # noqa: E402
+from axengine.postprocess import YoloDecoder  # noqa: E402
+
+
+def synthetic_outputs(num_objects, seed=0):
+    # background cells are confidently empty, a few planted objects light up a 2x2 neighbourhood
+    rng = np.random.default_rng(seed)
+    outputs = []
+    for stride in STRIDES:
+        size = 640 // stride
+        out = rng.normal(-6.0, 1.5, size=(1, size, size, 3, 85)).astype(np.float32)
+        for _ in range(num_objects):
+            y, x, a, c = rng.integers(0, size - 1), rng.integers(0, size - 1), rng.integers(0, 3), rng.integers(0, 80)
+            out[0, y:y + 2, x:x + 2, a, 4] = rng.uniform(1.0, 4.0)
+            out[0, y:y + 2, x:x + 2, a, 5 + c] = rng.uniform(1.0, 4.0)
+        outputs.append(out.reshape(1, size, size, 255))
+    return outputs
+
+
+def reference(outputs):
+    # gen_proposals applies sigmoid in place, so it gets its own copy
+    proposals = gen_proposals([o.copy() for o in outputs])
+    return nms(proposals, IOU_THRESH, CONF_THRESH, multi_label=True)
+
+
+def measure(fn, outputs, repeat):
+    time_costs = []
+    result = None
+    for _ in range(repeat):
+        t1 = time.perf_counter()
+        result = fn(outputs)
+        time_costs.append((time.perf_counter() - t1) * 1000)
+    return result, np.array(time_costs)
+
+
+def compare(ref, det):
+    if len(ref) != len(det):
+        return f"detections differ: reference {len(ref)}, decoder {len(det)}"
+    if len(ref) == 0:
+        return "no detections"
+    ref = ref[np.lexsort((ref[:, 0], ref[:, 5], -ref[:, 4]))]
+    det = det[np.lexsort((det[:, 0], det[:, 5], -det[:, 4]))]
+    return f"{len(det)} detections, max abs diff {np.abs(ref - det).max():.2e}"
+
+
+def main(num_objects, repeat, npz_path):
+    if npz_path is not None:
+        data = np.load(npz_path)
+        outputs = [data[k].astype(np.float32) for k in sorted(data.files)]
+    else:
+        outputs = synthetic_outputs(num_objects)
+
+    decoder = YoloDecoder(ANCHORS, STRIDES, num_classes=80, conf_threshold=CONF_THRESH,
+                          iou_threshold=IOU_THRESH, multi_label=True)
+
+    ref, ref_costs = measure(reference, outputs, repeat)
+    det, det_costs = measure(lambda o: decoder(o)[0], outputs, repeat)
+
+    print("  ------------------------------------------------------")
+    print(f"  {'implementation':<24} {'min ms':>8} {'avg ms':>8} {'max ms':>8}")
+    for name, costs in (("examples/yolov5.py", ref_costs), ("axengine.postprocess", det_costs)):
+        print(f"  {name:<24} {costs.min():>8.3f} {costs.mean():>8.3f} {costs.max():>8.3f}")
+    print("  ------------------------------------------------------")
+    print(f"  speedup (avg) = {ref_costs.mean() / det_costs.mean():.1f}x, {compare(ref, det)}")
+    print("  ------------------------------------------------------")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="YOLOv5 postprocess benchmark, example implementation vs axengine.postprocess")
+    ap.add_argument('-n', '--num-objects', type=int, help='planted objects per output level', default=20)
+    ap.add_argument('-r', '--repeat', type=int, help='repeat times', default=50)
+    ap.add_argument('-i', '--npz-path', type=str, default=None,
+                    help='npz file with real model outputs, e.g. np.savez(path, *session.run(None, feed))')
+    args = ap.parse_args()
+
+    main(args.num_objects, args.repeat, args.npz_path)
@@ -16,12 +16,24 @@ from PIL import Image
 
 import axengine as axe
 from axengine import axclrt_provider_name, axengine_provider_name
+from axengine.preprocess import CenterCrop
 
+try:
+    import cv2  # noqa: F401, linear resizes of axengine.preprocess
+    INTERPOLATION = "linear"
+except ImportError:
+    INTERPOLATION = "nearest"
+
+
+def load_model(model_path: str | os.PathLike, selected_provider: str, selected_device_id: int = 0,
+               warmup_runs: int = 0):
+    # warmup runs are done while loading, so they are not part of the measured time costs
+    sess_options = axe.SessionOptions()
+    sess_options.warmup_runs = warmup_runs
 
-def load_model(model_path: str | os.PathLike, selected_provider: str, selected_device_id: int = 0):
     if selected_provider == 'AUTO':
         # Use AUTO to let the pyengine choose the first available provider
-        return axe.InferenceSession(model_path)
+        return axe.InferenceSession(model_path, sess_options)
 
     providers = []
     if selected_provider == axclrt_provider_name:
@@ -30,46 +42,24 @@ def load_model(model_path: str | os.PathLike, selected_provider: str, selected_d
     if selected_provider == axengine_provider_name:
         providers.append(axengine_provider_name)
 
-    return axe.InferenceSession(model_path, providers=providers)
+    return axe.InferenceSession(model_path, sess_options, providers=providers)
 
 
 def preprocess_image(
         image_path: str | os.PathLike,
         middle_step_size: (int, int) = (256, 256),
-        final_step_size: (int, int) = (224, 224)
+        final_step_size: (int, int) = (224, 224),
+        out: np.ndarray | None = None,
 ):
     # Load the image
-    img = Image.open(image_path).convert("RGB")
-
-    # Get original dimensions
-    original_width, original_height = img.size
-
-    # Determine the shorter side and calculate the center crop
-    if original_width < original_height:
-        crop_area = original_width
-    else:
-        crop_area = original_height
-
-    crop_x = (original_width - crop_area) // 2
-    crop_y = (original_height - crop_area) // 2
+    img = np.asarray(Image.open(image_path).convert("RGB"))
 
-    # Crop the center square
-    img = img.crop((crop_x, crop_y, crop_x + crop_area, crop_y + crop_area))
-
-    # Resize the image to 256x256
-    img = img.resize(middle_step_size)
-
-    # Crop the center 224x224
-    crop_x = (middle_step_size[0] - final_step_size[0]) // 2
-    crop_y = (middle_step_size[1] - final_step_size[1]) // 2
-    img = img.crop((crop_x, crop_y, crop_x + final_step_size[0], crop_y + final_step_size[1]))
-
-    # Convert to numpy array and change dtype to int
-    img_array = np.array(img).astype("uint8")
-    # Transpose to (1, C, H, W)
-    # img_array = np.transpose(img_array, (2, 0, 1))
-    img_array = np.expand_dims(img_array, axis=0)  # Add batch dimension
-    return img_array
+    # Resizing the shorter side to 256 and cropping the center 224x224 is one resize of the matching
+    # source region, written straight into out (NHWC), e.g. the session input buffer
+    center_crop = CenterCrop(final_step_size, middle_step_size, interpolation=INTERPOLATION)
+    if out is None:
+        out = np.empty((1, final_step_size[0], final_step_size[1], 3), dtype=np.uint8)
+    return center_crop(img, out=out)
 
 
 def get_top_k_predictions(output: list[np.ndarray], k: int = 5):
@@ -80,20 +70,20 @@ def get_top_k_predictions(output: list[np.ndarray], k: int = 5):
 
 
 def main(model_path, image_path, middle_step_size, final_step_size, k, repeat_times, selected_provider,
-         selected_device_id):
+         selected_device_id, warmup_runs=0):
     # Load the model
-    session = load_model(model_path, selected_provider, selected_device_id)
+    session = load_model(model_path, selected_provider, selected_device_id, warmup_runs)
 
-    # Preprocess the image
-    input_tensor = preprocess_image(image_path, middle_step_size, final_step_size)
-
-    # Get input name and run inference
+    # Preprocess the image straight into the input buffer, runs then take it from there
     input_name = session.get_inputs()[0].name
+    preprocess_image(image_path, middle_step_size, final_step_size, out=session.get_input_buffer(input_name))
+
+    # Run inference
     time_costs = []
     output = None
     for i in range(repeat_times):
         t1 = time.time()
-        output = session.run(None, {input_name: input_tensor})
+        output = session.run(None, {})
         t2 = time.time()
         time_costs.append((t2 - t1) * 1000)
 
@@ -162,6 +152,7 @@ if __name__ == "__main__":
         default=5
     )
     ap.add_argument('-r', '--repeat', type=int, help='repeat times', default=100)
+    ap.add_argument('-w', '--warmup', type=int, help='warmup runs done when the model is loaded', default=0)
     ap.add_argument(
         '-p',
         '--provider',
@@ -195,4 +186,4 @@ if __name__ == "__main__":
     provider = args.provider
     device_id = args.device_id
 
-    main(model_file, image_file, resize_size, crop_size, top_k, repeat, provider, device_id)
+    main(model_file, image_file, resize_size, crop_size, top_k, repeat, provider, device_id, args.warmup)
@@ -17,6 +17,7 @@ import numpy as np
 
 import axengine as axe
 from axengine import axclrt_provider_name, axengine_provider_name
+from axengine.preprocess import Letterbox
 
 CONF_THRESH = 0.45
 IOU_THRESH = 0.45
@@ -196,55 +197,17 @@ COCO_CATEGORIES = {
 }
 
 
-def letterbox_yolov5(
-        im,
-        new_shape=(640, 640),
-        color=(114, 114, 114),
-        auto=True,
-        scaleFill=False,
-        scaleup=True,
-        stride=32,
-):
-    # Resize and pad image while meeting stride-multiple constraints
-    shape = im.shape[:2]  # current shape [height, width]
-    if isinstance(new_shape, int):
-        new_shape = (new_shape, new_shape)
-
-    # Scale ratio (new / old)
-    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
-    if not scaleup:  # only scale down, do not scale up (for better val mAP)
-        r = min(r, 1.0)
-
-    # Compute padding
-    ratio = r, r  # width, height ratios
-    new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
-    dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]  # wh padding
-    if auto:  # minimum rectangle
-        dw, dh = np.mod(dw, stride), np.mod(dh, stride)  # wh padding
-    elif scaleFill:  # stretch
-        dw, dh = 0.0, 0.0
-        new_unpad = (new_shape[1], new_shape[0])
-        ratio = new_shape[1] / shape[1], new_shape[0] / shape[0]  # width, height ratios
-
-    dw /= 2  # divide padding into 2 sides
-    dh /= 2
-
-    if shape[::-1] != new_unpad:  # resize
-        im = cv2.resize(im, new_unpad, interpolation=cv2.INTER_LINEAR)
-    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
-    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
-    im = cv2.copyMakeBorder(
-        im, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color
-    )  # add border
-    return im, ratio, (dw, dh)
-
-
-def pre_processing(image_raw, img_shape):
-    img = letterbox_yolov5(image_raw, img_shape, stride=32, auto=False)[0]
-    img = img[:, :, ::-1]
-    img = img[np.newaxis, ...]
+# aspect preserving resize, gray padding and BGR to RGB, written in one pass
+letterbox = Letterbox(INPUT_SHAPE, color=(114, 114, 114), swap_rb=True)
+
+
+def pre_processing(image_raw, out=None):
+    # out may be the session input buffer, then the image is written where the NPU reads it
+    if out is None:
+        out = np.empty((1, INPUT_SHAPE[0], INPUT_SHAPE[1], 3), dtype=np.uint8)
+    letterbox(image_raw, out=out)
     origin_shape = image_raw.shape[0:2]
-    return img, origin_shape
+    return out, origin_shape
 
 
 def draw_bbox(image, bboxes, classes=None, show_label=True, threshold=0.1):
@@ -467,19 +430,19 @@ def detect_yolov5(model_path, image_path, save_path, repeat_times, selected_prov
         session = axe.InferenceSession(model_path, providers=providers)
 
     image_data = cv2.imread(image_path)
-    inputs, origin_shape = pre_processing(image_data, (640, 640))
-    inputs = np.ascontiguousarray(inputs)
+    # letterboxed straight into the input buffer, runs then take it from there
+    _, origin_shape = pre_processing(image_data, out=session.get_input_buffer("images"))
 
     print("  ------------------------------------------------------")
     time_costs = []
     results = None
     for i in range(repeat_times):
         t1 = time.time()
-        results = session.run(None, {"images": inputs})
+        results = session.run(None, {})
         t2 = time.time()
         time_costs.append((t2 - t1) * 1000)
 
-    det = post_processing(results, origin_shape, (640, 640))
+    det = post_processing(results, origin_shape, INPUT_SHAPE)
     ret_image = draw_bbox(image_data, det)
     cv2.imwrite(save_path, ret_image)
 
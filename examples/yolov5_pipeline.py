@@ -0,0 +1,136 @@
+# Copyright (c) 2019-2024 Axera Semiconductor Co., Ltd. All Rights Reserved.
+#
+# This source file is the property of Axera Semiconductor Co., Ltd. and
+# may not be copied or distributed in any isomorphic form without the prior
+# written consent of Axera Semiconductor Co., Ltd.
+#
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+import axengine as axe
+from axengine import axclrt_provider_name, axengine_provider_name
+from axengine.pipeline import Pipeline, Stage
+from yolov5 import INPUT_SHAPE, pre_processing, post_processing, draw_bbox
+
+
+def read_frames(video_path):
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise RuntimeError(f"Failed to open video {video_path}.")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield frame
+    finally:
+        capture.release()
+
+
+def preprocess(frame):
+    # several frames are in flight, so each gets its own input array instead of the session input buffer
+    inputs, origin_shape = pre_processing(frame)
+    return inputs, origin_shape, frame
+
+
+def postprocess(item):
+    outputs, origin_shape, frame = item
+    det = post_processing(outputs, origin_shape, INPUT_SHAPE)
+    return draw_bbox(frame, det) if len(det) else frame
+
+
+def detect_video(model_path, video_path, save_path, workers, queue_size, drop_frames,
+                 selected_provider='AUTO', selected_device_id=0):
+    if selected_provider == 'AUTO':
+        # Use AUTO to let the pyengine choose the first available provider
+        session = axe.InferenceSession(model_path)
+    else:
+        providers = []
+        if selected_provider == axclrt_provider_name:
+            provider_options = {"device_id": selected_device_id}
+            providers.append((axclrt_provider_name, provider_options))
+        if selected_provider == axengine_provider_name:
+            providers.append(axengine_provider_name)
+        session = axe.InferenceSession(model_path, providers=providers)
+
+    # decode runs in the source thread, cpu stages overlap with the npu running the previous frames
+    pipe = Pipeline(
+        [Stage(preprocess, workers=workers), session, Stage(postprocess, workers=workers)],
+        queue_size=queue_size,
+        drop_frames=drop_frames,
+    )
+
+    writer = None
+    frames = 0
+    t1 = time.time()
+    for image in pipe.run(read_frames(video_path)):
+        if save_path is not None:
+            if writer is None:
+                h, w = image.shape[:2]
+                writer = cv2.VideoWriter(save_path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (w, h))
+            writer.write(image)
+        frames += 1
+    cost = time.time() - t1
+    if writer is not None:
+        writer.release()
+
+    print("  ------------------------------------------------------")
+    for stats in pipe.stats().values():
+        print(f"  {stats.name:<12} count = {stats.count:>5}   avg = {stats.mean_latency * 1000:>8.3f} ms"
+              f"   throughput = {stats.throughput:>7.1f} fps")
+    print("  ------------------------------------------------------")
+    p = pipe.latency_percentiles()
+    print(f"  frames = {frames}   dropped = {pipe.dropped}   end to end = {frames / cost:.1f} fps")
+    print(f"  latency p50 = {p[50] * 1000:.3f} ms   p90 = {p[90] * 1000:.3f} ms   p99 = {p[99] * 1000:.3f} ms")
+    print("  ------------------------------------------------------")
+
+
+class ExampleParser(argparse.ArgumentParser):
+    def error(self, message):
+        self.print_usage(sys.stderr)
+        print(f"\nError: {message}")
+        print("\nExample usage:")
+        print("  python3 yolov5_pipeline.py -m <model_file> -v <video_file>")
+        print("  python3 yolov5_pipeline.py -m /opt/data/npu/models/yolov5s.axmodel -v /opt/data/npu/videos/road.mp4")
+        print(
+            f"  python3 yolov5_pipeline.py -m /opt/data/npu/models/yolov5s.axmodel -v /opt/data/npu/videos/road.mp4 -p {axclrt_provider_name}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    ap = ExampleParser(description="YOLOv5 streaming pipeline example")
+    ap.add_argument('-m', '--model-path', type=str, help='model path', required=True)
+    ap.add_argument('-v', '--video-path', type=str, help='video path', required=True)
+    ap.add_argument('-s', "--save-path", type=str, default=None, help="detected output video save path")
+    ap.add_argument('-w', '--workers', type=int, help='worker threads of the pre/post processing stages', default=2)
+    ap.add_argument('-q', '--queue-size', type=int, help='capacity of the queues between stages', default=4)
+    ap.add_argument('--drop-frames', action='store_true', help='drop frames when the pipeline is overloaded')
+    ap.add_argument(
+        '-p',
+        '--provider',
+        type=str,
+        choices=["AUTO", f"{axclrt_provider_name}", f"{axengine_provider_name}"],
+        help=f'"AUTO", "{axclrt_provider_name}", "{axengine_provider_name}"',
+        default='AUTO'
+    )
+    ap.add_argument(
+        '-d',
+        '--device-id',
+        type=int,
+        help=R'axclrt device index, depends on how many cards inserted',
+        default=0
+    )
+    args = ap.parse_args()
+
+    # check if the model and video exist
+    assert os.path.exists(args.model_path), f"model file path {args.model_path} does not exist"
+    assert os.path.exists(args.video_path), f"video file path {args.video_path} does not exist"
+
+    detect_video(args.model_path, args.video_path, args.save_path, args.workers, args.queue_size, args.drop_frames,
+                 args.provider, args.device_id)